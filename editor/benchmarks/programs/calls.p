@@ -0,0 +1,16 @@
+FUNCTION Add(a : INTEGER, b : INTEGER) RETURNS INTEGER
+    RETURN a + b
+ENDFUNCTION
+PROCEDURE Nop(x : INTEGER)
+ENDPROCEDURE
+DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE s : INTEGER
+s <- 0
+FOR i <- 1 TO 50
+    FOR j <- 1 TO 1000
+        s <- Add(s, j)
+        CALL Nop(j)
+    NEXT j
+NEXT i
+OUTPUT s
@@ -0,0 +1,19 @@
+DECLARE Line : STRING
+DECLARE I : INTEGER
+DECLARE Count : INTEGER
+DECLARE Row : STRING
+// 100 characters a line, so data.txt is about 5 MB
+Row <- "abcdefghijklmnopqrstuvwxyzabcdefghijklmnopqrstuvwxyzabcdefghijklmnopqrstuvwxyzabcdefghijklmnopqrstuv"
+OPENFILE "data.txt" FOR WRITE
+FOR I <- 1 TO 50000
+  WRITEFILE "data.txt", Row
+NEXT I
+CLOSEFILE "data.txt"
+Count <- 0
+OPENFILE "data.txt" FOR READ
+WHILE NOT EOF("data.txt") DO
+  READFILE "data.txt", Line
+  Count <- Count + 1
+ENDWHILE
+CLOSEFILE "data.txt"
+OUTPUT Count
@@ -0,0 +1,6 @@
+DECLARE A : ARRAY[1:1000000] OF REAL
+DECLARE I : INTEGER
+FOR I <- 1 TO 1000000
+  A[I] <- I / 2
+NEXT I
+OUTPUT A[1000000]
@@ -0,0 +1,23 @@
+DECLARE M : ARRAY[1:40, 1:40] OF INTEGER
+DECLARE N : ARRAY[1:40, 1:40] OF INTEGER
+DECLARE P : ARRAY[1:40, 1:40] OF INTEGER
+DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE k : INTEGER
+DECLARE s : INTEGER
+FOR i <- 1 TO 40
+  FOR j <- 1 TO 40
+    M[i, j] <- i + j
+    N[i, j] <- i - j
+  NEXT j
+NEXT i
+FOR i <- 1 TO 40
+  FOR j <- 1 TO 40
+    s <- 0
+    FOR k <- 1 TO 40
+      s <- s + M[i, k] * N[k, j]
+    NEXT k
+    P[i, j] <- s
+  NEXT j
+NEXT i
+OUTPUT P[40, 40]
@@ -0,0 +1,4 @@
+DECLARE I : INTEGER
+FOR I <- 1 TO 100000
+  OUTPUT "Line ", I
+NEXT I
@@ -0,0 +1,17 @@
+DECLARE A : ARRAY[1:300] OF INTEGER
+DECLARE i : INTEGER
+DECLARE j : INTEGER
+DECLARE t : INTEGER
+FOR i <- 1 TO 300
+  A[i] <- 301 - i
+NEXT i
+FOR i <- 1 TO 299
+  FOR j <- 1 TO 300 - i
+    IF A[j] > A[j + 1] THEN
+      t <- A[j]
+      A[j] <- A[j + 1]
+      A[j + 1] <- t
+    ENDIF
+  NEXT j
+NEXT i
+OUTPUT A[1], A[300]
@@ -0,0 +1,276 @@
+"""
+Benchmarks for the interpreter.
+
+Each benchmark runs one pseudocode program under a few configurations, for
+example with and without a tracer installed. Every sample runs in a fresh
+process and the configurations take turns, so a slow spell on the machine
+hits all of them alike; the best and the median time of each are reported,
+with the largest peak resident memory of its processes.
+Only execution is timed, not lexing and parsing.
+
+    python benchmarks/run.py                  every benchmark
+    python benchmarks/run.py hooks record     only these
+    python benchmarks/run.py calls --against e84b380
+
+--against REV also runs the default configuration of each benchmark on the
+interpreter as it was at git revision REV, to check a before/after claim.
+Configurations an old interpreter doesn't support are reported as n/a.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EDITOR = os.path.dirname(HERE)
+PROGRAMS = os.path.join(HERE, "programs")
+
+
+@dataclass
+class Benchmark:
+    about: str
+    # File in programs/, or a function returning the source
+    program: str | Callable[[], str]
+    # Name -> Interpreter keyword arguments, "setup" names a function in SETUPS
+    configs: dict[str, dict] = field(default_factory=lambda: {"default": {}})
+
+    def source(self) -> str:
+        if callable(self.program):
+            return self.program()
+        with open(os.path.join(PROGRAMS, self.program), "r") as file:
+            return file.read()
+
+
+def globals_program(count: int = 1000, depth: int = 50, calls: int = 200) -> str:
+    """A FUNCTION recursing depth deep, called calls times, next to count globals."""
+    lines = [f"DECLARE G{i} : INTEGER" for i in range(count)]
+    lines += [
+        "DECLARE I : INTEGER",
+        "DECLARE T : INTEGER",
+        "FUNCTION Depth(N : INTEGER) RETURNS INTEGER",
+        # Writing a global keeps the function from being memoized
+        "  G0 <- G0 + 1",
+        "  IF N = 0 THEN",
+        "    RETURN 0",
+        "  ENDIF",
+        "  RETURN Depth(N - 1) + 1",
+        "ENDFUNCTION",
+        "G0 <- 0",
+        "T <- 0",
+        f"FOR I <- 1 TO {calls}",
+        f"  T <- T + Depth({depth})",
+        "NEXT I",
+        "OUTPUT T",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# The array backends, the default first
+BACKENDS = {
+    "array": {},
+    "list": {"array_backend": "list"},
+    "numpy": {"array_backend": "numpy"},
+}
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    "calls": Benchmark(
+        "50k calls to a two-parameter FUNCTION and a one-parameter PROCEDURE",
+        "calls.p",
+    ),
+    "sort": Benchmark("bubble sort of 300 INTEGERs in a 1-D array", "sort.p"),
+    "matrix": Benchmark(
+        "product of two 40x40 INTEGER matrices",
+        "matrix.p",
+        BACKENDS,
+    ),
+    "fill": Benchmark(
+        "filling a 1M-element REAL array",
+        "fill.p",
+        BACKENDS,
+    ),
+    "output": Benchmark(
+        "100k OUTPUT lines, buffered and written one at a time",
+        "output.p",
+        {"buffered": {}, "unbuffered": {"setup": "unbuffered"}},
+    ),
+    "files": Benchmark(
+        "writing and reading back a 5 MB, 50k-line file",
+        "files.p",
+        {"disk": {}, "vfs": {"setup": "vfs"}},
+    ),
+    "hooks": Benchmark(
+        "sort.p with no hooks, a hook added and removed, and a no-op hook",
+        "sort.p",
+        {"none": {}, "removed": {"setup": "hook-removed"}, "noop": {"setup": "hook"}},
+    ),
+    "record": Benchmark(
+        "sort.p untraced, with a no-op tracer and recording a trace",
+        "sort.p",
+        {"none": {}, "tracer": {"setup": "tracer"}, "record": {"setup": "record"}},
+    ),
+    "globals": Benchmark(
+        "200 recursions 50 deep with 1000 globals declared",
+        globals_program,
+    ),
+}
+
+
+def unbuffered(interpreter, program, source):
+    from cambridgeScript.interpreter.streams import BufferedOutputStream
+
+    interpreter.output_stream = BufferedOutputStream(buffer_size=0)
+
+
+def vfs(interpreter, program, source):
+    from cambridgeScript.interpreter.files import VirtualFileSystem, VirtualFileTable
+
+    interpreter.files = VirtualFileTable(interpreter.origin, VirtualFileSystem())
+
+
+def ignore(*args):
+    pass
+
+
+def hook(interpreter, program, source):
+    interpreter.add_hook("on_statement", ignore)
+
+
+def hook_removed(interpreter, program, source):
+    interpreter.add_hook("on_statement", ignore)
+    interpreter.remove_hook("on_statement", ignore)
+
+
+def tracer(interpreter, program, source):
+    from cambridgeScript.interpreter.tracing import Tracer
+
+    interpreter.set_tracer(Tracer())
+
+
+def record(interpreter, program, source):
+    from cambridgeScript.interpreter.recorder import TraceRecorder
+
+    TraceRecorder(program, source).install(interpreter)
+
+
+# Name -> function(interpreter, program, source) run before the program
+SETUPS: dict[str, Callable] = {
+    "unbuffered": unbuffered,
+    "vfs": vfs,
+    "hook": hook,
+    "hook-removed": hook_removed,
+    "tracer": tracer,
+    "record": record,
+}
+
+
+def sample(tree: str, name: str, config: str) -> tuple[float, float]:
+    """
+    Seconds one run of a benchmark takes with the interpreter in tree, and the
+    peak resident memory of the process in MiB.
+    """
+    sys.path.insert(0, tree)
+    from cambridgeScript.interpreter.interpreter import Interpreter
+    from cambridgeScript.interpreter.variables import VariableState
+    from cambridgeScript.parser.lexer import parse_tokens
+    from cambridgeScript.parser.parser import Parser
+
+    benchmark = BENCHMARKS[name]
+    options = dict(benchmark.configs[config])
+    setup = SETUPS.get(options.pop("setup", None))
+    source = benchmark.source()
+    program = Parser.parse_program(parse_tokens(source), source)
+    interpreter = Interpreter(VariableState(), source, **options)
+    if setup is not None:
+        setup(interpreter, program, source)
+    # Output goes to a real file, so every flush is a system call
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        started = time.perf_counter()
+        interpreter.visit(program)
+        seconds = time.perf_counter() - started
+    return seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def spawn(tree: str, name: str, config: str) -> list[float] | None:
+    """Run one sample in a new process, None if the configuration failed."""
+    with tempfile.TemporaryDirectory() as workdir:
+        result = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--sample", tree, name, config],
+            cwd=workdir,
+            capture_output=True,
+            text=True,
+        )
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout)
+
+
+def checkout(revision: str, into: str) -> str:
+    """Extract the interpreter at revision into a directory to import it from."""
+    archive = subprocess.run(
+        [
+            "git",
+            "archive",
+            "--prefix=cambridgeScript/",
+            f"{revision}:editor/cambridgeScript",
+        ],
+        cwd=os.path.dirname(EDITOR),
+        capture_output=True,
+        check=True,
+    )
+    subprocess.run(["tar", "-x", "-C", into], input=archive.stdout, check=True)
+    return into
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("benchmarks", nargs="*", help="names, all by default")
+    parser.add_argument("--rounds", type=int, default=5, help="samples of each")
+    parser.add_argument("--against", help="git revision to compare with")
+    parser.add_argument("--sample", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.sample is not None:
+        print(json.dumps(sample(*args.sample)))
+        return
+
+    names = args.benchmarks or list(BENCHMARKS)
+    unknown = set(names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks {', '.join(sorted(unknown))}")
+    with tempfile.TemporaryDirectory() as checkouts:
+        old = checkout(args.against, checkouts) if args.against else None
+        for name in names:
+            benchmark = BENCHMARKS[name]
+            runs = [("", EDITOR, config) for config in benchmark.configs]
+            if old is not None:
+                runs.append((f"{args.against} ", old, next(iter(benchmark.configs))))
+            samples: dict[tuple, list] = {run: [] for run in runs}
+            for _ in range(args.rounds):
+                for run in runs:
+                    samples[run].append(spawn(run[1], name, run[2]))
+            print(f"{name}: {benchmark.about}")
+            for (label, _, config), results in samples.items():
+                label = f"{label}{config}"
+                if None in results:
+                    print(f"  {label:28} n/a")
+                    continue
+                seconds = [seconds for seconds, _ in results]
+                print(
+                    f"  {label:28} best {min(seconds):8.4f}s"
+                    f"  median {statistics.median(seconds):8.4f}s"
+                    f"  peak RSS {max(rss for _, rss in results):7.1f} MiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -21,17 +21,191 @@
 #     program.execute()
 
 
+import argparse
+import json
+import math
 import sys, os
+import time
 
 
-class SimpleInputStream:
-    """A simple input stream"""
+def positive(cast):
+    """An argparse type accepting only finite numbers greater than 0."""
 
-    def readline(self):
+    def parse(text: str):
         try:
-            return input() + "\n"
-        except EOFError:
-            return ""
+            value = cast(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid number: {text!r}")
+        if not math.isfinite(value) or value <= 0:
+            raise argparse.ArgumentTypeError(f"must be a positive number: {text!r}")
+        return value
+
+    return parse
+
+
+def write_summary(args, timings: dict, interpreter, error: BaseException | None):
+    """Write the run summary where --summary and --summary-json ask for it."""
+    if not args.summary and args.summary_json is None:
+        return
+    summary = {
+        "seconds": timings,
+        **interpreter.run_stats(),
+        "error": type(error).__name__ if error is not None else None,
+    }
+    if args.summary:
+        print(json.dumps(summary), file=sys.stderr)
+    if args.summary_json is not None:
+        with open(args.summary_json, "w") as file:
+            json.dump(summary, file)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog="cambridgeScript", description="Run a pseudocode program"
+    )
+    parser.add_argument("file", help="pseudocode source file")
+    parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=0,
+        help="results cached per pure function, 0 (the default) disables "
+        "memoization; cached calls don't run their body, so they use no fuel "
+        "and aren't seen by --profile, --debug, --coverage or --record",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="specialize operators for the operand types they see, --profile "
+        "shows how often each specialization held",
+    )
+    parser.add_argument(
+        "--array-backend",
+        choices=ARRAY_BACKENDS,
+        default="array",
+        help="storage for INTEGER, REAL and BOOLEAN arrays",
+    )
+    parser.add_argument(
+        "--fuel",
+        type=positive(int),
+        default=None,
+        help="maximum number of statements to execute",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=positive(float),
+        default=None,
+        help="wall-clock limit for the run in seconds",
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=positive(int),
+        default=None,
+        help="approximate bytes the program's values may use",
+    )
+    parser.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="print peak memory use to stderr at the end of the run",
+    )
+    parser.add_argument(
+        "--output-buffer",
+        type=positive(int),
+        default=8192,
+        help="characters of output collected before writing, 1 writes every OUTPUT",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=positive(float),
+        default=0.1,
+        help="seconds buffered output may wait before it is written, checked "
+        "every 10000 statements",
+    )
+    parser.add_argument(
+        "--input",
+        default=None,
+        help="file holding all the program's input, instead of stdin",
+    )
+    parser.add_argument(
+        "--vfs-load",
+        default=None,
+        help="JSON file of name -> text to run with an in-memory file system",
+    )
+    parser.add_argument(
+        "--vfs-save",
+        default=None,
+        help="where to write the in-memory file system's files after the run",
+    )
+    parser.add_argument(
+        "--vfs-size",
+        type=positive(int),
+        default=VIRTUAL_CAPACITY,
+        help="characters the in-memory file system can hold",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print time spent per line and subroutine to stderr",
+    )
+    parser.add_argument(
+        "--profile-json",
+        default=None,
+        help="write the profile as JSON to this file",
+    )
+    parser.add_argument(
+        "--sample",
+        default=None,
+        help="sample the call stack and write collapsed stacks to this file",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=positive(float),
+        default=0.005,
+        help="seconds between call stack samples",
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="step through the program, debugger commands are read from stdin",
+    )
+    parser.add_argument(
+        "--coverage",
+        default=None,
+        help="write line and branch coverage as JSON to this file, merged with "
+        "the coverage already in it from earlier runs of the same program",
+    )
+    parser.add_argument(
+        "--coverage-report",
+        action="store_true",
+        help="print the source annotated with coverage to stderr",
+    )
+    parser.add_argument(
+        "--record",
+        default=None,
+        help="write a binary trace of the run to this file, for --replay",
+    )
+    parser.add_argument(
+        "--record-size",
+        type=positive(int),
+        default=RING_SIZE,
+        help="bytes of the most recent trace records to keep",
+    )
+    parser.add_argument(
+        "--replay",
+        default=None,
+        help="rerun the program with the input and RANDOM values of this trace, "
+        "with --record the rerun's trace is written too",
+    )
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="print timings and resource use of the run as JSON to stderr",
+    )
+    parser.add_argument(
+        "--summary-json",
+        default=None,
+        help="write the run summary as JSON to this file",
+    )
+    return parser.parse_args()
 
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -40,15 +214,141 @@ if __name__ == "__main__":
     from cambridgeScript.parser.parser import Parser
     from cambridgeScript.interpreter.variables import VariableState
     from cambridgeScript.interpreter.interpreter import Interpreter
+    from cambridgeScript.interpreter.arrays import ARRAY_BACKENDS
+    from cambridgeScript.interpreter.files import VIRTUAL_CAPACITY, VirtualFileSystem
+    from cambridgeScript.interpreter.coverage import Coverage, annotate, merge
+    from cambridgeScript.interpreter.debugger import Debugger
+    from cambridgeScript.interpreter.profiler import Profiler
+    from cambridgeScript.interpreter.recorder import (
+        RING_SIZE,
+        Trace,
+        TraceRecorder,
+        divergence,
+        replay,
+    )
+    from cambridgeScript.interpreter.sampler import SamplingProfiler
+    from cambridgeScript.interpreter.streams import (
+        BatchedInputStream,
+        BufferedOutputStream,
+    )
+
+    args = parse_args()
 
     # Read source code
-    with open(sys.argv[1], "r") as file:
+    with open(args.file, "r") as file:
         code = file.read()
 
-    # Parse code
-    tokens = parse_tokens(code)
-    parsed = Parser.parse_program(tokens, code)
+    if args.input is not None:
+        with open(args.input, "r") as file:
+            input_stream = BatchedInputStream(file.read())
+    else:
+        input_stream = BatchedInputStream()
+
+    # File statements use disk unless an in-memory file system is asked for
+    filesystem = None
+    if args.vfs_load is not None:
+        filesystem = VirtualFileSystem.load(args.vfs_load, args.vfs_size)
+    elif args.vfs_save is not None:
+        filesystem = VirtualFileSystem(capacity=args.vfs_size)
+
+    interpreter = Interpreter(
+        VariableState(),
+        code,
+        input_stream,
+        adaptive=args.adaptive,
+        memo_size=args.memo_size,
+        array_backend=args.array_backend,
+        fuel=args.fuel,
+        timeout=args.timeout,
+        memory_limit=args.memory_limit,
+        output_stream=BufferedOutputStream(
+            buffer_size=args.output_buffer, flush_interval=args.flush_interval
+        ),
+        filesystem=filesystem,
+    )
 
-    # Create interpreter with simple input stream
-    interpreter = Interpreter(VariableState(), code, SimpleInputStream())
-    interpreter.visit(parsed)
+    # Parse code, a syntax error still gets a summary
+    timings = {}
+    started = time.perf_counter()
+    try:
+        tokens = parse_tokens(code)
+        timings["lex"] = time.perf_counter() - started
+        started = time.perf_counter()
+        parsed = Parser.parse_program(tokens, code)
+        timings["parse"] = time.perf_counter() - started
+    except BaseException as e:
+        write_summary(args, timings, interpreter, e)
+        raise
+
+    if args.debug and (args.record is not None or args.replay is not None):
+        sys.exit(
+            "--debug can't be combined with --record or --replay, "
+            "the debugger reads its commands from the program's input"
+        )
+    # Tracers can be combined, the profiler goes last so it times the others
+    # as little as possible
+    profiler = None
+    coverage = None
+    recorder = None
+    if args.replay is not None:
+        try:
+            trace = Trace.load(args.replay)
+            recorder = replay(interpreter, parsed, code, trace)
+        except ValueError as e:
+            sys.exit(f"Can't replay {args.replay}: {e}")
+    elif args.record is not None:
+        recorder = TraceRecorder(parsed, code, args.record_size)
+        recorder.install(interpreter)
+    if args.coverage is not None or args.coverage_report:
+        coverage = Coverage(parsed, code)
+        interpreter.add_tracer(coverage)
+    if args.debug:
+        interpreter.add_tracer(Debugger(interpreter))
+    if args.profile or args.profile_json is not None:
+        profiler = Profiler()
+        interpreter.add_tracer(profiler)
+    sampler = None
+    if args.sample is not None:
+        sampler = SamplingProfiler(args.sample_interval)
+        sampler.start()
+    error = None
+    started = time.perf_counter()
+    try:
+        interpreter.visit(parsed)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        timings["execute"] = time.perf_counter() - started
+        if sampler is not None:
+            sampler.stop()
+            with open(args.sample, "w") as file:
+                file.write(sampler.collapsed())
+        if args.profile:
+            print(
+                profiler.report(interpreter.origin, interpreter=interpreter),
+                file=sys.stderr,
+            )
+        if args.profile_json is not None:
+            with open(args.profile_json, "w") as file:
+                json.dump(profiler.to_json(interpreter), file)
+        if coverage is not None:
+            report = coverage.to_json()
+            if args.coverage is not None:
+                if os.path.exists(args.coverage):
+                    with open(args.coverage, "r") as file:
+                        report = merge(json.load(file), report)
+                with open(args.coverage, "w") as file:
+                    json.dump(report, file)
+            if args.coverage_report:
+                print(annotate(report, interpreter.origin), file=sys.stderr)
+        if args.replay is not None:
+            problem = divergence(trace, recorder.trace())
+            print(problem or "The replay matches the trace", file=sys.stderr)
+        if args.record is not None:
+            recorder.trace().save(args.record)
+        if args.vfs_save is not None:
+            filesystem.save(args.vfs_save)
+        if args.memory_report:
+            print(f"Peak memory: {interpreter.memory.peak} bytes", file=sys.stderr)
+        write_summary(args, timings, interpreter, error)
@@ -43,6 +43,8 @@ class Keyword(StrEnum):
     WRITEFILE = "WRITEFILE"
     CLOSEFILE = "CLOSEFILE"
     CALL = "CALL"
+    BYREF = "BYREF"
+    BYVAL = "BYVAL"
     ARRAY = "ARRAY"
     INTEGER = "INTEGER"
     REAL = "REAL"
@@ -51,6 +53,7 @@ class Keyword(StrEnum):
     BOOLEAN = "BOOLEAN"
     READ = "READ"
     WRITE = "WRITE"
+    APPEND = "APPEND"
     AND = "AND"
     OR = "OR"
     NOT = "NOT"
@@ -84,7 +87,7 @@ def _unary_sub(n):
     return -n
 
 
-def str_concat(a, b):
+def _concat(a, b):
     return str(a) + str(b)
 
 
@@ -103,6 +106,6 @@ class Operator:
     UNARY_SUB = _unary_sub
     MUL = operator.mul
     DIV = operator.truediv
-    CONCAT = str_concat
+    CONCAT = _concat
     # DDIV = operator.floordiv
     # MOD = operator.mod
@@ -19,7 +19,7 @@ class PseudoError(Exception):
         return self.prompt
 
     def parse_traceback(self) -> str:
-        if not hasattr(self, "origin") or not hasattr(self, "line"):
+        if not hasattr(self, "origin") or getattr(self, "line", None) is None:
             return ""
         if self.line >= 2 and self.line <= len(self.origin) - 1:
             return (
@@ -165,7 +165,19 @@ class PseudoSubroutineError(InterpreterError, RuntimeError):
         return self.prompt
 
 
-class ReturnException(Exception):
-    def __init__(self, value):
-        self.value = value
-        super().__init__(value)
+class PseudoLimitError(InterpreterError, RuntimeError):
+
+    def message(self) -> str:
+        return f"Limit Exceeded: {self.prompt}"
+
+
+class PseudoFileError(InterpreterError, OSError):
+
+    def message(self) -> str:
+        return f"File Error: {self.prompt}"
+
+
+class PseudoMemoryError(InterpreterError, MemoryError):
+
+    def message(self) -> str:
+        return f"Memory Limit Exceeded: {self.prompt}"
@@ -0,0 +1,316 @@
+import heapq
+import sys
+from array import array
+from copy import copy
+from typing import Any, Iterator
+
+from cambridgeScript.parser.lexer import Value
+from cambridgeScript.syntax_tree.types import PrimitiveType
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ARRAY_BACKENDS = ("list", "array") + (("numpy",) if numpy is not None else ())
+# Arrays with more elements than this only store the elements written to
+SPARSE_THRESHOLD = 1 << 20
+# Approximate cost of one written cell of a sparse array
+SPARSE_CELL_BYTES = 100
+# Written cells of a sparse array shown when it is converted to a string
+SPARSE_STR_CELLS = 100
+
+# array module type codes for element types with an unboxed representation
+_TYPECODES = {
+    PrimitiveType.INTEGER: "q",
+    PrimitiveType.REAL: "d",
+    PrimitiveType.BOOLEAN: "b",
+}
+_DTYPES = {"q": "int64", "d": "float64", "b": "bool"}
+# The type each typed array stores natively, and the one other type that can be
+# assigned into it (e.g. an INTEGER value into a REAL array)
+_ELEMENT_TYPES = {
+    PrimitiveType.INTEGER: (int, float),
+    PrimitiveType.REAL: (float, int),
+    PrimitiveType.BOOLEAN: (bool, int),
+}
+
+
+class PseudoArray:
+    """
+    An n-dimensional array stored as one flat list.
+
+    Elements are addressed with the indices the array was declared with,
+    e.g. A[1:3, 0:4], and every index is checked against its bounds.
+    """
+
+    __slots__ = ("ranges", "lower", "extents", "strides", "data", "shares")
+
+    def __init__(self, ranges: list[tuple[int, int]], default: Any = None):
+        self.data = [default] * self.layout(ranges)
+
+    def layout(self, ranges: list[tuple[int, int]]) -> int:
+        """Set up bounds and strides for ranges, returns the number of elements."""
+        self.ranges = [(low, high) for low, high in ranges]
+        self.lower = [low for low, _ in ranges]
+        self.extents = [max(high - low + 1, 0) for low, high in ranges]
+        # Row-major layout, the last index is contiguous
+        self.strides = []
+        size = 1
+        for extent in reversed(self.extents):
+            self.strides.insert(0, size)
+            size *= extent
+        # Number of extra holders sharing this array copy-on-write
+        self.shares = 0
+        return size
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def offset(self, indices: list[int]) -> int:
+        """Flat position of the element at indices, IndexError if out of range."""
+        if len(indices) == 1 and len(self.strides) == 1:
+            # One dimension: the position is just the distance from the lower bound
+            offset = indices[0] - self.lower[0]
+            if type(offset) is int and 0 <= offset < self.extents[0]:
+                return offset
+            raise IndexError(indices[0])
+        if len(indices) != len(self.strides):
+            raise IndexError("wrong number of indices")
+        offset = 0
+        for index, low, extent, stride in zip(
+            indices, self.lower, self.extents, self.strides
+        ):
+            position = index - low
+            if type(position) is not int or not 0 <= position < extent:
+                raise IndexError(index)
+            offset += position * stride
+        return offset
+
+    def get(self, indices: list[int]) -> Value | None:
+        return self.data[self.offset(indices)]
+
+    def set(
+        self, indices: list[int], value: Value, line: int | None = None, frame: int = 0
+    ) -> None:
+        """
+        Store value at indices. An array that grows as it is written charges
+        its meter for it, at line and to the call frame that owns the array.
+        """
+        self.data[self.offset(indices)] = value
+
+    def copy(self) -> "PseudoArray":
+        cls = type(self)
+        array = cls.__new__(cls)
+        array.ranges = self.ranges
+        array.lower = self.lower
+        array.extents = self.extents
+        array.strides = self.strides
+        array.data = copy(self.data)
+        array.shares = 0
+        return array
+
+    def values(self) -> list[Value | None]:
+        """Every element in storage order, None where unassigned."""
+        return self.data
+
+    def nbytes(self) -> int:
+        """Approximate size of the element storage in bytes."""
+        return sys.getsizeof(self.data)
+
+    def to_list(self) -> list:
+        """Nested lists, one level per dimension."""
+        values = self.values()
+
+        def build(dimension: int, start: int) -> list:
+            low, high = self.ranges[dimension]
+            stride = self.strides[dimension]
+            if dimension == len(self.ranges) - 1:
+                return values[start : start + high - low + 1]
+            return [
+                build(dimension + 1, start + i * stride) for i in range(high - low + 1)
+            ]
+
+        return build(0, 0)
+
+    def __str__(self) -> str:
+        return str(self.to_list())
+
+
+class _Boxed(dict):
+    """Element types of a typed array that fell back to a list: anything goes."""
+
+    def get(self, key, default=None):
+        return 1
+
+
+def _unboxed(value):
+    return value
+
+
+class TypedPseudoArray(PseudoArray):
+    """
+    A PseudoArray of INTEGER, REAL or BOOLEAN elements stored unboxed.
+
+    A flag byte per element is 0 while it is unassigned, 1 when it holds the
+    array's own type and 2 when it holds the alternate type, so reads give back
+    exactly what was written. A value the storage can't hold exactly moves the
+    array over to a list.
+    """
+
+    __slots__ = ("flags", "types", "readers")
+
+    def __init__(
+        self,
+        ranges: list[tuple[int, int]],
+        element: PrimitiveType,
+        backend: str = "array",
+    ):
+        size = self.layout(ranges)
+        typecode = _TYPECODES[element]
+        if backend == "numpy":
+            self.data = numpy.zeros(size, dtype=_DTYPES[typecode])
+        else:
+            self.data = array(typecode, bytes(size * array(typecode).itemsize))
+        self.flags = bytearray(size)
+        native, alternate = _ELEMENT_TYPES[element]
+        self.types = {native: 1, alternate: 2}
+        self.readers = (None, native, alternate)
+
+    def get(self, indices: list[int]) -> Value | None:
+        offset = self.offset(indices)
+        flag = self.flags[offset]
+        if flag:
+            return self.readers[flag](self.data[offset])
+        return None
+
+    def set(
+        self, indices: list[int], value: Value, line: int | None = None, frame: int = 0
+    ) -> None:
+        offset = self.offset(indices)
+        flag = self.types.get(type(value), 0)
+        if flag == 1:
+            try:
+                self.data[offset] = value
+            except OverflowError:
+                flag = 0
+        elif flag == 2:
+            try:
+                self.data[offset] = self.readers[1](value)
+            except OverflowError:
+                flag = 0
+            else:
+                if self.readers[2](self.data[offset]) != value:
+                    flag = 0
+        if not flag:
+            self.box()
+            self.data[offset] = value
+            flag = 1
+        self.flags[offset] = flag
+
+    def box(self) -> None:
+        """Move the elements over to a list that accepts any value."""
+        self.data = self.values()
+        self.flags = bytearray(flag and 1 for flag in self.flags)
+        self.types = _Boxed()
+        self.readers = (None, _unboxed, _unboxed)
+
+    def copy(self) -> "TypedPseudoArray":
+        array = super().copy()
+        array.flags = bytearray(self.flags)
+        array.types = self.types
+        array.readers = self.readers
+        return array
+
+    def values(self) -> list[Value | None]:
+        readers = self.readers
+        return [
+            readers[flag](value) if flag else None
+            for flag, value in zip(self.flags, self.data)
+        ]
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.data) + sys.getsizeof(self.flags)
+
+
+class SparsePseudoArray(PseudoArray):
+    """
+    A PseudoArray that only stores the elements that have been written.
+
+    Used for arrays too large to allocate up front, most programs only touch a
+    small part of them.
+    """
+
+    __slots__ = ("size", "meter")
+
+    def __init__(self, ranges: list[tuple[int, int]]):
+        self.size = self.layout(ranges)
+        self.data = {}
+        # MemoryMeter charged for every new cell
+        self.meter = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    def get(self, indices: list[int]) -> Value | None:
+        return self.data.get(self.offset(indices))
+
+    def set(
+        self, indices: list[int], value: Value, line: int | None = None, frame: int = 0
+    ) -> None:
+        offset = self.offset(indices)
+        if self.meter is not None and offset not in self.data:
+            self.meter.charge(SPARSE_CELL_BYTES, line, frame)
+        self.data[offset] = value
+
+    def copy(self) -> "SparsePseudoArray":
+        array = super().copy()
+        array.size = self.size
+        array.meter = self.meter
+        return array
+
+    def nbytes(self) -> int:
+        # Copying the array duplicates every written cell
+        return sys.getsizeof(self.data) + len(self.data) * SPARSE_CELL_BYTES
+
+    def values(self) -> Iterator[Value | None]:
+        """Every element in storage order, produced one at a time."""
+        return (self.data.get(offset) for offset in range(self.size))
+
+    def indices(self, offset: int) -> list[int]:
+        """The indices of the element at a flat position."""
+        indices = []
+        for low, stride in zip(self.lower, self.strides):
+            position, offset = divmod(offset, stride)
+            indices.append(low + position)
+        return indices
+
+    def to_list(self) -> list:
+        raise ValueError(f"A sparse array of {self.size} elements is too large to list")
+
+    def __str__(self) -> str:
+        """The first SPARSE_STR_CELLS written cells and how many are written."""
+        cells = ", ".join(
+            f"{self.indices(offset)}: {self.data[offset]}"
+            for offset in heapq.nsmallest(SPARSE_STR_CELLS, self.data)
+        )
+        if len(self.data) > SPARSE_STR_CELLS:
+            cells += ", ..."
+        return f"{{{cells}}} ({len(self.data)} of {self.size} elements set)"
+
+
+def new_array(
+    ranges: list[tuple[int, int]], element: PrimitiveType, backend: str = "array"
+) -> PseudoArray:
+    """
+    An array for element: sparse above SPARSE_THRESHOLD elements, otherwise
+    typed storage unless backend is "list".
+    """
+    size = 1
+    for low, high in ranges:
+        size *= max(high - low + 1, 0)
+    if size > SPARSE_THRESHOLD:
+        return SparsePseudoArray(ranges)
+    if backend != "list" and element in _TYPECODES:
+        return TypedPseudoArray(ranges, element, backend)
+    return PseudoArray(ranges)
@@ -1,5 +1,5 @@
-import random
 from cambridgeScript.exceptions import PseudoBuiltinError
+from cambridgeScript.interpreter.rope import Rope
 
 
 def create_builtins(interpreter):
@@ -14,7 +14,7 @@ def create_builtins(interpreter):
         length = interpreter.visit(params[2])
 
         if (
-            not isinstance(string_value, str)
+            not isinstance(string_value, (str, Rope))
             or not isinstance(start_index, int)
             or not isinstance(length, int)
         ):
@@ -26,12 +26,12 @@ def create_builtins(interpreter):
                 f"(length:{len(string_value)}, last character you trying to access:{start_index + length - 1})"
             )
 
-        return string_value[start_index - 1 : start_index + length - 1]
+        return str(string_value)[start_index - 1 : start_index + length - 1]
 
     def random_func(params):
         if len(params) != 0:
             raise PseudoBuiltinError("RANDOM function does not take any parameters.")
-        return random.random()
+        return interpreter.random.random()
 
     def mod(params):
         if len(params) != 2:
@@ -75,7 +75,7 @@ def create_builtins(interpreter):
 
         a = interpreter.visit(params[0])
 
-        if not isinstance(a, str):
+        if not isinstance(a, (str, Rope)):
             raise PseudoBuiltinError("LENGTH function requires a string parameter.")
 
         return len(a)
@@ -86,10 +86,10 @@ def create_builtins(interpreter):
 
         a = interpreter.visit(params[0])
 
-        if not isinstance(a, str):
+        if not isinstance(a, (str, Rope)):
             raise PseudoBuiltinError("LCASE function requires a string parameter.")
 
-        return a.lower()
+        return str(a).lower()
 
     def ucase(params):
         if len(params) != 1:
@@ -97,10 +97,21 @@ def create_builtins(interpreter):
 
         a = interpreter.visit(params[0])
 
-        if not isinstance(a, str):
+        if not isinstance(a, (str, Rope)):
             raise PseudoBuiltinError("UCASE function requires a string parameter.")
 
-        return a.upper()
+        return str(a).upper()
+
+    def eof(params):
+        if len(params) != 1:
+            raise PseudoBuiltinError("EOF function requires exactly one parameter.")
+
+        name = interpreter.visit(params[0])
+
+        if not isinstance(name, (str, Rope)):
+            raise PseudoBuiltinError("EOF function requires a file name.")
+
+        return interpreter.files.at_end(str(name))
 
     return {
         "SUBSTRING": substring,
@@ -111,4 +122,5 @@ def create_builtins(interpreter):
         "LENGTH": length,
         "LCASE": lcase,
         "UCASE": ucase,
+        "EOF": eof,
     }
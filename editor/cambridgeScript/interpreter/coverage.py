@@ -0,0 +1,230 @@
+"""
+Statement and branch coverage of pseudocode runs.
+
+Every statement that runs is marked in a bitmap indexed by its statement
+index. IF, CASE and loop statements also record which of their outcomes were
+seen: THEN or ELSE, each CASE label or OTHERWISE, and zero, one or more
+iterations of a loop. Reports are JSON and can be merged across runs of the
+same program, for example over all the test inputs of an assignment.
+
+The outcomes of a branch are listed in source order and told apart by their
+position, so CASE labels that read the same stay separate.
+"""
+
+import hashlib
+
+from cambridgeScript.interpreter.tracing import Tracer, blocks, number_statements
+from cambridgeScript.syntax_tree import (
+    CaseRange,
+    CaseStmt,
+    ForStmt,
+    IfStmt,
+    Literal,
+    Program,
+    RepeatUntilStmt,
+    Statement,
+    WhileStmt,
+)
+
+# How the outcome of a branching statement is found when it finishes
+_CHOICE = 1
+_LOOP = 2
+_REPEAT = 3
+
+_LOOP_OUTCOMES = ["0 iterations", "1 iteration", "2+ iterations"]
+
+
+def _label_name(label, position: int) -> str:
+    if isinstance(label, CaseRange):
+        if hasattr(label.low, "token") and hasattr(label.high, "token"):
+            low = _label_name(label.low, position)
+            return f"{low} TO {_label_name(label.high, position)}"
+        return f"label {position}"
+    if not hasattr(label, "token"):
+        return f"label {position}"
+    value = label.token.value
+    if isinstance(label, Literal) and isinstance(value, str):
+        # Quoted, so "1" and 1, or "OTHERWISE" and OTHERWISE, read differently
+        return f'"{value}"'
+    return str(value)
+
+
+def _outcomes(stmt: Statement) -> tuple[str, int, list[str]] | None:
+    """The name, kind and outcome names of a branching statement."""
+    if isinstance(stmt, IfStmt):
+        return "IF", _CHOICE, ["THEN", "ELSE"]
+    if isinstance(stmt, CaseStmt):
+        labels = [_label_name(label, i + 1) for i, (label, _) in enumerate(stmt.cases)]
+        return "CASE", _CHOICE, labels + ["OTHERWISE"]
+    if isinstance(stmt, ForStmt):
+        return "FOR", _LOOP, _LOOP_OUTCOMES
+    if isinstance(stmt, WhileStmt):
+        return "WHILE", _LOOP, _LOOP_OUTCOMES
+    if isinstance(stmt, RepeatUntilStmt):
+        # The body of a REPEAT always runs at least once
+        return "REPEAT", _REPEAT, _LOOP_OUTCOMES[1:]
+    return None
+
+
+def source_hash(source: str) -> str:
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+
+class Coverage(Tracer):
+    """Collects statement and branch coverage of program while installed."""
+
+    def __init__(self, program: Program, source: str):
+        self.statements = number_statements(program)
+        self.source = source_hash(source)
+        count = len(self.statements)
+        self.executed = bytearray(count)
+        self.kinds = bytearray(count)
+        # Position of the first outcome of each branching statement in outcomes
+        self.base = [0] * count
+        # Outcome of an IF or CASE that runs none of its blocks
+        self.fallthrough = [0] * count
+        # Position of the block each statement starts in its parent, or -1
+        self.arms = [-1] * count
+        # (statement index, statement name, outcome name) of every outcome
+        self.branches: list[tuple[int, str, str]] = []
+        for stmt in self.statements:
+            outcomes = _outcomes(stmt)
+            if outcomes is None:
+                continue
+            name, kind, labels = outcomes
+            self.kinds[stmt.index] = kind
+            self.base[stmt.index] = len(self.branches)
+            if kind == _CHOICE:
+                self.fallthrough[stmt.index] = len(labels) - 1
+            self.branches.extend((stmt.index, name, label) for label in labels)
+            for position, block in enumerate(blocks(stmt)):
+                if block:
+                    self.arms[block[0].index] = position
+        self.outcomes = bytearray(len(self.branches))
+        # [blocks entered, outcome] of each branching statement being run
+        self.stack: list[list[int]] = []
+
+    def enter_statement(self, stmt: Statement) -> None:
+        index = stmt.index
+        self.executed[index] = 1
+        arm = self.arms[index]
+        if arm >= 0:
+            entry = self.stack[-1]
+            entry[0] += 1
+            entry[1] = arm
+        if self.kinds[index]:
+            self.stack.append([0, self.fallthrough[index]])
+
+    def exit_statement(self, stmt: Statement) -> None:
+        kind = self.kinds[stmt.index]
+        if kind:
+            entered, outcome = self.stack.pop()
+            if kind == _LOOP:
+                outcome = min(entered, 2)
+            elif kind == _REPEAT:
+                outcome = min(entered, 2) - 1
+            self.outcomes[self.base[stmt.index] + outcome] = 1
+
+    def error(self, stmt: Statement, error: Exception) -> None:
+        if self.kinds[stmt.index]:
+            self.stack.pop()
+
+    def to_json(self) -> dict:
+        lines: dict[str, int] = {}
+        for stmt in self.statements:
+            key = str(stmt.line)
+            lines[key] = lines.get(key, 0) | self.executed[stmt.index]
+        branches: list[dict] = []
+        for position, (index, name, label) in enumerate(self.branches):
+            if not branches or branches[-1]["statement"] != index:
+                branches.append(
+                    {
+                        "statement": index,
+                        "line": self.statements[index].line,
+                        "kind": name,
+                        "outcomes": [],
+                    }
+                )
+            branches[-1]["outcomes"].append(
+                {"label": label, "hit": self.outcomes[position]}
+            )
+        return summarize(
+            {"source": self.source, "runs": 1, "lines": lines, "branches": branches}
+        )
+
+
+def summarize(report: dict) -> dict:
+    """Set the hit and total counts of a report's lines and branch outcomes."""
+    outcomes = [
+        outcome["hit"]
+        for branch in report["branches"]
+        for outcome in branch["outcomes"]
+    ]
+    report["summary"] = {
+        "lines": [sum(report["lines"].values()), len(report["lines"])],
+        "branches": [sum(outcomes), len(outcomes)],
+    }
+    return report
+
+
+def merge(first: dict, second: dict) -> dict:
+    """Coverage of the runs of two reports of the same program."""
+    if first["source"] != second["source"]:
+        raise ValueError("Coverage reports are for different programs")
+    lines = {
+        line: hit | second["lines"].get(line, 0) for line, hit in first["lines"].items()
+    }
+    branches = [
+        {
+            **branch,
+            "outcomes": [
+                {**outcome, "hit": outcome["hit"] | other["hit"]}
+                for outcome, other in zip(branch["outcomes"], second_branch["outcomes"])
+            ],
+        }
+        for branch, second_branch in zip(first["branches"], second["branches"])
+    ]
+    return summarize(
+        {
+            "source": first["source"],
+            "runs": first["runs"] + second["runs"],
+            "lines": lines,
+            "branches": branches,
+        }
+    )
+
+
+def annotate(report: dict, origin: list[str]) -> str:
+    """
+    The source with every executable line marked: > ran, ! never ran, ~ ran
+    without seeing every outcome of a branch, which are listed after it.
+    """
+    missed: dict[int, list[str]] = {}
+    for branch in report["branches"]:
+        labels = [
+            outcome["label"] for outcome in branch["outcomes"] if not outcome["hit"]
+        ]
+        if labels:
+            missed.setdefault(branch["line"], []).extend(labels)
+    rows = []
+    for number, text in enumerate(origin, 1):
+        hit = report["lines"].get(str(number))
+        if hit is None:
+            mark = " "
+        elif not hit:
+            mark = "!"
+        elif number in missed:
+            mark = "~"
+        else:
+            mark = ">"
+        row = f"{mark} {number:4}  {text}"
+        if hit and number in missed:
+            row += f"    # missed: {', '.join(missed[number])}"
+        rows.append(row)
+    (lines_hit, lines), (outcomes_hit, outcomes) = report["summary"].values()
+    rows.append("")
+    rows.append(
+        f"{report['runs']} run(s): lines {lines_hit}/{lines}, "
+        f"branch outcomes {outcomes_hit}/{outcomes}"
+    )
+    return "\n".join(rows)
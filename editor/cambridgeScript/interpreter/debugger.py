@@ -0,0 +1,124 @@
+import sys
+from typing import TextIO
+
+from cambridgeScript.exceptions import PseudoError
+from cambridgeScript.interpreter.tracing import Tracer
+from cambridgeScript.parser.lexer import parse_tokens
+from cambridgeScript.parser.parser import Parser
+from cambridgeScript.syntax_tree import Expression, Statement
+
+HELP = """\
+c            continue to the next breakpoint
+s            step into: stop at the next statement
+n            step over: stop at the next statement in this subroutine
+o            step out: stop after returning from this subroutine
+b LINE       set a breakpoint
+d LINE       delete a breakpoint
+w EXPR       watch an expression, shown at every stop
+p EXPR       print an expression
+q            stop debugging and run to the end"""
+
+
+class Debugger(Tracer):
+    """
+    Line breakpoints, stepping and watch expressions.
+
+    Commands are read from the interpreter's input stream, so they interleave
+    with the program's own INPUT, and everything is written to out.
+    """
+
+    def __init__(self, interpreter, out: TextIO = sys.stderr):
+        self.interpreter = interpreter
+        self.out = out
+        self.breakpoints: set[int] = set()
+        self.watches: list[tuple[str, Expression]] = []
+        # Stop at the next statement run at a call depth of at most stop_depth,
+        # None to run until a breakpoint
+        self.stop_depth: int | None = 0
+        self.depth = 0
+        self.reported: Exception | None = None
+
+    def enter_statement(self, stmt: Statement) -> None:
+        if stmt.line in self.breakpoints or (
+            self.stop_depth is not None and self.depth <= self.stop_depth
+        ):
+            self.stop(stmt)
+
+    def enter_call(self, name: str, line: int) -> None:
+        self.depth += 1
+
+    def exit_call(self, name: str) -> None:
+        self.depth -= 1
+
+    def error(self, stmt: Statement, error: Exception) -> None:
+        # Only report where the error was raised, not every statement it leaves
+        if error is not self.reported:
+            self.reported = error
+            self.write(f"Error at line {stmt.line}: {error}")
+
+    def stop(self, stmt: Statement) -> None:
+        self.interpreter.output_stream.flush()
+        self.write(f"line {stmt.line}: {self.interpreter.origin[stmt.line - 1]}")
+        for source, expr in self.watches:
+            self.write(f"  {source} = {self.evaluate(expr)}")
+        while True:
+            self.out.write("(debug) ")
+            self.out.flush()
+            line = self.interpreter.input_stream.readline()
+            if not line:
+                # No more commands, let the program finish
+                self.stop_depth = None
+                self.breakpoints.clear()
+                return
+            command, _, argument = line.strip().partition(" ")
+            if self.command(command, argument.strip()):
+                return
+
+    def command(self, command: str, argument: str) -> bool:
+        """Run a debugger command, True when the program should resume."""
+        if command == "c":
+            self.stop_depth = None
+        elif command == "s":
+            self.stop_depth = sys.maxsize
+        elif command == "n":
+            self.stop_depth = self.depth
+        elif command == "o":
+            self.stop_depth = self.depth - 1
+        elif command == "q":
+            self.stop_depth = None
+            self.breakpoints.clear()
+        elif command in ("b", "d") and argument.isdigit():
+            if command == "b":
+                self.breakpoints.add(int(argument))
+            else:
+                self.breakpoints.discard(int(argument))
+            return False
+        elif command in ("w", "p") and argument:
+            expr = self.parse(argument)
+            if expr is not None:
+                if command == "w":
+                    self.watches.append((argument, expr))
+                self.write(f"  {argument} = {self.evaluate(expr)}")
+            return False
+        else:
+            self.write(HELP)
+            return False
+        return True
+
+    def parse(self, source: str) -> Expression | None:
+        try:
+            return Parser.parse_expression(parse_tokens(source))
+        except Exception as e:
+            # Parser errors point into the program's source, only keep the message
+            self.write(f"  {str(e).splitlines()[0]}")
+            return None
+
+    def evaluate(self, expr: Expression) -> str:
+        try:
+            return str(self.interpreter.visit(expr))
+        except PseudoError as e:
+            return f"<{e.message()}>"
+
+    def write(self, text: str) -> None:
+        self.out.write(text + "\n")
+        self.out.flush()
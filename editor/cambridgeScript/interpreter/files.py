@@ -0,0 +1,256 @@
+import errno
+import json
+import mmap
+import posixpath
+
+from cambridgeScript.exceptions import PseudoFileError
+
+# Bytes buffered by WRITE and APPEND files before they go to disk
+WRITE_BUFFER_SIZE = 1 << 16
+# Default size of a virtual file system in characters
+VIRTUAL_CAPACITY = 16 * 1024 * 1024
+
+
+class MappedLineReader:
+    """Reads a file line by line straight out of a memory map."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self.size = file.seek(0, 2)
+            # An empty file can't be mapped, it simply has no lines
+            self.data = (
+                mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                if self.size
+                else None
+            )
+
+    def at_end(self) -> bool:
+        return self.data is None or self.data.tell() >= self.size
+
+    def readline(self) -> str:
+        return self.data.readline().decode("utf-8").rstrip("\r\n")
+
+    def close(self) -> None:
+        if self.data is not None:
+            self.data.close()
+
+
+class LineWriter:
+    """Writes lines through a large buffer, flushed when the file is closed."""
+
+    def __init__(self, path: str, append: bool):
+        self.file = open(
+            path, "a" if append else "w", buffering=WRITE_BUFFER_SIZE, encoding="utf-8"
+        )
+
+    def writeline(self, text: str) -> None:
+        self.file.write(text + "\n")
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class FileTable:
+    """The files a program has open, by the name it opened them with."""
+
+    def __init__(self, origin: list[str]):
+        self.origin = origin
+        self.files: dict[str, MappedLineReader | LineWriter] = {}
+        self.modes: dict[str, str] = {}
+
+    def open(self, name: str, mode: str, line: int) -> None:
+        if name in self.files:
+            raise PseudoFileError(f"File {name} is already open", self.origin, line)
+        try:
+            if mode == "READ":
+                self.files[name] = self.reader(name)
+            else:
+                self.files[name] = self.writer(name, mode == "APPEND")
+        except OSError as e:
+            raise PseudoFileError(
+                f"Can't open {name} for {mode}: {e.strerror}", self.origin, line
+            )
+        self.modes[name] = mode
+
+    def reader(self, name: str) -> MappedLineReader:
+        return MappedLineReader(name)
+
+    def writer(self, name: str, append: bool) -> LineWriter:
+        return LineWriter(name, append)
+
+    def get(self, name: str, reading: bool, line: int):
+        """The open file name, which must be a reader or a writer."""
+        if name not in self.files:
+            raise PseudoFileError(f"File {name} is not open", self.origin, line)
+        if (self.modes[name] == "READ") != reading:
+            mode = "READ" if reading else "WRITE or APPEND"
+            raise PseudoFileError(
+                f"File {name} is not open for {mode}", self.origin, line
+            )
+        return self.files[name]
+
+    def read_line(self, name: str, line: int) -> str:
+        reader = self.get(name, True, line)
+        if reader.at_end():
+            raise PseudoFileError(f"No lines left in {name}", self.origin, line)
+        try:
+            return reader.readline()
+        except UnicodeDecodeError:
+            raise PseudoFileError(
+                f"{name} is not UTF-8 text, can't read its next line",
+                self.origin,
+                line,
+            )
+
+    def write_line(self, name: str, text: str, line: int) -> None:
+        try:
+            self.get(name, False, line).writeline(text)
+        except OSError as e:
+            raise PseudoFileError(
+                f"Can't write to {name}: {e.strerror}", self.origin, line
+            )
+
+    def at_end(self, name: str, line: int | None = None) -> bool:
+        return self.get(name, True, line).at_end()
+
+    def close(self, name: str, line: int) -> None:
+        file = self.files.pop(name, None)
+        if file is None:
+            raise PseudoFileError(f"File {name} is not open", self.origin, line)
+        del self.modes[name]
+        try:
+            file.close()
+        except OSError as e:
+            raise PseudoFileError(
+                f"Can't write to {name}: {e.strerror}", self.origin, line
+            )
+
+    def close_all(self) -> None:
+        """Close every file left open, flushing anything written."""
+        for file in self.files.values():
+            file.close()
+        self.files.clear()
+        self.modes.clear()
+
+
+class VirtualFileSystem:
+    """
+    Files kept in memory instead of on disk, holding at most capacity
+    characters between them.
+    """
+
+    def __init__(
+        self, files: dict[str, str] | None = None, capacity: int = VIRTUAL_CAPACITY
+    ):
+        self.files: dict[str, str] = {}
+        self.capacity = capacity
+        self.used = 0
+        for name, text in (files or {}).items():
+            self.write(name, text)
+
+    @classmethod
+    def load(cls, path: str, capacity: int = VIRTUAL_CAPACITY) -> "VirtualFileSystem":
+        """A file system holding the files of a JSON object of name -> text."""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                files = json.load(file)
+        except UnicodeDecodeError:
+            raise PseudoFileError(f"{path} is not UTF-8 text", None, None)
+        except ValueError as e:
+            raise PseudoFileError(f"{path} is not valid JSON: {e}", None, None)
+        if not isinstance(files, dict) or not all(
+            isinstance(text, str) for text in files.values()
+        ):
+            raise PseudoFileError(
+                f"{path} must hold a JSON object of file name -> text", None, None
+            )
+        try:
+            return cls(files, capacity)
+        except OSError as e:
+            raise PseudoFileError(f"Can't load {path}: {e.strerror}", None, None)
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.files, file)
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return posixpath.normpath("/" + name).lstrip("/")
+
+    def exists(self, name: str) -> bool:
+        return self.normalize(name) in self.files
+
+    def read(self, name: str) -> str:
+        name = self.normalize(name)
+        if name not in self.files:
+            raise FileNotFoundError(errno.ENOENT, "No such file or directory", name)
+        return self.files[name]
+
+    def reserve(self, size: int) -> None:
+        """Fail unless size more characters fit."""
+        if self.used + size > self.capacity:
+            raise OSError(errno.ENOSPC, "No space left on the virtual file system")
+
+    def write(self, name: str, text: str) -> None:
+        name = self.normalize(name)
+        old = len(self.files.get(name, ""))
+        self.reserve(len(text) - old)
+        self.used += len(text) - old
+        self.files[name] = text
+
+
+class VirtualLineReader:
+    def __init__(self, text: str):
+        # Split only on newlines, as MappedLineReader does
+        self.lines = [line.rstrip("\r") for line in text.split("\n")]
+        if self.lines[-1] == "":
+            self.lines.pop()
+        self.position = 0
+
+    def at_end(self) -> bool:
+        return self.position >= len(self.lines)
+
+    def readline(self) -> str:
+        line = self.lines[self.position]
+        self.position += 1
+        return line
+
+    def close(self) -> None:
+        pass
+
+
+class VirtualLineWriter:
+    """Collects written lines, stored in the file system on close."""
+
+    def __init__(self, filesystem: VirtualFileSystem, name: str, append: bool):
+        self.filesystem = filesystem
+        self.name = name
+        if append and filesystem.exists(name):
+            self.parts = [filesystem.read(name)]
+        else:
+            self.parts = []
+            filesystem.write(name, "")
+        # Characters written since the file was opened
+        self.size = 0
+
+    def writeline(self, text: str) -> None:
+        self.filesystem.reserve(self.size + len(text) + 1)
+        self.parts.append(text + "\n")
+        self.size += len(text) + 1
+
+    def close(self) -> None:
+        self.filesystem.write(self.name, "".join(self.parts))
+
+
+class VirtualFileTable(FileTable):
+    """A FileTable whose files live in a VirtualFileSystem."""
+
+    def __init__(self, origin: list[str], filesystem: VirtualFileSystem):
+        super().__init__(origin)
+        self.filesystem = filesystem
+
+    def reader(self, name: str) -> VirtualLineReader:
+        return VirtualLineReader(self.filesystem.read(name))
+
+    def writer(self, name: str, append: bool) -> VirtualLineWriter:
+        return VirtualLineWriter(self.filesystem, name, append)
@@ -1,7 +1,20 @@
-from cambridgeScript.interpreter.variables import VariableState
+from cambridgeScript.interpreter.arrays import (
+    ARRAY_BACKENDS,
+    SparsePseudoArray,
+    new_array,
+)
+from cambridgeScript.interpreter.files import (
+    FileTable,
+    VirtualFileSystem,
+    VirtualFileTable,
+)
+from cambridgeScript.interpreter.memory import MemoryMeter
+from cambridgeScript.interpreter.streams import BufferedOutputStream
+from cambridgeScript.interpreter.tracing import Hooks, Tracer, Tracers
+from cambridgeScript.interpreter.variables import Variable, VariableState
 from cambridgeScript.parser.lexer import LiteralToken, Value
-from cambridgeScript.syntax_tree.expression import Expression
-from cambridgeScript.syntax_tree.types import PrimitiveType, ArrayType
+from cambridgeScript.syntax_tree.expression import Assignable, Expression
+from cambridgeScript.syntax_tree.types import PrimitiveType, ArrayType, Type
 from cambridgeScript.exceptions import (
     InterpreterError,
     InvalidNode,
@@ -11,7 +24,7 @@ from cambridgeScript.exceptions import (
     PseudoUndefinedError,
     PseudoOpError,
     PseudoInputError,
-    ReturnException,
+    PseudoLimitError,
 )
 
 from cambridgeScript.syntax_tree import (
@@ -22,6 +35,7 @@ from cambridgeScript.syntax_tree import (
     FunctionCall,
     UnaryOp,
     BinaryOp,
+    LogicalOp,
     Statement,
     AssignmentStmt,
     ProcedureCallStmt,
@@ -38,6 +52,7 @@ from cambridgeScript.syntax_tree import (
     RepeatUntilStmt,
     ForStmt,
     CaseStmt,
+    CaseRange,
     IfStmt,
     FunctionDecl,
     ProcedureDecl,
@@ -45,95 +60,513 @@ from cambridgeScript.syntax_tree import (
 )
 from cambridgeScript.syntax_tree.visitors import ExpressionVisitor, StatementVisitor
 from cambridgeScript.interpreter.builtin_function import create_builtins
+from cambridgeScript.interpreter.specialize import (
+    DEOPT_LIMIT,
+    specialize,
+    operator_name,
+)
+from cambridgeScript.interpreter.rope import Rope, concat
+from cambridgeScript.interpreter.memoize import MemoTable, find_pure_functions
+from cambridgeScript.constants import Operator
+import itertools
+import math
+from typing import Callable
 import random
+import sys
+import time
+
+# Marks that no RETURN has been executed in the current function body
+_NO_RETURN = object()
+# Jump table of a CASE statement whose labels aren't all constant
+_NO_JUMP_TABLE: dict = {}
+# Widest CASE range label expanded into a jump table
+MAX_JUMP_TABLE_RANGE = 1024
+# Shared by all interpreters so a call site cached by one is never valid in another
+_call_site_versions = itertools.count()
+# Statements run between checks of the time limit
+FUEL_CHECK_INTERVAL = 10000
+# Nested subroutine calls allowed before the run is stopped
+MAX_CALL_DEPTH = 1000
+# Python stack frames allowed per nested call, with room for deep expressions
+_FRAMES_PER_CALL = 50
+# Visitors replaced while a tracer is installed
+_TRACED_VISITORS = ("visit_statements", "visit_function_call", "visit_proc_call")
 
 
 class Interpreter(ExpressionVisitor, StatementVisitor):
     variable_state: VariableState
 
-    def __init__(self, variable_state: VariableState, origin: str, input_stream=None):
+    def __init__(
+        self,
+        variable_state: VariableState,
+        origin: str,
+        input_stream=None,
+        adaptive: bool = False,
+        memo_size: int = 0,
+        array_backend: str = "array",
+        fuel: int | None = None,
+        timeout: float | None = None,
+        memory_limit: int | None = None,
+        output_stream: BufferedOutputStream | None = None,
+        filesystem: VirtualFileSystem | None = None,
+        random_source: random.Random | None = None,
+    ):
         self.variable_state = variable_state
         self.origin = origin.splitlines()
         self.builtins = create_builtins(self)
         self.input_stream = input_stream or __import__("sys").stdin
+        self.output_stream = output_stream or BufferedOutputStream()
+        # Where RANDOM gets its numbers, replaced to record or replay a run
+        self.random = random_source or random.Random()
+        self.return_value = _NO_RETURN
+        self.subroutines_version = next(_call_site_versions)
+        # BinaryOp nodes that have been specialized at least once, by id
+        self.quickened: dict[int, BinaryOp] = {}
+        # Results of pure functions, memoization is off unless memo_size is set.
+        # A call answered from the memo doesn't run its body, so it uses no fuel
+        # and tracers don't see it
+        self.memo_size = memo_size
+        self.pure_functions: set[int] = set()
+        self.memo_tables: dict[int, MemoTable] = {}
+        if array_backend not in ARRAY_BACKENDS:
+            raise ValueError(f"Unknown array backend {array_backend}")
+        self.array_backend = array_backend
+        for name, limit in (
+            ("fuel", fuel),
+            ("timeout", timeout),
+            ("memory_limit", memory_limit),
+        ):
+            # NaN would never trip a comparison, so it is rejected with the rest
+            if limit is not None and not (0 < limit < math.inf):
+                raise ValueError(f"{name} must be a positive number, not {limit}")
+        # Statements left before the limits are checked again, fuel and timeout
+        # of None mean unlimited
+        self.fuel = 0
+        self.fuel_granted = 0
+        self.fuel_limit = fuel
+        self.timeout = timeout
+        self.deadline: float | None = None
+        self.memory = MemoryMeter(self.origin, memory_limit)
+        self.tracer: Tracer | None = None
+        # Files are on disk unless the run has a virtual file system
+        if filesystem is None:
+            self.files = FileTable(self.origin)
+        else:
+            self.files = VirtualFileTable(self.origin, filesystem)
+        if adaptive:
+            self.visit_binary_op = self.visit_adaptive_binary_op
 
     def visit(self, thing: Expression | Statement):
-        if isinstance(thing, Expression):
-            return ExpressionVisitor.visit(self, thing)
-        else:
-            return StatementVisitor.visit(self, thing)
+        # Both node kinds dispatch through accept(), so skip the ABC isinstance check
+        if thing is not None:
+            return thing.accept(self)
 
     def visit_statements(self, statements: list[Statement]):
+        self.charge_fuel(statements)
         for stmt in statements:
             self.visit(stmt)
+            if self.return_value is not _NO_RETURN:
+                return
+
+    def set_tracer(self, tracer: Tracer | None) -> None:
+        """
+        Install tracer, or remove it with None. The traced visitors are only
+        swapped in while a tracer is installed, untraced runs don't pay for it.
+        """
+        self.tracer = tracer
+        if tracer is None:
+            for name in _TRACED_VISITORS:
+                self.__dict__.pop(name, None)
+        else:
+            self.visit_statements = self.visit_traced_statements
+            self.visit_function_call = self.visit_traced_function_call
+            self.visit_proc_call = self.visit_traced_proc_call
+
+    def add_tracer(self, tracer: Tracer) -> None:
+        """Install tracer alongside any tracers already installed."""
+        if self.tracer is None:
+            self.set_tracer(tracer)
+        elif isinstance(self.tracer, Tracers):
+            self.tracer.tracers.append(tracer)
+        else:
+            self.set_tracer(Tracers([self.tracer, tracer]))
+
+    def remove_tracer(self, tracer: Tracer) -> None:
+        """Uninstall tracer, leaving any others installed."""
+        if self.tracer is tracer:
+            self.set_tracer(None)
+        elif isinstance(self.tracer, Tracers):
+            tracers = [other for other in self.tracer.tracers if other is not tracer]
+            self.set_tracer(tracers[0] if len(tracers) == 1 else Tracers(tracers))
+
+    def hooks(self) -> Hooks | None:
+        """The installed Hooks tracer, if any."""
+        tracer = self.tracer
+        tracers = tracer.tracers if isinstance(tracer, Tracers) else [tracer]
+        for tracer in tracers:
+            if isinstance(tracer, Hooks):
+                return tracer
+        return None
+
+    def add_hook(self, event: str, callback: Callable) -> Callable:
+        """Call callback on event, see Hooks for the events and their arguments."""
+        hooks = self.hooks()
+        if hooks is None:
+            hooks = Hooks()
+            self.add_tracer(hooks)
+        return hooks.add(event, callback)
+
+    def remove_hook(self, event: str, callback: Callable) -> None:
+        """
+        Remove a hook. Once none are left the Hooks tracer is uninstalled, and
+        without other tracers the interpreter runs untraced again.
+        """
+        hooks = self.hooks()
+        if hooks is None:
+            raise ValueError(f"No {event} hook is installed")
+        hooks.remove(event, callback)
+        if not any(hooks.callbacks.values()):
+            self.remove_tracer(hooks)
+
+    def visit_traced_statements(self, statements: list[Statement]):
+        self.charge_fuel(statements)
+        tracer = self.tracer
+        for stmt in statements:
+            tracer.enter_statement(stmt)
+            try:
+                self.visit(stmt)
+            except Exception as error:
+                tracer.error(stmt, error)
+                raise
+            tracer.exit_statement(stmt)
+            if self.return_value is not _NO_RETURN:
+                return
+
+    def visit_traced_function_call(self, func_call: FunctionCall):
+        name = func_call.function.token.value
+        if name in self.builtins:
+            return Interpreter.visit_function_call(self, func_call)
+        self.tracer.enter_call(name, func_call.function.token.line)
+        try:
+            return Interpreter.visit_function_call(self, func_call)
+        finally:
+            self.tracer.exit_call(name)
+
+    def visit_traced_proc_call(self, stmt: ProcedureCallStmt) -> None:
+        self.tracer.enter_call(stmt.name.value, stmt.name.line)
+        try:
+            Interpreter.visit_proc_call(self, stmt)
+        finally:
+            self.tracer.exit_call(stmt.name.value)
+
+    def charge_fuel(self, statements: list[Statement]) -> None:
+        # Charge the whole block up front, an empty loop body still costs 1
+        self.fuel -= len(statements) or 1
+        if self.fuel < 0:
+            self.refuel(statements)
+
+    def refuel(self, statements: list[Statement]) -> None:
+        """
+        Check the fuel and time limits, then grant fuel up to the next check.
+        Output that has waited long enough is flushed here too.
+        """
+        self.output_stream.poll()
+        used = self.fuel_used
+        line = statements[0].line if statements else None
+        if self.fuel_limit is not None and used > self.fuel_limit:
+            raise PseudoLimitError(
+                f"Ran out of fuel after {self.fuel_limit} statements",
+                self.origin,
+                line,
+            )
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise PseudoLimitError(
+                f"Time limit of {self.timeout}s exceeded", self.origin, line
+            )
+        grant = FUEL_CHECK_INTERVAL
+        if self.fuel_limit is not None:
+            grant = min(grant, self.fuel_limit - used)
+        self.fuel += grant
+        self.fuel_granted += grant
+
+    @property
+    def fuel_used(self) -> int:
+        """
+        Fuel charged so far. Each block is charged its length when it starts
+        and an empty one 1, so this can be more than the statements that ran.
+        """
+        return self.fuel_granted - self.fuel
+
+    def run_stats(self) -> dict:
+        """
+        What the run has used so far. Calls count the procedure and function
+        calls that ran their body, memoized results aren't calls. Output is
+        counted in UTF-8 bytes.
+        """
+        return {
+            "fuel_used": self.fuel_used,
+            "calls": self.memory.calls,
+            "peak_call_depth": self.memory.peak_depth,
+            "peak_memory": self.memory.peak,
+            "output_bytes": self.output_stream.bytes_written(),
+        }
 
     def visit_binary_op(self, expr: BinaryOp) -> Value:
         left = self.visit(expr.left)
         right = self.visit(expr.right)
+        # Operator.CONCAT is plain str concatenation, ropes are the interpreter's
+        if expr.operator is Operator.CONCAT:
+            return concat(left, right)
         try:
             return expr.operator(left, right)
         except TypeError as e:
             raise PseudoOpError(expr.left, expr.right, e)
 
+    def visit_adaptive_binary_op(self, expr: BinaryOp) -> Value:
+        left = self.visit(expr.left)
+        right = self.visit(expr.right)
+        guard = expr.guard
+        if guard is not None:
+            if type(left) is guard[0] and type(right) is guard[1]:
+                expr.hits += 1
+                return expr.specialized(left, right)
+            # Guard failed, deoptimize back to the generic operator
+            expr.misses += 1
+            expr.guard = expr.specialized = None
+            if expr.misses >= DEOPT_LIMIT:
+                expr.gave_up = True
+        if expr.operator is Operator.CONCAT:
+            result = concat(left, right)
+        else:
+            try:
+                result = expr.operator(left, right)
+            except TypeError as e:
+                raise PseudoOpError(expr.left, expr.right, e)
+        if not expr.gave_up:
+            specialized = specialize(expr.operator, type(left), type(right))
+            if specialized is not None:
+                expr.guard = (type(left), type(right))
+                expr.specialized = specialized
+                self.quickened[id(expr)] = expr
+            elif not (isinstance(left, str) or isinstance(right, str)):
+                # Only a string can later turn into something specialized (a
+                # Rope), numbers never will
+                expr.gave_up = True
+        return result
+
+    def specialization_stats(self) -> list[dict]:
+        """Inline cache counters of every BinaryOp specialized so far."""
+        return [
+            {
+                "line": expr.line,
+                "operator": operator_name(expr.operator),
+                "types": (
+                    [t.__name__ for t in expr.guard] if expr.guard is not None else None
+                ),
+                "hits": expr.hits,
+                "misses": expr.misses,
+                "gave_up": expr.gave_up,
+            }
+            for expr in self.quickened.values()
+        ]
+
+    def visit_logical_op(self, expr: LogicalOp) -> Value:
+        left = self.visit(expr.left)
+        # Skip the right operand once the left one decides the result
+        if expr.operator is Operator.AND:
+            if not left:
+                return left
+        elif left:
+            return left
+        return self.visit(expr.right)
+
     def visit_unary_op(self, expr: UnaryOp) -> Value:
         operand = self.visit(expr.operand)
         return expr.operator(operand)
 
-    def visit_function_call(self, func_call):
-        function_name = func_call.function.token.value
+    def visit_function_call(self, func_call: FunctionCall):
+        if func_call.version != self.subroutines_version:
+            self.resolve_function_call(func_call)
+        func = func_call.target
+        if func_call.bindings is None:
+            # Builtins evaluate their own parameters
+            return func(func_call.params)
+
         line = func_call.function.token.line
+        args = self.pass_arguments(func_call.bindings, func_call.params, line)
+        memo = func_call.memo
+        if memo is not None:
+            key = memo.key([arg.value for arg in args])
+            value = memo.get(key, _NO_RETURN)
+            if value is not _NO_RETURN:
+                return value
+
+        # Create new scope for function parameters
+        self.enter_frame(line)
+        variables = self.variable_state.variables
+        for (name, _, _, _), arg in zip(func_call.bindings, args):
+            variables[name] = arg
+
+        try:
+            # Execute function body, RETURN stops it and leaves the value behind
+            self.visit_statements(func.body)
+        except RecursionError:
+            raise self.too_deep(line) from None
+        finally:
+            # Restore previous scope
+            self.variable_state.pop_scope()
+            self.memory.leave()
+            self.release_arguments(func_call.bindings, args)
+        value = self.return_value
+        if value is _NO_RETURN:
+            raise PseudoSubroutineError(
+                f"Function {func.name.value} did not return a value",
+                self.origin,
+                line,
+            )
+        self.return_value = _NO_RETURN
+        if memo is not None:
+            memo.put(key, value)
+        return value
+
+    def enter_frame(self, line: int) -> None:
+        """Enter the frame of a subroutine called from line."""
+        if len(self.memory.frames) >= MAX_CALL_DEPTH:
+            raise self.too_deep(line)
+        self.memory.enter(line)
+        self.variable_state.push_scope()
+
+    def too_deep(self, line: int) -> PseudoLimitError:
+        return PseudoLimitError(
+            f"Calls nested more than {MAX_CALL_DEPTH} deep, is the recursion "
+            "missing a base case?",
+            self.origin,
+            line,
+        )
+
+    def resolve_function_call(self, func_call: FunctionCall) -> None:
+        """Cache the target of a function call site and how to bind its arguments."""
+        function_name = func_call.function.token.value
         if function_name in self.builtins:
-            return self.builtins[function_name](func_call.params)
+            func_call.target = self.builtins[function_name]
+            func_call.bindings = None
         elif function_name in self.variable_state.functions:
             func = self.variable_state.functions[function_name]
-
-            # Create new scope for function parameters
-            self.variable_state.push_scope()
-            if func.params is not None:
-                # Bind function parameters to new variable state
-                for param, original_param in zip(func_call.params, func.params):
-                    param_value = self.visit(param)
-                    self.variable_state.variables[original_param[0].value] = (
-                        param_value,
-                        original_param[1],
-                    )
-
-            try:
-                # Execute function body and handle return value via exception
-                self.visit_statements(func.body)
-                # If we reach here, no return statement was encountered
-                raise PseudoSubroutineError(
-                    f"Function {function_name} did not return a value",
-                    self.origin,
-                    line,
-                )
-            except ReturnException as ret:
-                # Restore previous scope and return value
-                self.variable_state.pop_scope()
-                return ret.value
+            func_call.target = func
+            func_call.bindings = self.binding_plan(func.params)
+            func_call.memo = self.memo_table(func)
         else:
             raise PseudoUndefinedError(
-                f"name {function_name} is not defined", self.origin, line
+                f"name {function_name} is not defined",
+                self.origin,
+                func_call.function.token.line,
             )
+        func_call.version = self.subroutines_version
+
+    def resolve_proc_call(self, stmt: ProcedureCallStmt) -> None:
+        """Cache the target of a procedure call site and how to bind its arguments."""
+        procedure_name = stmt.name.value
+        if procedure_name not in self.variable_state.procedures:
+            raise PseudoUndefinedError(
+                f"Procedure {procedure_name} is not defined",
+                self.origin,
+                stmt.name.line,
+            )
+        proc = self.variable_state.procedures[procedure_name]
+        stmt.target = proc
+        stmt.bindings = self.binding_plan(proc.params)
+        stmt.version = self.subroutines_version
+
+    def memo_table(self, func: FunctionDecl) -> MemoTable | None:
+        if id(func) not in self.pure_functions:
+            return None
+        if id(func) not in self.memo_tables:
+            self.memo_tables[id(func)] = MemoTable(func.name.value, self.memo_size)
+        return self.memo_tables[id(func)]
+
+    def memo_stats(self) -> list[dict]:
+        """Hit and miss counts of every memoized function."""
+        return [
+            {
+                "function": table.name,
+                "hits": table.hits,
+                "misses": table.misses,
+                "size": len(table.results),
+            }
+            for table in self.memo_tables.values()
+        ]
+
+    @staticmethod
+    def binding_plan(params) -> tuple[tuple[str, Type, bool, bool], ...]:
+        """(name, type, passed BYREF, shared copy-on-write) of every parameter."""
+        if params is None:
+            return ()
+        return tuple(
+            (name.value, type_, by_ref, not by_ref and isinstance(type_, ArrayType))
+            for name, type_, by_ref in params
+        )
+
+    def pass_arguments(
+        self, bindings: tuple, args: list[Expression], line: int
+    ) -> list[Variable]:
+        """Evaluate the arguments of a call into the variables the callee will see."""
+        result = []
+        for (name, type_, by_ref, shared), arg in zip(bindings, args):
+            if by_ref:
+                # The callee works on the caller's variable itself
+                variable = None
+                if isinstance(arg, Identifier):
+                    variable = self.variable_state.lookup(arg.token.value)
+                if variable is None:
+                    raise PseudoSubroutineError(
+                        f"BYREF parameter {name} must be passed a variable",
+                        self.origin,
+                        line,
+                    )
+                result.append(variable)
+                continue
+            value = self.visit(arg)
+            if shared:
+                # BYVAL arrays are only copied once either side writes to them
+                self.variable_state.share_array(value)
+            # Owned by the callee's frame, which is entered next
+            result.append(
+                Variable(value, type_, len(self.variable_state.variable_stack) + 1)
+            )
+        return result
+
+    def release_arguments(self, bindings: tuple, args: list[Variable]) -> None:
+        for (_, _, _, shared), arg in zip(bindings, args):
+            if shared:
+                self.variable_state.release_array(arg.value)
 
     def visit_array_index(self, expr: ArrayIndex) -> Value:
         name = expr.array.token.value
-        array_type = self.variable_state.variables[name][1]
+        variable = self.variable_state.lookup(name)
+        if variable is None:
+            raise PseudoUndefinedError(
+                f"name {name} is not defined", self.origin, expr.array.token.line
+            )
+        array_type = variable.type
         if not isinstance(array_type, ArrayType):
             raise PseudoAssignmentError(
                 f"{name} is not an array.", self.origin, expr.array.token.line
             )
 
         indices = [self.visit(indexexp) for indexexp in expr.index]
-        ranges = [(self.visit(a), self.visit(b)) for a, b in array_type.ranges]
-
         try:
-            target = self.variable_state.get_array_value(name, indices, ranges)
+            target = variable.value.get(indices)
         except IndexError:
             raise PseudoIndexError(
                 name,
                 indices,
-                ranges,
+                variable.value.ranges,
+                self.origin,
+                expr.array.token.line,
+            )
+        if target is None:
+            raise InterpreterError(
+                f"{name}{''.join(f'[{index}]' for index in indices)} has no value",
                 self.origin,
                 expr.array.token.line,
             )
@@ -146,22 +579,30 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
 
     def visit_identifier(self, expr: Identifier) -> Value:
         name = expr.token.value
-        if name in self.variable_state.variables:
-            value = self.variable_state.variables[name][0]
+        variable = self.variable_state.lookup(name)
+        if variable is not None:
+            value = variable.value
         elif name in self.variable_state.constants:
             value = self.variable_state.constants[name]
         else:
-            raise InterpreterError(f"Name {name} isn't defined")
+            raise PseudoUndefinedError(
+                f"Name {name} isn't defined", self.origin, expr.token.line
+            )
 
         if value is None:
-            raise InterpreterError(f"Name {name} has no value")
+            raise InterpreterError(
+                f"Name {name} has no value", self.origin, expr.token.line
+            )
         return value
 
     def visit_proc_decl(self, stmt: ProcedureDecl) -> None:
         self.variable_state.procedures[stmt.name.value] = stmt
+        # Invalidate every cached call site
+        self.subroutines_version = next(_call_site_versions)
 
     def visit_func_decl(self, stmt: FunctionDecl) -> None:
         self.variable_state.functions[stmt.name.value] = stmt
+        self.subroutines_version = next(_call_site_versions)
 
     def visit_if(self, stmt: IfStmt) -> None:
         condition = self.visit(stmt.condition)
@@ -172,13 +613,78 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
 
     def visit_case(self, stmt: CaseStmt):
         expr = self.visit(stmt.expr)
-        for i in stmt.cases:
-            if self.visit(i[0]) == expr:
-                self.visit_statements(i[1])
+        if stmt.jump_table is None:
+            stmt.jump_table = self.build_jump_table(stmt)
+        if stmt.jump_table is not _NO_JUMP_TABLE:
+            body = stmt.jump_table.get(expr)
+            if body is not None:
+                self.visit_statements(body)
                 return
+            # The table only holds the integers of a range, a REAL between them
+            # is still inside it
+            if type(expr) is float and not expr.is_integer():
+                if self.scan_cases(stmt, expr):
+                    return
+        elif self.scan_cases(stmt, expr):
+            return
         if stmt.otherwise is not None:
             self.visit_statements(stmt.otherwise)
 
+    def scan_cases(self, stmt: CaseStmt, expr: Value) -> bool:
+        """Run the body of the first label matching expr, if any."""
+        for label, body in stmt.cases:
+            if isinstance(label, CaseRange):
+                try:
+                    matched = self.visit(label.low) <= expr <= self.visit(label.high)
+                except TypeError:
+                    matched = False
+            else:
+                matched = self.visit(label) == expr
+            if matched:
+                self.visit_statements(body)
+                return True
+        return False
+
+    def build_jump_table(self, stmt: CaseStmt) -> dict[Value, list[Statement]]:
+        """Map every label of a CASE to its body if all labels are constant.
+
+        Range labels are expanded when both ends are integers no more than
+        MAX_JUMP_TABLE_RANGE apart.
+        """
+        table = {}
+        for label, body in stmt.cases:
+            if isinstance(label, CaseRange):
+                low = self.constant_label(label.low)
+                high = self.constant_label(label.high)
+                if (
+                    type(low) is not int
+                    or type(high) is not int
+                    or high - low >= MAX_JUMP_TABLE_RANGE
+                ):
+                    return _NO_JUMP_TABLE
+                values = range(low, high + 1)
+            else:
+                value = self.constant_label(label)
+                if value is None:
+                    return _NO_JUMP_TABLE
+                values = (value,)
+            for value in values:
+                # The first matching label wins, as in the linear scan
+                table.setdefault(value, body)
+        return table
+
+    def constant_label(self, label: Expression) -> Value | None:
+        """The value of a CASE label known before the run, or None."""
+        if isinstance(label, Literal):
+            return label.token.value
+        if (
+            isinstance(label, Identifier)
+            and label.token.value in self.variable_state.constants
+            and self.variable_state.lookup(label.token.value) is None
+        ):
+            return self.variable_state.constants[label.token.value]
+        return None
+
     def visit_for_loop(self, stmt: ForStmt) -> None:
         if isinstance(stmt, ArrayIndex):
             raise NotImplemented
@@ -189,158 +695,167 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
             step_value = self.visit(stmt.step)
         else:
             step_value = 1
-        cnt = 0
+        variable = self.variable_state.lookup(name)
+        if variable is None:
+            variable = self.variable_state.declare(name, None, PrimitiveType.INTEGER)
         while (
             current_value <= end_value if step_value > 0 else current_value >= end_value
         ):
-            self.variable_state.variables[name] = (current_value, PrimitiveType.INTEGER)
+            variable.value = current_value
             self.visit_statements(stmt.body)
+            if self.return_value is not _NO_RETURN:
+                return
             current_value += step_value
-            cnt += 1
-            if cnt > 10000:
-                raise InterpreterError(
-                    "Maximum iteration limit(10000) reached",
-                    self.origin,
-                    stmt.variable.token.line,
-                )
 
     def visit_repeat_until(self, stmt: RepeatUntilStmt) -> None:
         self.visit_statements(stmt.body)
-        cnt = 0
+        if self.return_value is not _NO_RETURN:
+            return
         while True:
             self.visit_statements(stmt.body)
+            if self.return_value is not _NO_RETURN:
+                return
             expr = self.visit(stmt.condition)
             if expr:
                 break
-            cnt += 1
-            if cnt > 10000:
-                raise InterpreterError(
-                    "Maximum iteration limit(10000) reached",
-                    self.origin,
-                    stmt.condition.token.line,
-                )
 
     def visit_while(self, stmt: WhileStmt) -> None:
         expr = self.visit(stmt.condition)
-        cnt = 0
         while expr:
             self.visit_statements(stmt.body)
+            if self.return_value is not _NO_RETURN:
+                return
             expr = self.visit(stmt.condition)
-            cnt += 1
-            if cnt > 10000:
-                raise InterpreterError(
-                    "Maximum iteration limit(10000) reached",
-                    self.origin,
-                    stmt.condition.token.line,
-                )
 
     def visit_variable_decl(self, stmt: VariableDecl) -> None:
         # for name in stmt.names:
         name = stmt.name
         if isinstance(stmt.vartype, ArrayType):
             ranges = [(self.visit(a), self.visit(b)) for a, b in stmt.vartype.ranges]
-            self.variable_state.variables[name.value] = (
-                self.variable_state.create_nd_array(ranges),
-                stmt.vartype,
+            array = new_array(ranges, stmt.vartype.type, self.array_backend)
+            if isinstance(array, SparsePseudoArray):
+                array.meter = self.memory
+            self.memory.charge(
+                array.nbytes(), name.line, len(self.variable_state.variable_stack)
             )
+            self.variable_state.declare(name.value, array, stmt.vartype)
         else:
-            self.variable_state.variables[name.value] = (None, stmt.vartype)
+            self.variable_state.declare(name.value, None, stmt.vartype)
 
     def visit_constant_decl(self, stmt: ConstantDecl) -> None:
         self.variable_state.constants[stmt.name.value] = stmt.value.value
 
     def visit_input(self, stmt: InputStmt) -> None:
-        if isinstance(stmt.variable, ArrayIndex):
-            name = stmt.variable.array.token.value
-            array_type = self.variable_state.variables[name][1]
-            vartype = array_type.type
-
+        self.store_text(stmt.variable, self.read_input)
+
+    def read_input(self, name: str, line: int) -> str:
+        # Prompts written so far must be visible before waiting for input
+        self.output_stream.flush()
+        waiting = time.monotonic()
+        inp = self.input_stream.readline()
+        if self.deadline is not None:
+            # Time spent waiting for the user doesn't count against the limit
+            self.deadline += time.monotonic() - waiting
+        if not inp:
+            raise PseudoInputError(f"No input left for {name}", self.origin, line)
+        return inp.strip()
+
+    def store_text(self, target: Assignable, read: Callable[[str, int], str]) -> None:
+        """Read a line of text with read and store it in target as its type."""
+        if isinstance(target, ArrayIndex):
+            token = target.array.token
         else:
-            name = stmt.variable.token.value
-            vartype = self.variable_state.variables[name][1]
+            token = target.token
+        name = token.value
+        variable = self.variable_state.lookup(name)
 
-        if name not in self.variable_state.variables:
-            raise InterpreterError(f"{name} was not declared")
+        if variable is None:
+            raise PseudoUndefinedError(
+                f"{name} was not declared", self.origin, token.line
+            )
+        if isinstance(target, ArrayIndex):
+            vartype = variable.type.type
+        else:
+            vartype = variable.type
         if name in self.variable_state.constants:
             raise PseudoInputError(
                 f"{name} is a constant, which can't be inputted",
                 self.origin,
-                stmt.variable.token.line,
+                token.line,
             )
 
-        inp = self.input_stream.readline().strip()
-        val = PrimitiveType.parse_to_type(
-            vartype, inp, name, self.origin, stmt.variable.token.line
-        )
-        if isinstance(stmt.variable, ArrayIndex):
-            indices = [self.visit(indexexp) for indexexp in stmt.variable.index]
-            ranges = [(self.visit(a), self.visit(b)) for a, b in vartype.ranges]
-            self.variable_state.set_array_value(name, indices, val, ranges)
+        text = read(name, token.line)
+        val = PrimitiveType.parse_to_type(vartype, text, name, self.origin, token.line)
+        if isinstance(target, ArrayIndex):
+            indices = [self.visit(indexexp) for indexexp in target.index]
+            self.store_element(name, variable, indices, val, token.line)
         else:
-            self.variable_state.variables[name] = (
-                val,
-                self.variable_state.variables[name][1],
-            )
+            if vartype is PrimitiveType.STRING:
+                self.account_string(variable, val, token.line)
+            variable.value = val
 
     def visit_output(self, stmt: OutputStmt) -> None:
         values = [self.visit(expr) for expr in stmt.values]
-        print("".join(map(str, values)))
+        self.output_stream.write("".join(map(str, values)) + "\n")
 
     def visit_return(self, stmt: ReturnStmt) -> None:
-        raise ReturnException(self.visit(stmt.value))
+        self.return_value = self.visit(stmt.value)
 
     def visit_f_open(self, stmt: FileOpenStmt) -> None:
-        pass
+        self.files.open(stmt.file.value, stmt.mode.keyword, stmt.line)
 
     def visit_f_read(self, stmt: FileReadStmt) -> None:
-        pass
+        name = stmt.file.value
+        self.store_text(stmt.target, lambda _, line: self.files.read_line(name, line))
 
     def visit_f_write(self, stmt: FileWriteStmt) -> None:
-        pass
+        value = self.visit(stmt.value)
+        self.files.write_line(stmt.file.value, str(value), stmt.line)
 
     def visit_f_close(self, stmt: FileCloseStmt) -> None:
-        pass
+        self.files.close(stmt.file.value, stmt.line)
 
     def visit_proc_call(self, stmt: ProcedureCallStmt) -> None:
-        procedure_name = stmt.name.value
-        line = stmt.name.line
-        # Check if the procedure is defined
-        if procedure_name not in self.variable_state.procedures:
-            raise PseudoUndefinedError(
-                f"Procedure {procedure_name} is not defined", self.origin, line
-            )
-
-        # Retrieve the procedure statement
-        proc = self.variable_state.procedures[procedure_name]
+        if stmt.version != self.subroutines_version:
+            self.resolve_proc_call(stmt)
+        proc = stmt.target
 
+        args = self.pass_arguments(stmt.bindings, stmt.args or (), stmt.name.line)
         # Create new scope for procedure parameters
-        self.variable_state.push_scope()
-        if proc.params is not None:
-            # Bind parameters passed to the procedure to the new scope
-            for param, proc_param in zip(stmt.args, proc.params):
-                param_value = self.visit(param)
-                self.variable_state.variables[proc_param[0].value] = (
-                    param_value,
-                    proc_param[1],
-                )
+        self.enter_frame(stmt.name.line)
+        variables = self.variable_state.variables
+        for (name, _, _, _), arg in zip(stmt.bindings, args):
+            variables[name] = arg
 
         try:
             # Execute the procedure's statements
             self.visit_statements(proc.body)
-        except ReturnException:
-            raise PseudoSubroutineError(
-                f"Procedure {procedure_name} mustn't has return values",
-                self.origin,
-                line,
-            )
+        except RecursionError:
+            raise self.too_deep(stmt.name.line) from None
         finally:
             # Restore the previous scope
             self.variable_state.pop_scope()
+            self.memory.leave()
+            self.release_arguments(stmt.bindings, args)
+        if self.return_value is not _NO_RETURN:
+            self.return_value = _NO_RETURN
+            raise PseudoSubroutineError(
+                f"Procedure {proc.name.value} mustn't has return values",
+                self.origin,
+                stmt.name.line,
+            )
 
     def visit_assign(self, stmt: AssignmentStmt) -> None:
         if isinstance(stmt.target, ArrayIndex):
             name = stmt.target.array.token.value
-            array_type = self.variable_state.variables[name][1]
+            variable = self.variable_state.lookup(name)
+            if variable is None:
+                raise PseudoUndefinedError(
+                    f"{name} was not declared",
+                    self.origin,
+                    stmt.target.array.token.line,
+                )
+            array_type = variable.type
             val = self.visit(stmt.value)
             if not self.check_type(val, array_type.type):
                 raise PseudoAssignmentError(
@@ -349,21 +864,16 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
                     stmt.target.array.token.line,
                 )
             indices = [self.visit(indexexp) for indexexp in stmt.target.index]
-            ranges = [(self.visit(a), self.visit(b)) for a, b in array_type.ranges]
-            try:
-                self.variable_state.set_array_value(name, indices, val, ranges)
-            except IndexError:
-                raise PseudoIndexError(
-                    name,
-                    indices,
-                    ranges,
-                    self.origin,
-                    stmt.target.array.token.line,
-                )
+            self.store_element(
+                name, variable, indices, val, stmt.target.array.token.line
+            )
         else:
             name = stmt.target.token.value
-            if name not in self.variable_state.variables:
-                raise InterpreterError(f"{name} was not declared")
+            variable = self.variable_state.lookup(name)
+            if variable is None:
+                raise PseudoUndefinedError(
+                    f"{name} was not declared", self.origin, stmt.target.token.line
+                )
             if name in self.variable_state.constants:
                 raise PseudoAssignmentError(
                     f"{name} is a constant, which can't be assigned a value.",
@@ -371,20 +881,57 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
                     stmt.target.token.line,
                 )
             val = self.visit(stmt.value)
-            if self.check_type(val, self.variable_state.variables[name][1]):
-                self.variable_state.variables[name] = (
-                    val,
-                    self.variable_state.variables[name][1],
-                )
+            if self.check_type(val, variable.type):
+                if variable.type is PrimitiveType.STRING:
+                    self.account_string(variable, val, stmt.target.token.line)
+                variable.value = val
             else:
                 raise PseudoAssignmentError(
-                    f"Type Error for assigning {name}, expected {self.variable_state.variables[name][1].name}",
+                    f"Type Error for assigning {name}, expected {variable.type.name}",
                     self.origin,
                     stmt.target.token.line,
                 )
 
+    def store_element(
+        self, name: str, variable: Variable, indices: list, value: Value, line: int
+    ) -> None:
+        """Store value in the array held by variable, charging what it adds."""
+        array = variable.value
+        try:
+            if variable.type.type is PrimitiveType.STRING:
+                old = array.get(indices)
+                growth = len(value) - (len(old) if old is not None else 0)
+                if growth:
+                    self.memory.charge(growth, line, variable.frame)
+            if array.shares:
+                # The write below copies the array
+                self.memory.charge(array.nbytes(), line, variable.frame)
+            self.variable_state.set_array_value(variable, indices, value, line)
+        except IndexError:
+            raise PseudoIndexError(name, indices, array.ranges, self.origin, line)
+
+    def account_string(self, variable: Variable, value: str | Rope, line: int) -> None:
+        """Charge the growth of a STRING variable about to hold value."""
+        old = variable.value
+        growth = len(value) - (len(old) if old is not None else 0)
+        if growth:
+            self.memory.charge(growth, line, variable.frame)
+
     def visit_program(self, stmt: Program) -> None:
-        self.visit_statements(stmt.statements)
+        if self.timeout is not None:
+            self.deadline = time.monotonic() + self.timeout
+        if self.memo_size > 0:
+            self.pure_functions = find_pure_functions(stmt, set(self.builtins))
+        # Each pseudocode call nests several Python calls, make room for
+        # MAX_CALL_DEPTH of them
+        recursion_limit = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(recursion_limit, MAX_CALL_DEPTH * _FRAMES_PER_CALL))
+        try:
+            self.visit_statements(stmt.statements)
+        finally:
+            sys.setrecursionlimit(recursion_limit)
+            self.files.close_all()
+            self.output_stream.flush()
 
     def check_type(self, val, typ):
         if typ == PrimitiveType.INTEGER:
@@ -404,7 +951,7 @@ class Interpreter(ExpressionVisitor, StatementVisitor):
                 return False
             return True
         if typ == PrimitiveType.STRING:
-            if isinstance(val, str):
+            if isinstance(val, (str, Rope)):
                 return True
             else:
                 return False
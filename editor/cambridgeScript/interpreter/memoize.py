@@ -0,0 +1,252 @@
+"""
+Automatic memoization of pure user FUNCTIONs.
+
+A function is pure when a call can't be observed from outside other than
+through its return value: it only touches its own parameters and locals
+(CONSTANTs may be read), performs no INPUT/OUTPUT or file statements, never
+calls RANDOM or a procedure, and only calls other pure functions.
+"""
+
+from collections import OrderedDict
+from typing import Any
+
+from cambridgeScript.syntax_tree import (
+    Expression,
+    Identifier,
+    Literal,
+    ArrayIndex,
+    FunctionCall,
+    UnaryOp,
+    BinaryOp,
+    Statement,
+    AssignmentStmt,
+    ReturnStmt,
+    ConstantDecl,
+    VariableDecl,
+    WhileStmt,
+    RepeatUntilStmt,
+    ForStmt,
+    CaseStmt,
+    CaseRange,
+    IfStmt,
+    FunctionDecl,
+    Program,
+    ArrayType,
+)
+from cambridgeScript.syntax_tree.visitors import ExpressionVisitor, StatementVisitor
+
+# Builtins whose result doesn't only depend on their arguments
+IMPURE_BUILTINS = {"RANDOM", "EOF"}
+
+
+class _Impure(Exception):
+    pass
+
+
+class PurityChecker(ExpressionVisitor, StatementVisitor):
+    """Collects the callees of a function body, raising _Impure on side effects."""
+
+    def __init__(self, func: FunctionDecl, constants: set[str]):
+        self.constants = constants
+        self.locals = {name.value for name, _, _ in func.params or ()}
+        self.callees: set[str] = set()
+
+    def check(self, func: FunctionDecl) -> bool:
+        for _, type_, by_ref in func.params or ():
+            if by_ref or isinstance(type_, ArrayType):
+                # Writes reach the caller, and arrays aren't hashable
+                return False
+        # Locals are visible from the start of the body, as in the interpreter
+        for stmt in func.body:
+            if isinstance(stmt, VariableDecl):
+                self.locals.add(stmt.name.value)
+        try:
+            self.visit_statements(func.body)
+        except _Impure:
+            return False
+        return True
+
+    def visit(self, thing: Expression | Statement) -> Any:
+        if thing is not None:
+            return thing.accept(self)
+
+    def visit_statements(self, statements: list[Statement] | None) -> None:
+        for stmt in statements or ():
+            self.visit(stmt)
+
+    def _write(self, target: Expression) -> None:
+        if isinstance(target, ArrayIndex):
+            for index in target.index:
+                self.visit(index)
+            target = target.array
+        if target.token.value not in self.locals:
+            raise _Impure
+
+    def _impure(self, *_) -> None:
+        raise _Impure
+
+    # Expressions
+
+    def visit_binary_op(self, expr: BinaryOp) -> None:
+        self.visit(expr.left)
+        self.visit(expr.right)
+
+    visit_logical_op = visit_binary_op
+
+    def visit_unary_op(self, expr: UnaryOp) -> None:
+        self.visit(expr.operand)
+
+    def visit_function_call(self, expr: FunctionCall) -> None:
+        name = expr.function.token.value
+        if name in IMPURE_BUILTINS:
+            raise _Impure
+        self.callees.add(name)
+        for param in expr.params:
+            self.visit(param)
+
+    def visit_array_index(self, expr: ArrayIndex) -> None:
+        self.visit(expr.array)
+        for index in expr.index:
+            self.visit(index)
+
+    def visit_literal(self, expr: Literal) -> None:
+        pass
+
+    def visit_identifier(self, expr: Identifier) -> None:
+        name = expr.token.value
+        if name not in self.locals and name not in self.constants:
+            # Reading a global makes the result depend on more than the arguments
+            raise _Impure
+
+    # Statements
+
+    visit_proc_decl = _impure
+    visit_func_decl = _impure
+    visit_input = _impure
+    visit_output = _impure
+    visit_f_open = _impure
+    visit_f_read = _impure
+    visit_f_write = _impure
+    visit_f_close = _impure
+    visit_proc_call = _impure
+    visit_constant_decl = _impure
+
+    def visit_if(self, stmt: IfStmt) -> None:
+        self.visit(stmt.condition)
+        self.visit_statements(stmt.then_branch)
+        self.visit_statements(stmt.else_branch)
+
+    def visit_case(self, stmt: CaseStmt) -> None:
+        self.visit(stmt.expr)
+        for label, body in stmt.cases:
+            if isinstance(label, CaseRange):
+                self.visit(label.low)
+                self.visit(label.high)
+            else:
+                self.visit(label)
+            self.visit_statements(body)
+        self.visit_statements(stmt.otherwise)
+
+    def visit_for_loop(self, stmt: ForStmt) -> None:
+        self._write(stmt.variable)
+        self.visit(stmt.start)
+        self.visit(stmt.end)
+        self.visit(stmt.step)
+        self.visit_statements(stmt.body)
+
+    def visit_repeat_until(self, stmt: RepeatUntilStmt) -> None:
+        self.visit_statements(stmt.body)
+        self.visit(stmt.condition)
+
+    def visit_while(self, stmt: WhileStmt) -> None:
+        self.visit(stmt.condition)
+        self.visit_statements(stmt.body)
+
+    def visit_variable_decl(self, stmt: VariableDecl) -> None:
+        if stmt.name.value not in self.locals:
+            raise _Impure
+        if isinstance(stmt.vartype, ArrayType):
+            for low, high in stmt.vartype.ranges:
+                self.visit(low)
+                self.visit(high)
+
+    def visit_return(self, stmt: ReturnStmt) -> None:
+        self.visit(stmt.value)
+
+    def visit_assign(self, stmt: AssignmentStmt) -> None:
+        self._write(stmt.target)
+        self.visit(stmt.value)
+
+    def visit_program(self, stmt: Program) -> None:
+        raise _Impure
+
+
+def find_pure_functions(program: Program, builtins: set[str]) -> set[int]:
+    """Return the ids of the pure FunctionDecl nodes declared at the top of program."""
+    constants = {
+        stmt.name.value for stmt in program.statements if isinstance(stmt, ConstantDecl)
+    }
+    declarations: dict[str, list[FunctionDecl]] = {}
+    for stmt in program.statements:
+        if isinstance(stmt, FunctionDecl):
+            declarations.setdefault(stmt.name.value, []).append(stmt)
+
+    callees = {}
+    for decls in declarations.values():
+        for func in decls:
+            checker = PurityChecker(func, constants)
+            if checker.check(func):
+                callees[id(func)] = checker.callees
+
+    # A function stays pure only while every user function it calls is pure
+    changed = True
+    while changed:
+        changed = False
+        for key, names in list(callees.items()):
+            for name in names:
+                if name in builtins:
+                    # Builtins shadow user functions, RANDOM was rejected already
+                    continue
+                if name in declarations and all(
+                    id(decl) in callees for decl in declarations[name]
+                ):
+                    continue
+                del callees[key]
+                changed = True
+                break
+    return set(callees)
+
+
+class MemoTable:
+    """Bounded LRU of function results keyed by argument values."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self.results: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(args: list) -> tuple:
+        # Keep 1, 1.0 and TRUE apart even though they compare equal
+        return tuple(args), tuple(map(type, args))
+
+    def get(self, key: tuple, default: Any) -> Any:
+        try:
+            value = self.results[key]
+        except (KeyError, TypeError):
+            # TypeError: an argument isn't hashable, so the call can't be cached
+            self.misses += 1
+            return default
+        self.results.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: tuple, value: Any) -> None:
+        try:
+            self.results[key] = value
+        except TypeError:
+            return
+        if len(self.results) > self.size:
+            self.results.popitem(last=False)
@@ -0,0 +1,49 @@
+from cambridgeScript.exceptions import PseudoMemoryError
+
+# Rough size of a call frame
+FRAME_BYTES = 512
+
+
+class MemoryMeter:
+    """
+    Approximate accounting of the memory a program holds: arrays, strings
+    stored in variables and call frames.
+
+    Each charge belongs to a call frame, numbered by depth with 0 for the
+    global frame. What a subroutine's frame holds is released when it is left.
+    Going over limit raises PseudoMemoryError.
+    """
+
+    def __init__(self, origin: list[str], limit: int | None = None):
+        self.origin = origin
+        self.limit = limit
+        self.used = 0
+        self.peak = 0
+        # Bytes charged to each active call frame
+        self.frames: list[int] = []
+        # Subroutine calls made and the deepest they nested
+        self.calls = 0
+        self.peak_depth = 0
+
+    def charge(self, nbytes: int, line: int | None = None, frame: int = 0):
+        self.used += nbytes
+        if frame:
+            self.frames[frame - 1] += nbytes
+        if self.used > self.peak:
+            self.peak = self.used
+            if self.limit is not None and self.used > self.limit:
+                raise PseudoMemoryError(
+                    f"Program uses more than {self.limit} bytes", self.origin, line
+                )
+
+    def enter(self, line: int) -> None:
+        """Charge for a new call frame."""
+        self.frames.append(0)
+        self.calls += 1
+        if len(self.frames) > self.peak_depth:
+            self.peak_depth = len(self.frames)
+        self.charge(FRAME_BYTES, line, len(self.frames))
+
+    def leave(self) -> None:
+        """Release the current call frame and everything charged to it."""
+        self.used -= self.frames.pop()
@@ -0,0 +1,121 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from time import perf_counter
+
+from cambridgeScript.interpreter.tracing import Tracer
+from cambridgeScript.syntax_tree import Statement
+
+
+@dataclass(slots=True)
+class Timing:
+    # Statement executions or subroutine calls
+    count: int = 0
+    # Seconds including everything run inside, counted once under recursion
+    total: float = 0.0
+    # Seconds excluding nested statements (lines) or nested calls (subroutines)
+    own: float = 0.0
+
+
+class _Timer:
+    """Inclusive and exclusive time of nested intervals, keyed by name."""
+
+    def __init__(self):
+        self.timings: dict = defaultdict(Timing)
+        # [key, start, time spent in nested intervals]
+        self.stack: list[list] = []
+        self.active: dict = defaultdict(int)
+
+    def start(self, key) -> None:
+        self.stack.append([key, perf_counter(), 0.0])
+        self.active[key] += 1
+
+    def stop(self) -> None:
+        key, start, nested = self.stack.pop()
+        elapsed = perf_counter() - start
+        timing = self.timings[key]
+        timing.count += 1
+        timing.own += elapsed - nested
+        self.active[key] -= 1
+        if not self.active[key]:
+            timing.total += elapsed
+        if self.stack:
+            self.stack[-1][2] += elapsed
+
+
+class Profiler(Tracer):
+    """Hit counts and time per source line and per procedure or function."""
+
+    def __init__(self):
+        self.lines = _Timer()
+        self.subroutines = _Timer()
+
+    def enter_statement(self, stmt: Statement) -> None:
+        self.lines.start(stmt.line)
+
+    def exit_statement(self, stmt: Statement) -> None:
+        self.lines.stop()
+
+    def error(self, stmt: Statement, error: Exception) -> None:
+        # A statement that raised never exits, its time still counts
+        self.lines.stop()
+
+    def enter_call(self, name: str, line: int) -> None:
+        self.subroutines.start(name)
+
+    def exit_call(self, name: str) -> None:
+        self.subroutines.stop()
+
+    def to_json(self, interpreter=None) -> dict:
+        """
+        Per-line and per-subroutine timings, with the interpreter's memo and
+        specialization counters when it is given.
+        """
+        result = {
+            "lines": {
+                str(line): {"hits": t.count, "total": t.total, "self": t.own}
+                for line, t in sorted(self.lines.timings.items())
+            },
+            "subroutines": {
+                name: {"calls": t.count, "total": t.total, "self": t.own}
+                for name, t in self.subroutines.timings.items()
+            },
+        }
+        if interpreter is not None:
+            result["memo"] = interpreter.memo_stats()
+            result["specializations"] = interpreter.specialization_stats()
+        return result
+
+    def report(self, origin: list[str], limit: int = 20, interpreter=None) -> str:
+        """
+        Text report of the lines and subroutines with the most self time, and
+        the memo hit rates of the interpreter when it is given.
+        """
+        rows = ["   line      hits    total s     self s  source"]
+        lines = sorted(
+            self.lines.timings.items(), key=lambda item: item[1].own, reverse=True
+        )
+        for line, t in lines[:limit]:
+            source = origin[line - 1].strip() if line else ""
+            rows.append(f"{line:7} {t.count:9} {t.total:10.4f} {t.own:10.4f}  {source}")
+        if self.subroutines.timings:
+            rows.append("")
+            rows.append("subroutine                calls    total s     self s")
+            subroutines = sorted(
+                self.subroutines.timings.items(),
+                key=lambda item: item[1].own,
+                reverse=True,
+            )
+            for name, t in subroutines[:limit]:
+                rows.append(f"{name:20} {t.count:10} {t.total:10.4f} {t.own:10.4f}")
+        memo = interpreter.memo_stats() if interpreter is not None else []
+        if memo:
+            rows.append("")
+            rows.append("memoized function          hits     misses  hit rate")
+            for table in memo:
+                calls = table["hits"] + table["misses"]
+                rate = table["hits"] / calls if calls else 0.0
+                rows.append(
+                    f"{table['function']:20} {table['hits']:10} "
+                    f"{table['misses']:10} {rate:9.1%}"
+                )
+        return "\n".join(rows)
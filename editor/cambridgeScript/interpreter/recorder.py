@@ -0,0 +1,296 @@
+"""
+Compact binary traces of pseudocode runs, and deterministic replay.
+
+A TraceRecorder logs every statement run, every line read by INPUT, every
+value RANDOM returns and how much output has been written. Input lines and
+RANDOM values are all kept, they are what a replay needs. Everything else goes
+into a ring buffer of chunks that keeps only the most recent records once the
+buffer is full. Replaying feeds the recorded input and RANDOM values back to
+the program, which then runs exactly as it did, and records it again so the
+two traces can be compared.
+
+Runs that read files or hit the time limit depend on more than the trace: they
+replay the same way only with the same files and limits.
+
+Trace format, integers are unsigned LEB128 varints unless given a size:
+
+    magic       b"CSTRACE\\0"
+    version     1 byte, currently 1
+    source      32 bytes, SHA-256 of the program's UTF-8 source
+    ring size   varint bytes the ring buffer could hold
+    replay      varint byte length, then the INPUT and RANDOM records of the run
+    dropped     varint bytes of records dropped from the start of the ring
+    ring        varint byte length, then the most recent records of the run
+
+Each record is a tag byte followed by its payload:
+
+    0x01 STATEMENT  varint statement index, see tracing.number_statements
+    0x02 INPUT      varint byte length, then the line as read in UTF-8,
+                    including its newline; empty when the input ran out
+    0x03 RANDOM     8 byte little-endian IEEE 754 double
+    0x04 OUTPUT     varint characters written by OUTPUT so far, recorded
+                    before the first statement after the output
+"""
+
+import hashlib
+import struct
+from collections import deque
+
+from cambridgeScript.interpreter.streams import BatchedInputStream
+from cambridgeScript.interpreter.tracing import Tracer, number_statements
+from cambridgeScript.syntax_tree import Program, Statement
+
+MAGIC = b"CSTRACE\0"
+VERSION = 1
+
+STATEMENT = 0x01
+INPUT = 0x02
+RANDOM = 0x03
+OUTPUT = 0x04
+
+# Bytes of records kept in the ring buffer by default
+RING_SIZE = 1 << 20
+# Size of the chunks the ring buffer drops at a time
+CHUNK_SIZE = 1 << 16
+
+_DOUBLE = struct.Struct("<d")
+
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data: bytes, position: int) -> tuple[int, int]:
+    """The varint at position in data and the position after it."""
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def decode_records(data: bytes) -> list[tuple[int, int | float | str]]:
+    """The (tag, payload) records of a replay or ring section."""
+    records = []
+    position = 0
+    while position < len(data):
+        tag = data[position]
+        position += 1
+        if tag == RANDOM:
+            (value,) = _DOUBLE.unpack_from(data, position)
+            position += _DOUBLE.size
+        elif tag == INPUT:
+            length, position = decode_varint(data, position)
+            value = data[position : position + length].decode("utf-8")
+            position += length
+        elif tag in (STATEMENT, OUTPUT):
+            value, position = decode_varint(data, position)
+        else:
+            raise ValueError(f"Unknown trace record {tag:#x}")
+        records.append((tag, value))
+    return records
+
+
+def source_hash(source: str) -> bytes:
+    return hashlib.sha256(source.encode("utf-8")).digest()
+
+
+class Trace:
+    """A trace read back from its binary form."""
+
+    def __init__(
+        self, source: bytes, ring_size: int, replay: bytes, dropped: int, ring: bytes
+    ):
+        self.source = source
+        self.ring_size = ring_size
+        self.replay = replay
+        self.dropped = dropped
+        self.ring = ring
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Trace":
+        if data[: len(MAGIC)] != MAGIC:
+            raise ValueError("Not a pseudocode trace")
+        if data[len(MAGIC)] != VERSION:
+            raise ValueError(f"Unsupported trace version {data[len(MAGIC)]}")
+        position = len(MAGIC) + 1
+        source = data[position : position + 32]
+        ring_size, position = decode_varint(data, position + 32)
+        length, position = decode_varint(data, position)
+        replay = data[position : position + length]
+        dropped, position = decode_varint(data, position + length)
+        length, position = decode_varint(data, position)
+        ring = data[position : position + length]
+        return cls(source, ring_size, replay, dropped, ring)
+
+    @classmethod
+    def load(cls, path: str) -> "Trace":
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    def to_bytes(self) -> bytes:
+        return b"".join(
+            [
+                MAGIC,
+                bytes([VERSION]),
+                self.source,
+                encode_varint(self.ring_size),
+                encode_varint(len(self.replay)),
+                self.replay,
+                encode_varint(self.dropped),
+                encode_varint(len(self.ring)),
+                self.ring,
+            ]
+        )
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+
+class _RecordingInput:
+    def __init__(self, stream, recorder: "TraceRecorder"):
+        self.stream = stream
+        self.recorder = recorder
+
+    def readline(self) -> str:
+        line = self.stream.readline()
+        self.recorder.record_input(line)
+        return line
+
+
+class _RecordingRandom:
+    def __init__(self, source, recorder: "TraceRecorder"):
+        self.source = source
+        self.recorder = recorder
+
+    def random(self) -> float:
+        value = self.source.random()
+        self.recorder.record_random(value)
+        return value
+
+
+class _ReplayRandom:
+    def __init__(self, values: list[float]):
+        self.values = iter(values)
+
+    def random(self) -> float:
+        value = next(self.values, None)
+        if value is None:
+            raise ValueError("The trace has no more RANDOM values to replay")
+        return value
+
+
+class TraceRecorder(Tracer):
+    """Records a run of program in a ring buffer of ring_size bytes."""
+
+    def __init__(self, program: Program, source: str, ring_size: int = RING_SIZE):
+        statements = number_statements(program)
+        self.source = source_hash(source)
+        self.ring_size = ring_size
+        # The encoded STATEMENT record of every statement
+        self.codes = [
+            bytes([STATEMENT]) + encode_varint(i) for i in range(len(statements))
+        ]
+        self.chunk_size = min(CHUNK_SIZE, max(ring_size // 2, 1))
+        self.max_chunks = max(ring_size // self.chunk_size, 1)
+        self.chunks: deque[bytearray] = deque()
+        self.chunk = bytearray()
+        self.dropped = 0
+        self.replay = bytearray()
+        self.output = None
+        self.written = 0
+
+    def install(self, interpreter) -> None:
+        """Record interpreter's statements, input and random numbers."""
+        self.output = interpreter.output_stream
+        interpreter.input_stream = _RecordingInput(interpreter.input_stream, self)
+        interpreter.random = _RecordingRandom(interpreter.random, self)
+        interpreter.add_tracer(self)
+
+    def enter_statement(self, stmt: Statement) -> None:
+        if self.output.written + self.output.buffered != self.written:
+            self.record_output()
+        self.chunk += self.codes[stmt.index]
+        if len(self.chunk) >= self.chunk_size:
+            self.rotate()
+
+    def record_output(self) -> None:
+        self.written = self.output.written + self.output.buffered
+        self.append(bytes([OUTPUT]) + encode_varint(self.written))
+
+    def record_input(self, line: str) -> None:
+        data = line.encode("utf-8")
+        record = bytes([INPUT]) + encode_varint(len(data)) + data
+        self.replay += record
+        self.append(record)
+
+    def record_random(self, value: float) -> None:
+        record = bytes([RANDOM]) + _DOUBLE.pack(value)
+        self.replay += record
+        self.append(record)
+
+    def append(self, record: bytes) -> None:
+        self.chunk += record
+        if len(self.chunk) >= self.chunk_size:
+            self.rotate()
+
+    def rotate(self) -> None:
+        """Start a new chunk, dropping the oldest once the ring is full."""
+        self.chunks.append(self.chunk)
+        self.chunk = bytearray()
+        if len(self.chunks) >= self.max_chunks:
+            self.dropped += len(self.chunks.popleft())
+
+    def trace(self) -> Trace:
+        """The trace of everything recorded so far."""
+        if self.output.written + self.output.buffered != self.written:
+            self.record_output()
+        return Trace(
+            self.source,
+            self.ring_size,
+            bytes(self.replay),
+            self.dropped,
+            b"".join(self.chunks) + self.chunk,
+        )
+
+
+def replay(interpreter, program: Program, source: str, trace: Trace) -> TraceRecorder:
+    """
+    Set interpreter up to run program with the input and RANDOM values of
+    trace. The returned recorder traces the replay for comparison.
+    """
+    if source_hash(source) != trace.source:
+        raise ValueError("The trace was recorded from a different program")
+    records = decode_records(trace.replay)
+    lines = "".join(value for tag, value in records if tag == INPUT)
+    interpreter.input_stream = BatchedInputStream(lines)
+    interpreter.random = _ReplayRandom(
+        [value for tag, value in records if tag == RANDOM]
+    )
+    recorder = TraceRecorder(program, source, trace.ring_size)
+    recorder.install(interpreter)
+    return recorder
+
+
+def divergence(recorded: Trace, replayed: Trace) -> str | None:
+    """Where a replay stopped matching the recorded trace, None if it didn't."""
+    if recorded.replay != replayed.replay:
+        return "The replay used different input or RANDOM values"
+    first = decode_records(recorded.ring)
+    second = decode_records(replayed.ring)
+    if recorded.dropped != replayed.dropped or first != second:
+        # Compare from the end, the most recent records line up
+        for back, (old, new) in enumerate(zip(reversed(first), reversed(second))):
+            if old != new:
+                return f"The replay differs {back + 1} records before the end"
+        return "The replay ran a different number of statements"
+    return None
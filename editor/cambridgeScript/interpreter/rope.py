@@ -0,0 +1,116 @@
+"""
+STRING values built up with & concatenation.
+
+Concatenating onto a plain str copies both sides, so a loop like
+Result <- Result & Char is quadratic. A Rope instead appends the new part to a
+list and only joins the parts when the text is needed: comparisons, OUTPUT,
+SUBSTRING and the other string builtins. LENGTH is tracked as parts are added.
+"""
+
+# Concatenations shorter than this stay plain strings
+ROPE_THRESHOLD = 64
+
+
+class Rope:
+    """
+    A string held as a list of parts.
+
+    Ropes extended from the same value share one parts list, each owns the
+    first count parts. Appending to a rope that is already the end of the list
+    is O(1); appending to an older one copies its parts first.
+    """
+
+    __slots__ = ("parts", "count", "length", "text")
+
+    def __init__(self, parts: list[str], length: int):
+        self.parts = parts
+        self.count = len(parts)
+        self.length = length
+        self.text = None
+
+    def append(self, other) -> "Rope":
+        other = str(other)
+        if self.text is not None and self.count > 1:
+            # Already joined, start a fresh list from the joined text
+            parts = [self.text]
+        elif self.count != len(self.parts):
+            parts = self.parts[: self.count]
+        else:
+            parts = self.parts
+        parts.append(other)
+        return Rope(parts, self.length + len(other))
+
+    def __str__(self) -> str:
+        if self.text is None:
+            parts = self.parts
+            self.text = "".join(
+                parts if self.count == len(parts) else parts[: self.count]
+            )
+        return self.text
+
+    def __repr__(self) -> str:
+        return repr(str(self))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
+    def __getitem__(self, item):
+        return str(self)[item]
+
+    def __add__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) + str(other)
+        return NotImplemented
+
+    def __radd__(self, other):
+        if isinstance(other, str):
+            return other + str(self)
+        return NotImplemented
+
+    def __eq__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) == str(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) != str(other)
+        return NotImplemented
+
+    def __lt__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) < str(other)
+        return NotImplemented
+
+    def __le__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) <= str(other)
+        return NotImplemented
+
+    def __gt__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) > str(other)
+        return NotImplemented
+
+    def __ge__(self, other):
+        if isinstance(other, (str, Rope)):
+            return str(self) >= str(other)
+        return NotImplemented
+
+
+def concat(a, b) -> str | Rope:
+    """a & b, as a Rope once the result is long enough to be worth it."""
+    if type(a) is Rope:
+        return a.append(b)
+    return concat_text(str(a), str(b))
+
+
+def concat_text(a: str, b: str) -> str | Rope:
+    """concat for two strings, without converting them first."""
+    length = len(a) + len(b)
+    if length < ROPE_THRESHOLD:
+        return a + b
+    return Rope([a, b], length)
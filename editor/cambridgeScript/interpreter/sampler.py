@@ -0,0 +1,97 @@
+"""
+Sampling profiler for pseudocode programs.
+
+A timer thread periodically looks at the Python stack of the thread running the
+interpreter and turns it back into the pseudocode call stack: the visitor frames
+for calls give the procedure and function names, the visit_statements frames
+give the line each of them is on. Counts are written in the collapsed-stack
+format flamegraph tools read, one "frame;frame;frame count" per line.
+"""
+
+import sys
+import threading
+from collections import Counter
+
+from cambridgeScript.interpreter.interpreter import Interpreter
+
+_STATEMENTS_CODE = {
+    Interpreter.visit_statements.__code__,
+    Interpreter.visit_traced_statements.__code__,
+}
+_FUNCTION_CODE = Interpreter.visit_function_call.__code__
+_PROCEDURE_CODE = Interpreter.visit_proc_call.__code__
+
+# The stack is read from these local variables of the visitors, fail loudly
+# here rather than sample nothing once one is renamed
+for _code, _local in [(code, "stmt") for code in _STATEMENTS_CODE] + [
+    (_FUNCTION_CODE, "func_call"),
+    (_PROCEDURE_CODE, "stmt"),
+]:
+    if _local not in _code.co_varnames:
+        raise ImportError(f"{_code.co_name} has no local {_local} to sample")
+
+
+def pseudocode_stack(frame) -> list[str]:
+    """The pseudocode call stack, outermost first, of a Python frame."""
+    stack = []
+    line = None
+    while frame is not None:
+        code = frame.f_code
+        if code in _STATEMENTS_CODE:
+            # The innermost block of a subroutine holds its current line
+            if line is None:
+                stmt = frame.f_locals.get("stmt")
+                line = getattr(stmt, "line", None)
+        elif code is _FUNCTION_CODE:
+            func_call = frame.f_locals.get("func_call")
+            if func_call is not None and line is not None:
+                stack.append(f"{func_call.function.token.value}:{line}")
+                line = None
+        elif code is _PROCEDURE_CODE:
+            stmt = frame.f_locals.get("stmt")
+            if stmt is not None and line is not None:
+                stack.append(f"{stmt.name.value}:{line}")
+                line = None
+        frame = frame.f_back
+    if line is not None:
+        stack.append(f"<program>:{line}")
+    stack.reverse()
+    return stack
+
+
+class SamplingProfiler:
+    """Samples the pseudocode call stack of a thread every interval seconds."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self, thread_id: int | None = None) -> None:
+        """Start sampling thread_id, by default the calling thread."""
+        target = thread_id if thread_id is not None else threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(target,), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, target: int) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(target)
+            if frame is None:
+                return
+            stack = pseudocode_stack(frame)
+            if stack:
+                self.samples[";".join(stack)] += 1
+
+    def collapsed(self) -> str:
+        """Samples in collapsed-stack format, most frequent first."""
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.samples.most_common()
+        )
@@ -0,0 +1,87 @@
+"""
+Type-specialized operator implementations for the interpreter's adaptive mode.
+
+A BinaryOp that keeps seeing the same operand types is rewritten to call the
+specialized implementation directly, guarded by an exact type check.
+
+Numbers have no entries: the operator module functions already go straight to
+the int and float slots, and nothing written in Python beats them.
+"""
+
+import operator
+from typing import Callable
+
+from cambridgeScript.constants import Operator
+from cambridgeScript.interpreter.rope import Rope, concat_text
+from cambridgeScript.parser.lexer import Value, char
+
+# Number of failed guards after which a node stays on the generic path
+DEOPT_LIMIT = 8
+
+_TEXT = (str, char)
+_STRINGS = (str, char, Rope)
+_COMPARISONS = (
+    Operator.EQUAL,
+    Operator.NOT_EQUAL,
+    Operator.LESS_EQUAL,
+    Operator.GREAT_EQUAL,
+    Operator.LESS_THAN,
+    Operator.GREATER_THAN,
+)
+
+
+def _compare_text(op: Callable[[str, str], bool]) -> Callable[[Value, Value], bool]:
+    # Join the ropes once and compare as str, instead of going through the
+    # Rope comparison methods and their isinstance checks
+    def compare(a, b):
+        return op(str(a), str(b))
+
+    compare.__name__ = f"{op.__name__}_text"
+    return compare
+
+
+def _concat_converting_right(a: str, b) -> str | Rope:
+    return concat_text(a, str(b))
+
+
+def _concat_converting_left(a, b: str) -> str | Rope:
+    return concat_text(str(a), b)
+
+
+def _build_specializations() -> dict[tuple, Callable[[Value, Value], Value]]:
+    table = {}
+    for op in _COMPARISONS:
+        compare = _compare_text(op)
+        for other in _STRINGS:
+            table[op, Rope, other] = compare
+            table[op, other, Rope] = compare
+    for left in _TEXT:
+        for right in _TEXT:
+            table[Operator.CONCAT, left, right] = concat_text
+        table[Operator.CONCAT, left, Rope] = _concat_converting_right
+        table[Operator.CONCAT, left, int] = _concat_converting_right
+        table[Operator.CONCAT, int, left] = _concat_converting_left
+    for right in _STRINGS + (int,):
+        table[Operator.CONCAT, Rope, right] = Rope.append
+    # True and False are singletons
+    table[Operator.EQUAL, bool, bool] = operator.is_
+    table[Operator.NOT_EQUAL, bool, bool] = operator.is_not
+    return table
+
+
+_SPECIALIZATIONS = _build_specializations()
+
+_OPERATOR_NAMES = {
+    value: name for name, value in vars(Operator).items() if not name.startswith("_")
+}
+
+
+def specialize(
+    op: Callable[[Value, Value], Value], left_type: type, right_type: type
+) -> Callable[[Value, Value], Value] | None:
+    """Return the implementation of op specialized for the operand types."""
+    return _SPECIALIZATIONS.get((op, left_type, right_type))
+
+
+def operator_name(op: Callable) -> str:
+    return _OPERATOR_NAMES.get(op, getattr(op, "__name__", repr(op)))
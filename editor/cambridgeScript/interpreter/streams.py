@@ -0,0 +1,107 @@
+import codecs
+import os
+import sys
+import time
+from typing import Callable
+
+
+def stdout_sink(chunk: str) -> None:
+    sys.stdout.write(chunk)
+    sys.stdout.flush()
+
+
+class BufferedOutputStream:
+    """
+    Output of OUTPUT statements, collected and handed to sink in chunks.
+
+    The buffer is flushed once it holds buffer_size characters, by poll()
+    once flush_interval seconds have passed since the last flush, and whenever
+    flush() is called: before INPUT and at the end of the program. The
+    interpreter polls between statements, every FUEL_CHECK_INTERVAL of them.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[str], None] = stdout_sink,
+        buffer_size: int = 8192,
+        flush_interval: float | None = 0.1,
+    ):
+        self.sink = sink
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.parts: list[str] = []
+        self.buffered = 0
+        # Characters and UTF-8 bytes handed to sink
+        self.written = 0
+        self.written_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def poll(self) -> None:
+        """Flush if anything has waited flush_interval seconds or more."""
+        if (
+            self.parts
+            and self.flush_interval is not None
+            and time.monotonic() - self.last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if self.parts:
+            chunk = "".join(self.parts)
+            self.parts = []
+            self.buffered = 0
+            self.written += len(chunk)
+            self.written_bytes += len(chunk.encode())
+            self.sink(chunk)
+        self.last_flush = time.monotonic()
+
+    def bytes_written(self) -> int:
+        """UTF-8 bytes of all the output so far, buffered or not."""
+        return self.written_bytes + sum(len(part.encode()) for part in self.parts)
+
+
+class BatchedInputStream:
+    """
+    Lines for INPUT served from memory.
+
+    The lines come from text given up front, or are read from a binary file
+    (stdin by default) in chunks of up to chunk_size bytes. readline() returns
+    "" once the input is used up.
+    """
+
+    def __init__(self, text: str | None = None, file=None, chunk_size: int = 65536):
+        self.buffer = text or ""
+        self.position = 0
+        self.fd = None
+        if text is None:
+            self.fd = (file or sys.stdin.buffer).fileno()
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def readline(self) -> str:
+        end = self.buffer.find("\n", self.position)
+        while end < 0 and self.fd is not None:
+            self.fill()
+            end = self.buffer.find("\n", self.position)
+        if end < 0:
+            # Last line without a newline, or nothing left
+            end = len(self.buffer) - 1
+        line = self.buffer[self.position : end + 1]
+        self.position = end + 1
+        return line
+
+    def fill(self) -> None:
+        """Read the next chunk, forgetting the lines already served."""
+        chunk = os.read(self.fd, self.chunk_size)
+        self.buffer = self.buffer[self.position :] + self.decoder.decode(
+            chunk, final=not chunk
+        )
+        self.position = 0
+        if not chunk:
+            self.fd = None
@@ -0,0 +1,139 @@
+from typing import Callable
+
+from cambridgeScript.syntax_tree import (
+    CaseStmt,
+    ForStmt,
+    FunctionDecl,
+    IfStmt,
+    ProcedureDecl,
+    Program,
+    RepeatUntilStmt,
+    Statement,
+    WhileStmt,
+)
+
+
+def blocks(stmt: Statement) -> list[list[Statement]]:
+    """The statement lists nested directly in stmt, in source order."""
+    if isinstance(stmt, IfStmt):
+        return [stmt.then_branch] + (
+            [stmt.else_branch] if stmt.else_branch is not None else []
+        )
+    if isinstance(stmt, CaseStmt):
+        return [body for _, body in stmt.cases] + (
+            [stmt.otherwise] if stmt.otherwise is not None else []
+        )
+    if isinstance(
+        stmt, (ForStmt, WhileStmt, RepeatUntilStmt, ProcedureDecl, FunctionDecl)
+    ):
+        return [stmt.body]
+    return []
+
+
+def number_statements(program: Program) -> list[Statement]:
+    """
+    Give every statement of program its index, in source order, and return
+    them all so statements[stmt.index] is stmt. Tracers use the indexes to
+    keep per-statement data in flat arrays.
+    """
+    statements = []
+    pending = list(reversed(program.statements))
+    while pending:
+        stmt = pending.pop()
+        stmt.index = len(statements)
+        statements.append(stmt)
+        for block in reversed(blocks(stmt)):
+            pending.extend(reversed(block))
+    return statements
+
+
+class Tracer:
+    """
+    Receives execution events from an Interpreter it is installed on with
+    Interpreter.set_tracer() or add_tracer(). Every method does nothing by
+    default.
+    """
+
+    def enter_statement(self, stmt: Statement) -> None:
+        pass
+
+    def exit_statement(self, stmt: Statement) -> None:
+        pass
+
+    def enter_call(self, name: str, line: int) -> None:
+        """A user procedure or function is about to run, called from line."""
+
+    def exit_call(self, name: str) -> None:
+        pass
+
+    def error(self, stmt: Statement, error: Exception) -> None:
+        """stmt raised error, called again for each statement it escapes."""
+
+
+class Tracers(Tracer):
+    """
+    Several tracers installed together. Events entering a statement or call
+    go to them in order, the matching exits and errors in reverse order, so
+    the last tracer's timings are the innermost.
+    """
+
+    def __init__(self, tracers: list[Tracer]):
+        self.tracers = tracers
+
+    def enter_statement(self, stmt: Statement) -> None:
+        for tracer in self.tracers:
+            tracer.enter_statement(stmt)
+
+    def exit_statement(self, stmt: Statement) -> None:
+        for tracer in reversed(self.tracers):
+            tracer.exit_statement(stmt)
+
+    def enter_call(self, name: str, line: int) -> None:
+        for tracer in self.tracers:
+            tracer.enter_call(name, line)
+
+    def exit_call(self, name: str) -> None:
+        for tracer in reversed(self.tracers):
+            tracer.exit_call(name)
+
+    def error(self, stmt: Statement, error: Exception) -> None:
+        for tracer in reversed(self.tracers):
+            tracer.error(stmt, error)
+
+
+class Hooks(Tracer):
+    """
+    A Tracer that calls the callbacks registered for each event:
+    on_statement(stmt), on_call(name, line), on_return(name) and
+    on_error(stmt, error).
+    """
+
+    EVENTS = ("on_statement", "on_call", "on_return", "on_error")
+
+    def __init__(self):
+        self.callbacks: dict[str, list[Callable]] = {event: [] for event in self.EVENTS}
+
+    def add(self, event: str, callback: Callable) -> Callable:
+        if event not in self.callbacks:
+            raise ValueError(f"Unknown event {event}")
+        self.callbacks[event].append(callback)
+        return callback
+
+    def remove(self, event: str, callback: Callable) -> None:
+        self.callbacks[event].remove(callback)
+
+    def enter_statement(self, stmt: Statement) -> None:
+        for callback in self.callbacks["on_statement"]:
+            callback(stmt)
+
+    def enter_call(self, name: str, line: int) -> None:
+        for callback in self.callbacks["on_call"]:
+            callback(name, line)
+
+    def exit_call(self, name: str) -> None:
+        for callback in self.callbacks["on_return"]:
+            callback(name)
+
+    def error(self, stmt: Statement, error: Exception) -> None:
+        for callback in self.callbacks["on_error"]:
+            callback(stmt, error)
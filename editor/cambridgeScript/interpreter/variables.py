@@ -1,70 +1,80 @@
 from dataclasses import dataclass, field
 from typing import Any
-from functools import reduce
 
+from cambridgeScript.interpreter.arrays import PseudoArray
 from cambridgeScript.parser.lexer import Value
 from cambridgeScript.syntax_tree import FunctionDecl, ProcedureDecl
 from cambridgeScript.syntax_tree.types import Type, ArrayType
 
 
+@dataclass(slots=True)
+class Variable:
+    """Storage of one variable, shared by every frame that refers to it."""
+
+    value: PseudoArray | Value | None
+    type: Type
+    # Depth of the call frame the variable belongs to, 0 for globals. What it
+    # holds is charged to that frame, whichever frame writes through it
+    frame: int = 0
+
+
 @dataclass
 class VariableState:
-    variables: dict[str, tuple[list[Value] | Value | None, Type]] = field(
-        default_factory=dict
-    )
+    # Innermost frame, the global frame outside of any call
+    variables: dict[str, Variable] = field(default_factory=dict)
     constants: dict[str, Value] = field(default_factory=dict)
     functions: dict[str, FunctionDecl] = field(default_factory=dict)
     procedures: dict[str, ProcedureDecl] = field(default_factory=dict)
-    variable_stack: list[dict[str, tuple[list[Value] | Value | None, Type]]] = field(
-        default_factory=list
-    )
+    variable_stack: list[dict[str, Variable]] = field(default_factory=list)
+    global_variables: dict[str, Variable] = field(init=False)
+
+    def __post_init__(self):
+        self.global_variables = self.variables
 
     def push_scope(self) -> None:
-        """Push current variable scope onto stack and create new scope."""
-        self.variable_stack.append(self.variables.copy())
-        self.variables = self.variables.copy()
+        """Enter a new local frame linked to the global frame."""
+        self.variable_stack.append(self.variables)
+        self.variables = {}
 
     def pop_scope(self) -> None:
-        """Restore previous variable scope."""
+        """Leave the current local frame."""
         if self.variable_stack:
-            current_scope = self.variables
             self.variables = self.variable_stack.pop()
-            # Update any modified variables in the parent scope
-            for var in self.variables.keys():
-                if var in current_scope:
-                    self.variables[var] = current_scope[var]
 
-    def create_nd_array(
-        self, ranges: list[tuple[int, int]], default: Any = None
-    ) -> list:
-        """Create an n-dimensional array."""
-        if not ranges:
-            return default
-        start, end = ranges[0]
-        # Create array from 0 to size-1, where size matches the range
-        size = end - start + 1
-        return [self.create_nd_array(ranges[1:], default) for _ in range(size)]
+    def lookup(self, name: str) -> Variable | None:
+        """Find a variable in the current frame, then in the global frame."""
+        variable = self.variables.get(name)
+        if variable is None:
+            variable = self.global_variables.get(name)
+        return variable
 
-    def get_array_value(
-        self, name: str, indices: list[int], ranges: list[tuple[int, int]]
-    ) -> Value:
-        """Get value from array at given indices."""
-        # Convert user indices to zero-based indices for internal array access
-        internal_indices = [i - start for i, (start, _) in zip(indices, ranges)]
-        target = reduce(
-            lambda x, i: x[i],
-            internal_indices,
-            self.variables[name][0].copy(),
+    def declare(self, name: str, value: Any, type_: Type) -> Variable:
+        """Create a variable in the current frame."""
+        variable = self.variables[name] = Variable(
+            value, type_, len(self.variable_stack)
         )
-        return target
+        return variable
+
+    def share_array(self, array: PseudoArray) -> None:
+        """Hand out array to one more holder without copying it."""
+        array.shares += 1
+
+    def release_array(self, array: PseudoArray) -> None:
+        """Drop one holder of a shared array."""
+        if array.shares:
+            array.shares -= 1
 
     def set_array_value(
-        self, name: str, indices: list[int], value: Value, ranges: list[tuple[int, int]]
+        self,
+        variable: Variable,
+        indices: list[int],
+        value: Value,
+        line: int | None = None,
     ) -> None:
-        """Set value in array at given indices."""
-        # Convert user indices to zero-based indices for internal array access
-        internal_indices = [i - start for i, (start, _) in zip(indices, ranges)]
-        arrcpy = self.variables[name][0].copy()
-        target = reduce(lambda x, i: x[i], internal_indices[:-1], arrcpy)
-        target[internal_indices[-1]] = value
-        self.variables[name] = (arrcpy, self.variables[name][1])
+        """Set value in the array held by variable at given indices."""
+        array = variable.value
+        if array.shares:
+            # Copy on write, other holders keep the snapshot
+            array.shares -= 1
+            array = variable.value = array.copy()
+        array.set(indices, value, line, variable.frame)
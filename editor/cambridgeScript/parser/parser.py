@@ -17,6 +17,7 @@ from cambridgeScript.syntax_tree import (
     FunctionCall,
     ArrayIndex,
     BinaryOp,
+    LogicalOp,
     UnaryOp,
     # Statements
     Statement,
@@ -24,6 +25,7 @@ from cambridgeScript.syntax_tree import (
     FunctionDecl,
     IfStmt,
     CaseStmt,
+    CaseRange,
     ForStmt,
     RepeatUntilStmt,
     WhileStmt,
@@ -68,10 +70,17 @@ T = TypeVar("T")
 class Parser:
     tokens: list[Token]
     _next_index: int
+    _subroutine_depth: int
+    _by_ref: bool
+    # Number of dimensions of the arrays declared so far in the current scope
+    _array_dims: dict[str, int]
 
     def __init__(self, tokens: list[Token]):
         self.tokens = tokens
         self._next_index = 0
+        self._subroutine_depth = 0
+        self._by_ref = False
+        self._array_dims = {}
 
     @classmethod
     def parse_expression(cls, tokens: list[Token]) -> Expression:
@@ -218,21 +227,27 @@ class Parser:
             pass
         raise _InvalidMatch
 
-    def _parameter(self) -> tuple[IdentifierToken, Type]:
+    def _parameter(self) -> tuple[IdentifierToken, Type, bool]:
         if (
             isinstance(self._peek(), SymbolToken)
             and self._peek().symbol == Symbol.RPAREN
         ):
             return None
+        # BYREF / BYVAL applies to the following parameters until changed
+        if self._match(Keyword.BYREF):
+            self._by_ref = True
+        elif self._match(Keyword.BYVAL):
+            self._by_ref = False
         name: IdentifierToken = self._consume_type(IdentifierToken)  # type: ignore
         self._consume(Symbol.COLON)
         type_ = self._type()
-        return name, type_
+        return name, type_, self._by_ref
 
     def _procedure_header(
         self,
-    ) -> tuple[IdentifierToken, list[tuple[IdentifierToken, Type]] | None]:
+    ) -> tuple[IdentifierToken, list[tuple[IdentifierToken, Type, bool]] | None]:
         name: IdentifierToken = self._consume_type(IdentifierToken)  # type: ignore
+        self._by_ref = False
         if self._match(Symbol.LPAREN):
             if self._match(Symbol.RPAREN):
                 return name, None
@@ -250,10 +265,13 @@ class Parser:
         *,
         delimiter: TokenComparable = Symbol.COMMA,
     ) -> list[T]:
-        # First item
+        # First item, the list is empty only if nothing could be consumed
+        start = self._next_index
         try:
             result = [getter()]
         except (_InvalidMatch, ParserError):
+            if self._next_index != start:
+                raise
             return []
         while self._match(delimiter):
             result.append(getter())
@@ -273,21 +291,29 @@ class Parser:
         self,
         operand_getter: Callable[[], Expression],
         operator_mapping: dict[TokenComparable, Callable[[Value, Value], Value]],
+        node_class: type[BinaryOp | LogicalOp] = BinaryOp,
     ) -> Expression:
         left = operand_getter()
         while op_token := self._match(*operator_mapping):
             op = operator_mapping[op_token]
             right = operand_getter()
-            left = BinaryOp(
+            left = node_class(
                 operator=op,
                 left=left,
                 right=right,
+                line=op_token.line,
             )
         return left
 
     # Statements
 
     def _statement(self) -> Statement:
+        line = self._peek().line
+        statement = self._statement_kind()
+        statement.line = line
+        return statement
+
+    def _statement_kind(self) -> Statement:
         if self._check(Keyword.PROCEDURE):
             return self._procedure_decl()
         elif self._check(Keyword.FUNCTION):
@@ -325,10 +351,28 @@ class Parser:
         else:
             return self._assignment()
 
+    def _subroutine_body(self, end: Keyword, parameters) -> list[Statement]:
+        outer_dims = self._array_dims
+        self._array_dims = dict(outer_dims)
+        for name, type_, _ in parameters or ():
+            self._declare_dims(name.value, type_)
+        self._subroutine_depth += 1
+        try:
+            return self._statements_until(end)
+        finally:
+            self._subroutine_depth -= 1
+            self._array_dims = outer_dims
+
+    def _declare_dims(self, name: str, type_: Type) -> None:
+        if isinstance(type_, ArrayType):
+            self._array_dims[name] = len(type_.ranges)
+        else:
+            self._array_dims.pop(name, None)
+
     def _procedure_decl(self) -> ProcedureDecl:
         self._consume_first(Keyword.PROCEDURE)
         name, parameters = self._procedure_header()
-        body = self._statements_until(Keyword.ENDPROCEDURE)
+        body = self._subroutine_body(Keyword.ENDPROCEDURE, parameters)
         return ProcedureDecl(name, parameters, body)
 
     def _function_decl(self) -> FunctionDecl:
@@ -336,7 +380,7 @@ class Parser:
         name, parameters = self._procedure_header()
         self._consume(Keyword.RETURNS)
         type_ = self._type()
-        body = self._statements_until(Keyword.ENDFUNCTION)
+        body = self._subroutine_body(Keyword.ENDFUNCTION, parameters)
         return FunctionDecl(name, parameters, type_, body)
 
     def _if_stmt(self) -> IfStmt:
@@ -369,19 +413,36 @@ class Parser:
             if self._check(Keyword.ENDCASE):
                 self._advance()
                 break
-            case = self._expression()
+            case = self._case_label()
             self._consume(Symbol.COLON)
-            while True:
-                index = self._next_index
-                try:
-                    body.append(self._statement())
-                except:
-                    self._next_index = index
-                    break
+            # The body runs up to the next label, OTHERWISE or ENDCASE
+            while not (
+                self._check(Keyword.OTHERWISE)
+                or self._check(Keyword.ENDCASE)
+                or self._at_case_label()
+            ):
+                body.append(self._statement())
             cases.append(case)
             bodies.append(body)
         return CaseStmt(identifier, list(zip(cases, bodies)), otherwise)
 
+    def _case_label(self) -> Expression | CaseRange:
+        low = self._expression()
+        if self._match(Keyword.TO):
+            return CaseRange(low, self._expression())
+        return low
+
+    def _at_case_label(self) -> bool:
+        """Whether the next tokens are a CASE label and a colon, consumes nothing."""
+        index = self._next_index
+        try:
+            self._case_label()
+            return bool(self._check(Symbol.COLON))
+        except ParserError:
+            return False
+        finally:
+            self._next_index = index
+
     def _for_loop(self) -> ForStmt:
         self._consume_first(Keyword.FOR)
         identifier = self._assignable()
@@ -429,6 +490,7 @@ class Parser:
         # names.append(name)
         self._consume(Symbol.COLON)
         type_ = self._type()
+        self._declare_dims(name.value, type_)
         return VariableDecl(name, type_)
 
     def _declare_constant(self) -> ConstantDecl:
@@ -449,7 +511,13 @@ class Parser:
         return OutputStmt(values)
 
     def _return(self) -> ReturnStmt:
-        self._consume_first(Keyword.RETURN)
+        token = self._consume_first(Keyword.RETURN)
+        if not self._subroutine_depth:
+            raise ParserError(
+                "RETURN is only allowed inside a procedure or function",
+                self.origin,
+                token.line,
+            )
         expr = self._expression()
         return ReturnStmt(expr)
 
@@ -457,7 +525,7 @@ class Parser:
         self._consume_first(Keyword.OPENFILE)
         file: LiteralToken = self._consume_type(LiteralToken)  # type: ignore
         self._consume(Keyword.FOR)
-        if self._peek() not in [Keyword.READ, Keyword.WRITE]:
+        if self._peek() not in [Keyword.READ, Keyword.WRITE, Keyword.APPEND]:
             raise UnexpectedToken(
                 "File mode", self._peek(), self.origin, self._peek().line
             )
@@ -515,18 +583,10 @@ class Parser:
         return result
 
     def _logic_or(self) -> Expression:
-        return self._binary_op(self._logic_and, {Keyword.OR: Operator.OR})
+        return self._binary_op(self._logic_and, {Keyword.OR: Operator.OR}, LogicalOp)
 
     def _logic_and(self) -> Expression:
-        left = self._logic_not()
-        while self._match(Keyword.AND):
-            right = self._logic_not()
-            left = BinaryOp(
-                operator=Operator.AND,
-                left=left,
-                right=right,
-            )
-        return left
+        return self._binary_op(self._logic_not, {Keyword.AND: Operator.AND}, LogicalOp)
 
     def _logic_not(self) -> Expression:
         if not self._match(Keyword.NOT):
@@ -579,9 +639,22 @@ class Parser:
                 ast_class = ArrayIndex
             arg_list = self._match_multiple(self._expression)
             self._consume(end_type)
+            if ast_class is ArrayIndex and isinstance(left, Identifier):
+                self._check_dims(left.token, len(arg_list))
             left = ast_class(left, arg_list)
         return left
 
+    def _check_dims(self, name: IdentifierToken, count: int) -> None:
+        # Arrays declared later, e.g. globals used by a procedure, are checked at runtime
+        dims = self._array_dims.get(name.value)
+        if dims is not None and dims != count:
+            raise ParserError(
+                f"Array {name.value} has {dims} dimension(s), but {count} "
+                f"index(es) were given",
+                self.origin,
+                name.line,
+            )
+
     def _primary(self) -> Expression:
         if self._match(Symbol.LPAREN):
             res = self._expression()
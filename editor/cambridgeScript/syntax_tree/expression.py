@@ -2,6 +2,7 @@ __all__ = [
     "Expression",
     "Assignable",
     "BinaryOp",
+    "LogicalOp",
     "UnaryOp",
     "FunctionCall",
     "ArrayIndex",
@@ -10,7 +11,7 @@ __all__ = [
 ]
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Callable, Any, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -30,11 +31,35 @@ class BinaryOp(Expression):
     operator: Callable[[Value, Value], Value]
     left: Expression
     right: Expression
+    line: int | None = field(default=None, compare=False)
+    # Inline cache used by the interpreter's adaptive mode
+    guard: tuple[type, type] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    specialized: Callable[[Value, Value], Value] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    hits: int = field(default=0, init=False, repr=False, compare=False)
+    misses: int = field(default=0, init=False, repr=False, compare=False)
+    # Stays on the generic path: too many misses, or types that never specialize
+    gave_up: bool = field(default=False, init=False, repr=False, compare=False)
 
     def accept(self, visitor: "ExpressionVisitor") -> Any:
         return visitor.visit_binary_op(self)
 
 
+@dataclass
+class LogicalOp(Expression):
+    # AND / OR, the right operand is only evaluated when it decides the result
+    operator: Callable[[Value, Value], Value]
+    left: Expression
+    right: Expression
+    line: int | None = field(default=None, compare=False)
+
+    def accept(self, visitor: "ExpressionVisitor") -> Any:
+        return visitor.visit_logical_op(self)
+
+
 @dataclass
 class UnaryOp(Expression):
     operator: Callable[[Value], Value]
@@ -48,6 +73,11 @@ class UnaryOp(Expression):
 class FunctionCall(Expression):
     function: Expression
     params: list[Expression]
+    # Call-site cache, valid while `version` matches the interpreter's
+    target: Any = field(default=None, init=False, repr=False, compare=False)
+    bindings: tuple | None = field(default=None, init=False, repr=False, compare=False)
+    memo: Any = field(default=None, init=False, repr=False, compare=False)
+    version: int = field(default=-1, init=False, repr=False, compare=False)
 
     def accept(self, visitor: "ExpressionVisitor") -> Any:
         return visitor.visit_function_call(self)
@@ -77,4 +107,5 @@ class Identifier(Expression):
     def accept(self, visitor: "ExpressionVisitor") -> Any:
         return visitor.visit_identifier(self)
 
+
 Assignable = ArrayIndex | Identifier
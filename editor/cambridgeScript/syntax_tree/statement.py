@@ -4,6 +4,7 @@ __all__ = [
     "FunctionDecl",
     "IfStmt",
     "CaseStmt",
+    "CaseRange",
     "ForStmt",
     "RepeatUntilStmt",
     "WhileStmt",
@@ -23,7 +24,7 @@ __all__ = [
 ]
 
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -35,6 +36,11 @@ from cambridgeScript.syntax_tree.types import Type
 
 
 class Statement(ABC):
+    # Source line the statement starts on, set by the parser
+    line: int | None = None
+    # Position in the program, set by interpreter.tracing.number_statements
+    index: int | None = None
+
     @abstractmethod
     def accept(self, visitor: "StatementVisitor") -> Any:
         pass
@@ -43,7 +49,8 @@ class Statement(ABC):
 @dataclass
 class ProcedureDecl(Statement):
     name: IdentifierToken
-    params: list[tuple[IdentifierToken, "Type"]] | None
+    # (name, type, passed by reference)
+    params: list[tuple[IdentifierToken, "Type", bool]] | None
     body: list[Statement]
 
     def accept(self, visitor: "StatementVisitor") -> Any:
@@ -53,7 +60,7 @@ class ProcedureDecl(Statement):
 @dataclass
 class FunctionDecl(Statement):
     name: IdentifierToken
-    params: list[tuple[IdentifierToken, Type]] | None
+    params: list[tuple[IdentifierToken, Type, bool]] | None
     return_type: Type
     body: list[Statement]
 
@@ -71,11 +78,21 @@ class IfStmt(Statement):
         return visitor.visit_if(self)
 
 
+@dataclass
+class CaseRange:
+    """A CASE label low TO high, matching values from low to high inclusive."""
+
+    low: Expression
+    high: Expression
+
+
 @dataclass
 class CaseStmt(Statement):
     expr: Expression
-    cases: list[tuple[IdentifierToken | LiteralToken, list[Statement]]]
+    cases: list[tuple[Expression | CaseRange, list[Statement]]]
     otherwise: Statement | None
+    # Label value -> body, built on first execution when every label is constant
+    jump_table: dict | None = field(default=None, init=False, repr=False, compare=False)
 
     def accept(self, visitor: "StatementVisitor") -> Any:
         return visitor.visit_case(self)
@@ -193,6 +210,12 @@ class FileCloseStmt(Statement):
 class ProcedureCallStmt(Statement):
     name: IdentifierToken
     args: list[Expression] | None
+    # Call-site cache, valid while `version` matches the interpreter's
+    target: ProcedureDecl | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    bindings: tuple | None = field(default=None, init=False, repr=False, compare=False)
+    version: int = field(default=-1, init=False, repr=False, compare=False)
 
     def accept(self, visitor: "StatementVisitor") -> Any:
         return visitor.visit_proc_call(self)
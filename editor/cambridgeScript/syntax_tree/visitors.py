@@ -18,6 +18,10 @@ class ExpressionVisitor(ABC):
     def visit_binary_op(self, expr: BinaryOp) -> Any:
         pass
 
+    @abstractmethod
+    def visit_logical_op(self, expr: LogicalOp) -> Any:
+        pass
+
     @abstractmethod
     def visit_unary_op(self, expr: UnaryOp) -> Any:
         pass
@@ -0,0 +1,30 @@
+from cambridgeScript.interpreter.interpreter import Interpreter
+from cambridgeScript.interpreter.streams import BatchedInputStream, BufferedOutputStream
+from cambridgeScript.interpreter.variables import VariableState
+from cambridgeScript.parser.lexer import parse_tokens
+from cambridgeScript.parser.parser import Parser
+
+
+def parse(source: str):
+    return Parser.parse_program(parse_tokens(source), source)
+
+
+def interpreter_for(source: str, inputs: str = "", **options):
+    """An interpreter for source whose output is collected in .output."""
+    output: list[str] = []
+    interpreter = Interpreter(
+        VariableState(),
+        source,
+        BatchedInputStream(inputs),
+        output_stream=BufferedOutputStream(output.append),
+        **options,
+    )
+    interpreter.output = output
+    return interpreter
+
+
+def run(source: str, inputs: str = "", **options) -> str:
+    """Run source and return everything it output."""
+    interpreter = interpreter_for(source, inputs, **options)
+    interpreter.visit(parse(source))
+    return "".join(interpreter.output)
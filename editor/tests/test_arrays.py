@@ -0,0 +1,142 @@
+import pytest
+
+from cambridgeScript.exceptions import (
+    InterpreterError,
+    ParserError,
+    PseudoIndexError,
+)
+from cambridgeScript.interpreter.arrays import (
+    SPARSE_STR_CELLS,
+    SparsePseudoArray,
+    new_array,
+)
+from cambridgeScript.syntax_tree.types import PrimitiveType
+from helpers import parse, run
+
+GRID = """DECLARE G : ARRAY[0:2, 5:7] OF INTEGER
+DECLARE I : INTEGER
+DECLARE J : INTEGER
+FOR I <- 0 TO 2
+    FOR J <- 5 TO 7
+        G[I, J] <- I * 10 + J
+    NEXT J
+NEXT I
+"""
+
+
+def test_elements_are_addressed_by_their_declared_bounds():
+    assert run(GRID + 'OUTPUT G[0, 5], " ", G[2, 7], " ", G[1, 6]\n') == "5 27 16\n"
+
+
+@pytest.mark.parametrize(
+    "access", ["G[3, 5]", "G[0, 4]", "G[-1, 5]", "G[0, 8]", "G[0.5, 5]"]
+)
+def test_out_of_bounds_reads(access):
+    with pytest.raises(PseudoIndexError) as error:
+        run(GRID + f"OUTPUT {access}\n")
+    assert error.value.ranges == [(0, 2), (5, 7)]
+    assert error.value.line == 9
+
+
+@pytest.mark.parametrize("backend", ["array", "list"])
+def test_out_of_bounds_writes(backend):
+    source = "DECLARE A : ARRAY[1:3] OF INTEGER\nA[4] <- 1\n"
+    with pytest.raises(PseudoIndexError, match=r"range of \[\(1, 3\)\]"):
+        run(source, array_backend=backend)
+
+
+def test_negative_indices_dont_wrap_around():
+    source = "DECLARE A : ARRAY[1:3] OF INTEGER\nA[3] <- 1\nOUTPUT A[0]\n"
+    with pytest.raises(PseudoIndexError):
+        run(source)
+
+
+def test_unassigned_elements_have_no_value():
+    source = "DECLARE A : ARRAY[1:3] OF REAL\nA[1] <- 1\nOUTPUT A[2]\n"
+    with pytest.raises(InterpreterError, match=r"A\[2\] has no value"):
+        run(source)
+
+
+def test_huge_arrays_are_sparse():
+    array = new_array([(1, 1000000), (1, 1000)], PrimitiveType.INTEGER)
+    assert isinstance(array, SparsePseudoArray)
+    assert len(array) == 1000000000
+
+
+def test_sparse_array_prints_only_written_cells():
+    source = """DECLARE Big : ARRAY[1:1000000, 1:1000] OF INTEGER
+Big[2000, 2] <- 2
+Big[1000, 1] <- 1
+OUTPUT Big
+"""
+    assert run(source) == (
+        "{[1000, 1]: 1, [2000, 2]: 2} (2 of 1000000000 elements set)\n"
+    )
+
+
+def test_sparse_array_printing_is_limited():
+    array = SparsePseudoArray([(0, 10**7)])
+    for i in range(SPARSE_STR_CELLS + 5):
+        array.set([i], i)
+    text = str(array)
+    assert text.count(":") == SPARSE_STR_CELLS
+    assert text.endswith(f", ...}} ({SPARSE_STR_CELLS + 5} of 10000001 elements set)")
+
+
+def test_sparse_array_values_are_lazy():
+    array = SparsePseudoArray([(1, 10**9)])
+    array.set([2], 5)
+    values = array.values()
+    assert [next(values), next(values)] == [None, 5]
+    with pytest.raises(ValueError):
+        array.to_list()
+
+
+def test_wrong_number_of_indices_is_a_parse_error():
+    source = "DECLARE A : ARRAY[1:3, 1:3] OF INTEGER\nA[1] <- 2\n"
+    with pytest.raises(ParserError, match="2 dimension") as error:
+        parse(source)
+    assert error.value.line == 2
+
+
+@pytest.mark.parametrize(
+    "use",
+    [
+        "OUTPUT A[1]",
+        "OUTPUT 1, A[1, 2, 3]",
+        "CALL P(A[1])",
+        "B <- LENGTH(A[1])",
+    ],
+)
+def test_wrong_number_of_indices_in_lists(use):
+    # OUTPUT values and arguments used to swallow the error
+    source = f"""DECLARE A : ARRAY[1:3, 1:3] OF INTEGER
+DECLARE B : INTEGER
+PROCEDURE P(X : INTEGER)
+ENDPROCEDURE
+{use}
+"""
+    with pytest.raises(ParserError, match="2 dimension"):
+        parse(source)
+
+
+def test_array_parameters_have_their_declared_dimensions():
+    source = """PROCEDURE P(V : ARRAY[1:3] OF INTEGER)
+    OUTPUT V[1, 2]
+ENDPROCEDURE
+"""
+    with pytest.raises(ParserError, match="1 dimension"):
+        parse(source)
+
+
+def test_arrays_declared_later_are_checked_at_runtime():
+    source = """PROCEDURE P()
+    OUTPUT G[1]
+ENDPROCEDURE
+DECLARE G : ARRAY[1:2, 1:2] OF INTEGER
+CALL P()
+"""
+    parse(source)
+    with pytest.raises(PseudoIndexError) as error:
+        run(source)
+    assert error.value.line == 2
@@ -0,0 +1,62 @@
+from helpers import interpreter_for, parse, run
+
+REDEFINED = """FUNCTION Value() RETURNS INTEGER
+    RETURN 1
+ENDFUNCTION
+PROCEDURE Greet()
+    OUTPUT "hello"
+ENDPROCEDURE
+PROCEDURE Show()
+    OUTPUT Value()
+    CALL Greet()
+ENDPROCEDURE
+CALL Show()
+FUNCTION Value() RETURNS INTEGER
+    RETURN 2
+ENDFUNCTION
+PROCEDURE Greet()
+    OUTPUT "bye"
+ENDPROCEDURE
+CALL Show()
+"""
+
+
+def test_redefining_a_subroutine_invalidates_cached_call_sites():
+    assert run(REDEFINED) == "1\nhello\n2\nbye\n"
+
+
+def test_call_sites_are_cached_between_redefinitions():
+    source = """FUNCTION Value() RETURNS INTEGER
+    RETURN 1
+ENDFUNCTION
+DECLARE I : INTEGER
+DECLARE Total : INTEGER
+Total <- 0
+FOR I <- 1 TO 3
+    Total <- Total + Value()
+NEXT I
+"""
+    interpreter = interpreter_for(source)
+    program = parse(source)
+    interpreter.visit(program)
+    call = program.statements[-1].body[0].value.right
+    assert call.version == interpreter.subroutines_version
+    assert call.target is interpreter.variable_state.functions["Value"]
+
+
+def test_a_program_run_again_uses_the_new_interpreters_subroutines():
+    source = """FUNCTION Value() RETURNS INTEGER
+    RETURN 1
+ENDFUNCTION
+OUTPUT Value()
+"""
+    program = parse(source)
+    first = interpreter_for(source)
+    first.visit(program)
+    second = interpreter_for(source)
+    second.visit(program)
+    # Each interpreter has its own version, so the call site is resolved again
+    assert first.subroutines_version != second.subroutines_version
+    call = program.statements[-1].values[0]
+    assert call.version == second.subroutines_version
+    assert second.output == ["1\n"]
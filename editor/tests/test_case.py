@@ -0,0 +1,120 @@
+import pytest
+
+from cambridgeScript.interpreter.interpreter import MAX_JUMP_TABLE_RANGE, _NO_JUMP_TABLE
+from cambridgeScript.syntax_tree import CaseRange, CaseStmt
+from helpers import interpreter_for, parse
+
+GRADES = """CONSTANT Pass <- 50
+DECLARE Mark : INTEGER
+DECLARE I : INTEGER
+FOR I <- 1 TO 6
+    INPUT Mark
+    CASE OF Mark
+        100 : OUTPUT "full"
+        Pass : OUTPUT "pass"
+        70 TO 99 : OUTPUT "merit"
+        60 TO 75 : OUTPUT "overlap"
+        OTHERWISE : OUTPUT "other"
+    ENDCASE
+NEXT I
+"""
+
+
+def run_case(source, inputs=""):
+    """Output of source and its CASE statement after running it."""
+    interpreter = interpreter_for(source, inputs)
+    program = parse(source)
+    interpreter.visit(program)
+    (stmt,) = [s for s in walk(program.statements) if isinstance(s, CaseStmt)]
+    return "".join(interpreter.output), stmt
+
+
+def walk(statements):
+    for stmt in statements:
+        yield stmt
+        for body in getattr(stmt, "body", None), getattr(stmt, "otherwise", None):
+            if isinstance(body, list):
+                yield from walk(body)
+
+
+def test_ranges_parse():
+    stmt = parse(GRADES).statements[3].body[1]
+    low, high = stmt.cases[2][0].low, stmt.cases[2][0].high
+    assert isinstance(stmt.cases[2][0], CaseRange)
+    assert (low.token.value, high.token.value) == (70, 99)
+
+
+def test_constant_labels_use_the_jump_table():
+    output, stmt = run_case(GRADES, "100\n50\n72\n99\n65\n49\n")
+    assert output == "full\npass\nmerit\nmerit\noverlap\nother\n"
+    assert stmt.jump_table is not _NO_JUMP_TABLE
+    # Overlapping ranges keep the first label, as the linear scan does
+    assert stmt.jump_table[70] is stmt.cases[2][1]
+    assert stmt.jump_table[60] is stmt.cases[3][1]
+    assert stmt.jump_table[50] is stmt.cases[1][1]
+
+
+def test_reals_inside_a_range_still_match():
+    source = """DECLARE X : REAL
+X <- 1.5
+CASE OF X
+    0 : OUTPUT "zero"
+    1 TO 2 : OUTPUT "one to two"
+    OTHERWISE : OUTPUT "other"
+ENDCASE
+"""
+    output, stmt = run_case(source)
+    assert output == "one to two\n"
+    assert stmt.jump_table is not _NO_JUMP_TABLE
+
+
+@pytest.mark.parametrize(
+    "labels",
+    [
+        # A variable label is only known while running
+        'Low : OUTPUT "low"\n    "m" : OUTPUT "m"',
+        # Characters have no integer range to expand
+        '"a" TO "c" : OUTPUT "low"\n    "m" : OUTPUT "m"',
+        # A range whose ends are variables
+        'Low TO Low : OUTPUT "low"\n    "m" : OUTPUT "m"',
+    ],
+)
+def test_labels_that_cant_be_tabled_are_scanned(labels):
+    source = f"""DECLARE Low : STRING
+DECLARE X : STRING
+Low <- "a"
+INPUT X
+CASE OF X
+    {labels}
+    OTHERWISE : OUTPUT "other"
+ENDCASE
+"""
+    outputs = []
+    for value in "a", "m", "z":
+        output, stmt = run_case(source, value + "\n")
+        assert stmt.jump_table is _NO_JUMP_TABLE
+        outputs.append(output)
+    assert outputs == ["low\n", "m\n", "other\n"]
+
+
+def test_wide_ranges_are_scanned():
+    source = f"""DECLARE X : INTEGER
+X <- {MAX_JUMP_TABLE_RANGE + 5}
+CASE OF X
+    1 TO {MAX_JUMP_TABLE_RANGE + 10} : OUTPUT "in"
+ENDCASE
+"""
+    output, stmt = run_case(source)
+    assert output == "in\n" and stmt.jump_table is _NO_JUMP_TABLE
+
+
+def test_missing_value_without_otherwise_does_nothing():
+    source = """DECLARE X : INTEGER
+X <- 3
+CASE OF X
+    1 : OUTPUT "one"
+    4 TO 6 : OUTPUT "four to six"
+ENDCASE
+OUTPUT "done"
+"""
+    assert run_case(source)[0] == "done\n"
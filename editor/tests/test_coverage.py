@@ -0,0 +1,101 @@
+import pytest
+
+from cambridgeScript.interpreter.coverage import Coverage, annotate, merge
+from helpers import interpreter_for, parse
+
+GRADE = """DECLARE Mark : INTEGER
+DECLARE I : INTEGER
+INPUT Mark
+IF Mark >= 50 THEN
+    OUTPUT "pass"
+ELSE
+    OUTPUT "fail"
+ENDIF
+FOR I <- 1 TO Mark
+    OUTPUT I
+NEXT I
+"""
+
+
+def cover(source: str, inputs: str = "") -> dict:
+    program = parse(source)
+    interpreter = interpreter_for(source, inputs)
+    coverage = Coverage(program, source)
+    interpreter.add_tracer(coverage)
+    interpreter.visit(program)
+    return coverage.to_json()
+
+
+def outcomes(report: dict, line: int) -> list[tuple[str, int]]:
+    (branch,) = [branch for branch in report["branches"] if branch["line"] == line]
+    return [(outcome["label"], outcome["hit"]) for outcome in branch["outcomes"]]
+
+
+def test_lines_and_branches_are_recorded():
+    report = cover(GRADE, "1\n")
+    assert report["lines"]["5"] == 0 and report["lines"]["7"] == 1
+    assert outcomes(report, 4) == [("THEN", 0), ("ELSE", 1)]
+    assert outcomes(report, 9) == [
+        ("0 iterations", 0),
+        ("1 iteration", 1),
+        ("2+ iterations", 0),
+    ]
+    assert report["summary"]["branches"] == [2, 5]
+
+
+def test_case_labels_are_told_apart_by_position():
+    source = """DECLARE X : STRING
+X <- "1"
+CASE OF X
+    1 : OUTPUT "number"
+    "1" : OUTPUT "text"
+    "1" : OUTPUT "duplicate"
+    "OTHERWISE" : OUTPUT "word"
+    OTHERWISE : OUTPUT "other"
+ENDCASE
+"""
+    assert outcomes(cover(source), 3) == [
+        ("1", 0),
+        ('"1"', 1),
+        ('"1"', 0),
+        ('"OTHERWISE"', 0),
+        ("OTHERWISE", 0),
+    ]
+
+
+def test_case_ranges_are_named_by_their_ends():
+    source = """DECLARE X : INTEGER
+X <- 7
+CASE OF X
+    1 TO 5 : OUTPUT "low"
+    6 TO X : OUTPUT "high"
+ENDCASE
+"""
+    assert outcomes(cover(source), 3) == [
+        ("1 TO 5", 0),
+        ("6 TO X", 1),
+        ("OTHERWISE", 0),
+    ]
+
+
+def test_merge_combines_runs():
+    report = merge(cover(GRADE, "1\n"), cover(GRADE, "60\n"))
+    assert report["runs"] == 2
+    assert report["lines"]["5"] == 1
+    assert outcomes(report, 4) == [("THEN", 1), ("ELSE", 1)]
+    assert outcomes(report, 9)[2] == ("2+ iterations", 1)
+    assert report["summary"]["branches"] == [4, 5]
+
+
+def test_merge_rejects_other_programs():
+    with pytest.raises(ValueError):
+        merge(cover(GRADE, "1\n"), cover('OUTPUT "hi"\n'))
+
+
+def test_annotate_marks_lines_and_missed_outcomes():
+    report = cover(GRADE, "1\n")
+    rows = annotate(report, GRADE.splitlines()).splitlines()
+    assert rows[3].startswith("~    4") and rows[3].endswith("# missed: THEN")
+    assert rows[4].startswith("!    5")
+    assert rows[6].startswith(">    7")
+    assert rows[-1] == "1 run(s): lines 7/8, branch outcomes 2/5"
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from cambridgeScript.exceptions import PseudoFileError
+from cambridgeScript.interpreter.files import VirtualFileSystem
+from helpers import run
+
+
+def read_all(name: str) -> str:
+    return f"""DECLARE Line : STRING
+OPENFILE "{name}" FOR READ
+WHILE NOT EOF("{name}") DO
+    READFILE "{name}", Line
+    OUTPUT Line
+ENDWHILE
+CLOSEFILE "{name}"
+"""
+
+
+def test_read_lines_from_disk(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("één\ntwo\n", encoding="utf-8")
+    assert run(read_all(str(path))) == "één\ntwo\n"
+
+
+def test_reading_a_file_that_is_not_utf8(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_bytes(b"fine\n\xff\xfe broken\n")
+    with pytest.raises(PseudoFileError, match="not UTF-8") as error:
+        run(read_all(str(path)))
+    assert error.value.line == 4
+
+
+def test_read_lines_from_a_virtual_file_system():
+    filesystem = VirtualFileSystem({"data.txt": "a\nb\n"})
+    assert run(read_all("/data.txt"), filesystem=filesystem) == "a\nb\n"
+
+
+@pytest.mark.parametrize(
+    "text", ["", "\n", "a\r\nb", "a\x0bb\x0cc\x1cd e\n", "a\rb\n\n"]
+)
+def test_virtual_files_split_lines_like_disk_files(tmp_path, text):
+    path = tmp_path / "data.txt"
+    path.write_bytes(text.encode("utf-8"))
+    filesystem = VirtualFileSystem({"data.txt": text})
+    on_disk = run(read_all(str(path)))
+    assert run(read_all("data.txt"), filesystem=filesystem) == on_disk
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        b'{"data.txt": "\xff"}',
+        b"not json",
+        b'["data.txt"]',
+        b'{"data.txt": 3}',
+    ],
+)
+def test_loading_a_bad_virtual_file_system(tmp_path, content):
+    path = tmp_path / "files.json"
+    path.write_bytes(content)
+    with pytest.raises(PseudoFileError):
+        VirtualFileSystem.load(str(path))
+
+
+def test_loading_more_than_the_capacity(tmp_path):
+    path = tmp_path / "files.json"
+    path.write_text(json.dumps({"data.txt": "x" * 100}))
+    with pytest.raises(PseudoFileError, match="No space"):
+        VirtualFileSystem.load(str(path), capacity=10)
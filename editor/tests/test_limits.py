@@ -0,0 +1,143 @@
+import argparse
+import math
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cambridgeScript.exceptions import PseudoLimitError
+from cambridgeScript.interpreter import interpreter as interpreter_module
+from cambridgeScript.interpreter.interpreter import MAX_CALL_DEPTH
+from cambridgeScript.interpreter.profiler import Profiler
+from helpers import interpreter_for, parse, run
+
+EDITOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOOP = """DECLARE i : INTEGER
+i <- 0
+WHILE TRUE DO
+    i <- i + 1
+ENDWHILE
+"""
+
+
+def test_fuel_stops_an_infinite_loop():
+    with pytest.raises(PseudoLimitError, match="Ran out of fuel after 1000 statements"):
+        run(LOOP, fuel=1000)
+
+
+def test_timeout_stops_an_infinite_loop():
+    with pytest.raises(PseudoLimitError, match="Time limit"):
+        run(LOOP, timeout=0.05)
+
+
+def test_fuel_is_enough_for_a_short_program():
+    assert run('OUTPUT "hi"\n', fuel=10) == "hi\n"
+
+
+@pytest.mark.parametrize("name", ["fuel", "timeout", "memory_limit"])
+@pytest.mark.parametrize("value", [0, -5, math.nan, math.inf])
+def test_interpreter_rejects_limits_that_are_not_positive(name, value):
+    with pytest.raises(ValueError):
+        run('OUTPUT "hi"\n', **{name: value})
+
+
+@pytest.mark.parametrize("text", ["nan", "inf", "-5", "0", "ten"])
+def test_cli_rejects_limits_that_are_not_positive(text):
+    from cambridgeScript.__main__ import positive
+
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive(float)(text)
+
+
+def test_cli_accepts_positive_limits():
+    from cambridgeScript.__main__ import positive
+
+    assert positive(int)("50") == 50
+    assert positive(float)("0.5") == 0.5
+
+
+@pytest.mark.parametrize(
+    "flag", ["--output-buffer", "--sample-interval", "--record-size", "--vfs-size"]
+)
+@pytest.mark.parametrize("text", ["0", "-1"])
+def test_cli_rejects_sizes_that_are_not_positive(tmp_path, flag, text):
+    program = tmp_path / "program.p"
+    program.write_text('OUTPUT "hi"\n')
+    result = subprocess.run(
+        [sys.executable, os.path.join(EDITOR, "cambridgeScript"), str(program)]
+        + [f"{flag}={text}"],
+        capture_output=True,
+        text=True,
+        timeout=30,
+    )
+    assert result.returncode == 2
+    assert f"argument {flag}: must be a positive number" in result.stderr
+
+
+@pytest.mark.parametrize(
+    "value", [None, "", "nan", "NaN", math.nan, math.inf, -5, 0, "ten", [], {}]
+)
+def test_webserver_falls_back_to_the_maximum(value):
+    webserver = pytest.importorskip("webserver")
+    assert webserver.client_limit(value, 10.0, float) == 10.0
+    assert webserver.client_limit(value, 100, int) == 100
+
+
+def test_webserver_clamps_to_the_maximum():
+    webserver = pytest.importorskip("webserver")
+    assert webserver.client_limit("5", 10.0, float) == 5.0
+    assert webserver.client_limit(50, 10.0, float) == 10.0
+    assert webserver.run_limits({"fuel": 10, "timeout": "nan", "memory": -1}) == [
+        "--fuel",
+        "10",
+        "--timeout",
+        str(webserver.MAX_TIMEOUT),
+        "--memory-limit",
+        str(webserver.MAX_MEMORY),
+    ]
+
+
+def depth(n: int) -> str:
+    return f"""FUNCTION D(N : INTEGER) RETURNS INTEGER
+    IF N = 0 THEN
+        RETURN 0
+    ENDIF
+    RETURN 1 + D(N - 1)
+ENDFUNCTION
+OUTPUT D({n})
+"""
+
+
+def test_deep_recursion_runs():
+    assert run(depth(MAX_CALL_DEPTH - 1)) == f"{MAX_CALL_DEPTH - 1}\n"
+
+
+def test_deep_recursion_runs_traced():
+    interpreter = interpreter_for(depth(MAX_CALL_DEPTH - 1))
+    interpreter.add_tracer(Profiler())
+    interpreter.visit(parse(depth(MAX_CALL_DEPTH - 1)))
+    assert interpreter.output == [f"{MAX_CALL_DEPTH - 1}\n"]
+
+
+def test_runaway_recursion_is_a_limit_error():
+    source = """PROCEDURE Forever(N : INTEGER)
+    CALL Forever(N + 1)
+ENDPROCEDURE
+CALL Forever(1)
+"""
+    recursion_limit = sys.getrecursionlimit()
+    with pytest.raises(PseudoLimitError, match="nested more than") as error:
+        run(source)
+    assert error.value.line == 2
+    assert sys.getrecursionlimit() == recursion_limit
+
+
+def test_python_recursion_errors_become_limit_errors(monkeypatch):
+    # Without room on the Python stack, RecursionError comes before the limit
+    monkeypatch.setattr(interpreter_module, "MAX_CALL_DEPTH", 10**6)
+    monkeypatch.setattr(interpreter_module, "_FRAMES_PER_CALL", 0)
+    with pytest.raises(PseudoLimitError, match="nested more than") as error:
+        run(depth(5000))
+    assert error.value.line == 5
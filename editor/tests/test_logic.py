@@ -0,0 +1,59 @@
+import pytest
+
+from cambridgeScript.exceptions import PseudoIndexError
+from helpers import run
+
+SEARCH = """DECLARE A : ARRAY[1:3] OF INTEGER
+DECLARE I : INTEGER
+A[1] <- 4
+A[2] <- 5
+A[3] <- 6
+I <- 1
+WHILE I <= 3 AND A[I] <> 9 DO
+    I <- I + 1
+ENDWHILE
+OUTPUT I
+"""
+
+
+def test_and_stops_before_an_out_of_range_index():
+    assert run(SEARCH) == "4\n"
+
+
+def test_the_right_operand_still_runs_when_needed():
+    with pytest.raises(PseudoIndexError):
+        run(SEARCH.replace("I <= 3 AND", "I <= 4 AND"))
+
+
+@pytest.mark.parametrize(
+    "expression, result",
+    [
+        ("FALSE AND 1 / 0 = 1", "False"),
+        ("TRUE OR 1 / 0 = 1", "True"),
+        ("NOT (FALSE AND 1 / 0 = 1)", "True"),
+        ("TRUE AND FALSE", "False"),
+        ("FALSE OR TRUE", "True"),
+    ],
+)
+def test_short_circuit_results(expression, result):
+    assert run(f"OUTPUT {expression}\n") == f"{result}\n"
+
+
+def test_functions_on_the_right_are_only_called_when_needed():
+    source = """DECLARE Calls : INTEGER
+FUNCTION Check() RETURNS BOOLEAN
+    Calls <- Calls + 1
+    RETURN TRUE
+ENDFUNCTION
+Calls <- 0
+IF FALSE AND Check() THEN
+    OUTPUT "no"
+ENDIF
+IF TRUE OR Check() THEN
+    OUTPUT Calls
+ENDIF
+IF TRUE AND Check() THEN
+    OUTPUT Calls
+ENDIF
+"""
+    assert run(source) == "0\n1\n"
@@ -0,0 +1,41 @@
+from cambridgeScript.interpreter.profiler import Profiler
+from helpers import interpreter_for, parse
+
+FIB = """FUNCTION Fib(n : INTEGER) RETURNS INTEGER
+    IF n < 2 THEN
+        RETURN n
+    ENDIF
+    RETURN Fib(n - 1) + Fib(n - 2)
+ENDFUNCTION
+OUTPUT Fib(15)
+"""
+
+
+def run_fib(**options):
+    interpreter = interpreter_for(FIB, **options)
+    interpreter.visit(parse(FIB))
+    assert "".join(interpreter.output) == "610\n"
+    return interpreter
+
+
+def test_memoization_is_off_by_default():
+    interpreter = run_fib()
+    assert interpreter.memo_stats() == []
+    assert interpreter.run_stats()["calls"] == 1973
+
+
+def test_memoization_is_opt_in():
+    interpreter = run_fib(memo_size=64)
+    (table,) = interpreter.memo_stats()
+    assert table["misses"] == 16
+    assert interpreter.run_stats()["calls"] == 16
+
+
+def test_profile_report_shows_memo_hit_rates():
+    interpreter = interpreter_for(FIB, memo_size=64)
+    profiler = Profiler()
+    interpreter.set_tracer(profiler)
+    interpreter.visit(parse(FIB))
+    report = profiler.report(interpreter.origin, interpreter=interpreter)
+    assert "memoized function" in report
+    assert "Fib                          13         16     44.8%" in report
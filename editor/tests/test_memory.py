@@ -0,0 +1,141 @@
+import pytest
+
+from cambridgeScript.exceptions import PseudoIndexError, PseudoMemoryError
+from cambridgeScript.interpreter.arrays import SPARSE_CELL_BYTES
+from helpers import interpreter_for, parse, run
+
+FILL_ARRAY = """DECLARE A : ARRAY[1:50] OF STRING
+DECLARE i : INTEGER
+DECLARE s : STRING
+s <- "x"
+FOR i <- 1 TO 11
+    s <- s & s
+NEXT i
+FOR i <- 1 TO 50
+    A[i] <- s
+NEXT i
+OUTPUT "done"
+"""
+
+
+def test_string_array_elements_count_against_the_limit():
+    with pytest.raises(PseudoMemoryError):
+        run(FILL_ARRAY, memory_limit=50_000)
+
+
+def test_string_array_elements_are_charged():
+    interpreter = interpreter_for(FILL_ARRAY)
+    interpreter.visit(parse(FILL_ARRAY))
+    assert interpreter.memory.peak >= 50 * 2048
+
+
+def test_overwriting_an_element_charges_only_the_growth():
+    source = """DECLARE A : ARRAY[1:2] OF STRING
+A[1] <- "abcd"
+A[1] <- "abcdef"
+A[1] <- "ab"
+"""
+    interpreter = interpreter_for(source)
+    interpreter.visit(parse(source))
+    assert interpreter.memory.peak - interpreter.memory.used == 4
+
+
+def test_input_strings_count_against_the_limit():
+    source = """DECLARE A : ARRAY[1:50] OF STRING
+DECLARE s : STRING
+DECLARE i : INTEGER
+FOR i <- 1 TO 50
+    INPUT A[i]
+NEXT i
+INPUT s
+"""
+    line = "y" * 2000 + "\n"
+    with pytest.raises(PseudoMemoryError):
+        run(source, line * 51, memory_limit=50_000)
+    interpreter = interpreter_for(source, line * 51)
+    interpreter.visit(parse(source))
+    assert interpreter.memory.peak >= 51 * 2000
+
+
+def test_out_of_range_element_is_still_an_index_error():
+    with pytest.raises(PseudoIndexError):
+        run('DECLARE A : ARRAY[1:2] OF STRING\nA[3] <- "x"\n')
+
+
+def test_writes_through_byref_stay_charged_to_the_global():
+    source = """DECLARE S : STRING
+DECLARE I : INTEGER
+PROCEDURE Grow(BYREF T : STRING)
+    T <- T & "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"
+ENDPROCEDURE
+S <- ""
+FOR I <- 1 TO 2000
+    CALL Grow(S)
+NEXT I
+"""
+    with pytest.raises(PseudoMemoryError) as error:
+        run(source, memory_limit=100_000)
+    assert error.value.line == 4
+    interpreter = interpreter_for(source)
+    interpreter.visit(parse(source))
+    assert interpreter.memory.used >= 2000 * 100
+
+
+def test_local_strings_are_released_when_the_frame_is_left():
+    source = """PROCEDURE Grow()
+    DECLARE T : STRING
+    T <- "xxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxxx"
+ENDPROCEDURE
+DECLARE I : INTEGER
+FOR I <- 1 TO 1000
+    CALL Grow()
+NEXT I
+"""
+    interpreter = interpreter_for(source, memory_limit=10_000)
+    interpreter.visit(parse(source))
+    assert interpreter.memory.used == 0
+
+
+SPARSE_LOCAL = """PROCEDURE Touch()
+    DECLARE Big : ARRAY[1:2000000] OF INTEGER
+    DECLARE I : INTEGER
+    FOR I <- 1 TO 10
+        Big[I] <- I
+    NEXT I
+ENDPROCEDURE
+DECLARE N : INTEGER
+FOR N <- 1 TO 500
+    CALL Touch()
+NEXT N
+"""
+
+
+def test_local_sparse_cells_are_released():
+    interpreter = interpreter_for(SPARSE_LOCAL, memory_limit=100_000)
+    interpreter.visit(parse(SPARSE_LOCAL))
+    assert interpreter.memory.used < 1000
+
+
+def test_sparse_cells_are_charged_at_their_line():
+    source = SPARSE_LOCAL.replace("1 TO 10\n", "1 TO 2000\n")
+    with pytest.raises(PseudoMemoryError) as error:
+        run(source, memory_limit=100_000)
+    assert error.value.line == 5
+
+
+def test_copying_a_sparse_array_charges_its_cells():
+    source = """DECLARE Big : ARRAY[1:2000000] OF INTEGER
+DECLARE I : INTEGER
+PROCEDURE Change(V : ARRAY[1:2000000] OF INTEGER)
+    V[1] <- 0
+ENDPROCEDURE
+FOR I <- 1 TO 100
+    Big[I] <- I
+NEXT I
+CALL Change(Big)
+"""
+    interpreter = interpreter_for(source)
+    interpreter.visit(parse(source))
+    # The callee's copy holds all 100 cells until it returns
+    assert interpreter.memory.peak >= 2 * 100 * SPARSE_CELL_BYTES
+    assert interpreter.memory.used < 100 * SPARSE_CELL_BYTES + 1000
@@ -0,0 +1,104 @@
+import pytest
+
+from cambridgeScript.exceptions import PseudoSubroutineError
+from helpers import interpreter_for, parse, run
+
+ARRAYS = """DECLARE A : ARRAY[1:3] OF INTEGER
+DECLARE M : ARRAY[1:2, 1:2] OF INTEGER
+A[1] <- 1
+A[2] <- 2
+M[1, 1] <- 1
+M[2, 2] <- 2
+"""
+
+
+def test_byref_writes_back_to_the_variable():
+    source = """DECLARE X : INTEGER
+DECLARE Y : INTEGER
+PROCEDURE Swap(BYREF P : INTEGER, Q : INTEGER)
+    DECLARE T : INTEGER
+    T <- P
+    P <- Q
+    Q <- T
+ENDPROCEDURE
+X <- 1
+Y <- 2
+CALL Swap(X, Y)
+OUTPUT X, " ", Y
+"""
+    # BYREF carries on to Q, as in the Cambridge SWAP(BYREF X, Y) example
+    assert run(source) == "2 1\n"
+
+
+def test_byval_is_the_default():
+    source = """DECLARE X : INTEGER
+PROCEDURE Bump(P : INTEGER)
+    P <- P + 1
+ENDPROCEDURE
+X <- 1
+CALL Bump(X)
+OUTPUT X
+"""
+    assert run(source) == "1\n"
+
+
+def test_byval_array_writes_stay_in_the_callee():
+    source = ARRAYS + """PROCEDURE Fill(BYVAL V : ARRAY[1:3] OF INTEGER)
+    V[1] <- 99
+    OUTPUT V[1], " ", A[1]
+ENDPROCEDURE
+CALL Fill(A)
+OUTPUT A[1]
+"""
+    assert run(source) == "99 1\n1\n"
+
+
+def test_caller_writes_dont_reach_a_byval_copy():
+    source = ARRAYS + """PROCEDURE Show(V : ARRAY[1:2, 1:2] OF INTEGER)
+    M[2, 2] <- 6
+    OUTPUT V[2, 2]
+ENDPROCEDURE
+CALL Show(M)
+OUTPUT M[2, 2]
+"""
+    assert run(source) == "2\n6\n"
+
+
+def test_byref_array_writes_reach_the_caller():
+    source = (
+        ARRAYS
+        + """PROCEDURE Fill(BYVAL V : ARRAY[1:3] OF INTEGER, BYREF R : ARRAY[1:3] OF INTEGER)
+    V[1] <- 99
+    R[2] <- 77
+ENDPROCEDURE
+CALL Fill(A, A)
+OUTPUT A[1], " ", A[2]
+"""
+    )
+    assert run(source) == "1 77\n"
+
+
+def test_byval_arrays_are_shared_until_written():
+    source = ARRAYS + """DECLARE Total : INTEGER
+FUNCTION Sum(V : ARRAY[1:3] OF INTEGER) RETURNS INTEGER
+    RETURN V[1] + V[2]
+ENDFUNCTION
+Total <- Sum(A)
+"""
+    interpreter = interpreter_for(source)
+    interpreter.visit(parse(source))
+    array = interpreter.variable_state.lookup("A").value
+    assert interpreter.variable_state.lookup("Total").value == 3
+    # Reading never copied the array and the share ended with the call
+    assert array.shares == 0
+    assert interpreter.memory.peak < 2 * array.nbytes() + 1024
+
+
+def test_byref_needs_a_variable():
+    source = """PROCEDURE Set(BYREF P : INTEGER)
+    P <- 1
+ENDPROCEDURE
+CALL Set(3)
+"""
+    with pytest.raises(PseudoSubroutineError, match="must be passed a variable"):
+        run(source)
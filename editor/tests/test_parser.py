@@ -0,0 +1,45 @@
+import pytest
+
+from cambridgeScript.exceptions import ParserError
+from helpers import parse, run
+
+CASE = """DECLARE X : INTEGER
+DECLARE S : STRING
+FOR X <- 1 TO 3
+    CASE OF X
+        1 : S <- "one"
+            OUTPUT S
+        2 : IF X = 2 THEN
+                OUTPUT "two"
+            ENDIF
+        OTHERWISE : OUTPUT "other"
+                    OUTPUT "end"
+    ENDCASE
+NEXT X
+"""
+
+
+def test_case_bodies_run_to_the_next_label():
+    assert run(CASE) == "one\ntwo\nother\nend\n"
+
+
+def test_return_outside_a_subroutine():
+    with pytest.raises(ParserError, match="inside a procedure or function"):
+        parse("RETURN 1\n")
+
+
+def test_return_in_a_case_outside_a_subroutine():
+    source = "CASE OF 1\n    1 : RETURN 1\nENDCASE\n"
+    with pytest.raises(ParserError, match="inside a procedure or function") as error:
+        parse(source)
+    assert error.value.line == 2
+
+
+def test_wrong_dimensions_in_a_case_body():
+    source = """DECLARE A : ARRAY[1:3, 1:3] OF INTEGER
+CASE OF 1
+    1 : A[1] <- 2
+ENDCASE
+"""
+    with pytest.raises(ParserError, match="2 dimension"):
+        parse(source)
@@ -0,0 +1,44 @@
+import pytest
+
+from cambridgeScript.exceptions import PseudoLimitError
+from cambridgeScript.interpreter.profiler import Profiler
+from helpers import interpreter_for, parse
+
+HOT_LOOP = """DECLARE I : INTEGER
+DECLARE S : INTEGER
+S <- 0
+FOR I <- 1 TO 100000000
+    S <- S + I
+NEXT I
+"""
+
+
+def test_timed_out_lines_are_in_the_report():
+    interpreter = interpreter_for(HOT_LOOP, timeout=0.2)
+    profiler = Profiler()
+    interpreter.add_tracer(profiler)
+    with pytest.raises(PseudoLimitError):
+        interpreter.visit(parse(HOT_LOOP))
+    assert profiler.lines.stack == []
+    lines = profiler.to_json()["lines"]
+    assert lines["4"]["total"] >= 0.15
+    assert lines["5"]["hits"] > 1000
+    report = profiler.report(interpreter.origin).splitlines()
+    assert any("FOR I <- 1 TO 100000000" in row for row in report)
+
+
+def test_subroutine_timers_are_balanced_after_an_error():
+    source = """PROCEDURE Fail(N : INTEGER)
+    DECLARE A : ARRAY[1:2] OF INTEGER
+    A[N] <- 1
+ENDPROCEDURE
+CALL Fail(5)
+"""
+    interpreter = interpreter_for(source)
+    profiler = Profiler()
+    interpreter.add_tracer(profiler)
+    with pytest.raises(Exception):
+        interpreter.visit(parse(source))
+    assert profiler.lines.stack == [] and profiler.subroutines.stack == []
+    assert profiler.to_json()["subroutines"]["Fail"]["calls"] == 1
+    assert set(profiler.to_json()["lines"]) == {"1", "2", "3", "5"}
@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cambridgeScript.interpreter.coverage import Coverage
+from cambridgeScript.interpreter.profiler import Profiler
+from cambridgeScript.interpreter.recorder import (
+    Trace,
+    TraceRecorder,
+    divergence,
+    replay,
+)
+from helpers import interpreter_for, parse
+
+EDITOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUESS = """DECLARE Name : STRING
+DECLARE Guess : INTEGER
+DECLARE Secret : REAL
+INPUT Name
+Secret <- RANDOM() * 100
+Guess <- 0
+WHILE Guess < Secret DO
+    INPUT Guess
+    IF Guess < Secret THEN
+        OUTPUT "higher"
+    ELSE
+        OUTPUT "lower or equal"
+    ENDIF
+ENDWHILE
+OUTPUT Name, " guessed ", Secret
+"""
+INPUTS = "Ada\n10\n50\n100\n"
+
+
+def record(source: str, inputs: str) -> tuple[Trace, str]:
+    program = parse(source)
+    interpreter = interpreter_for(source, inputs)
+    recorder = TraceRecorder(program, source)
+    recorder.install(interpreter)
+    interpreter.visit(program)
+    trace = Trace.from_bytes(recorder.trace().to_bytes())
+    return trace, "".join(interpreter.output)
+
+
+def test_replay_reproduces_the_run():
+    trace, output = record(GUESS, INPUTS)
+    program = parse(GUESS)
+    # No input given: replay feeds the recorded lines and RANDOM values back
+    interpreter = interpreter_for(GUESS)
+    recorder = replay(interpreter, program, GUESS, trace)
+    interpreter.visit(program)
+    assert "".join(interpreter.output) == output
+    assert divergence(trace, recorder.trace()) is None
+
+
+def test_replay_detects_a_different_run():
+    trace, _ = record(GUESS, INPUTS)
+    other, _ = record(GUESS, "Ada\n100\n")
+    assert divergence(trace, other) is not None
+
+
+def test_replay_rejects_another_program():
+    trace, _ = record(GUESS, INPUTS)
+    source = GUESS + 'OUTPUT "bye"\n'
+    with pytest.raises(ValueError, match="different program"):
+        replay(interpreter_for(source), parse(source), source, trace)
+
+
+def test_recording_combines_with_other_tracers():
+    program = parse(GUESS)
+    interpreter = interpreter_for(GUESS, INPUTS)
+    recorder = TraceRecorder(program, GUESS)
+    recorder.install(interpreter)
+    coverage = Coverage(program, GUESS)
+    interpreter.add_tracer(coverage)
+    profiler = Profiler()
+    interpreter.add_tracer(profiler)
+    interpreter.visit(program)
+    trace = recorder.trace()
+    rerun = interpreter_for(GUESS)
+    replayed = replay(rerun, program, GUESS, trace)
+    rerun.visit(program)
+    assert rerun.output == interpreter.output
+    assert divergence(trace, replayed.trace()) is None
+    assert coverage.executed[program.statements[5].index]
+    assert profiler.lines.timings[4].count == 1
+
+
+def test_cli_records_while_profiling(tmp_path):
+    source = tmp_path / "guess.p"
+    source.write_text(GUESS)
+    inputs = tmp_path / "inputs.txt"
+    inputs.write_text(INPUTS)
+    trace = tmp_path / "guess.trace"
+    cli = [sys.executable, os.path.join(EDITOR, "cambridgeScript"), str(source)]
+    recorded = subprocess.run(
+        cli
+        + ["--input", str(inputs), "--record", str(trace), "--profile-json"]
+        + [str(tmp_path / "profile.json")],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert (tmp_path / "profile.json").exists()
+    replayed = subprocess.run(
+        cli + ["--replay", str(trace)], capture_output=True, text=True, check=True
+    )
+    assert replayed.stdout == recorded.stdout
+    assert "The replay matches the trace" in replayed.stderr
+
+
+def test_webserver_keeps_only_the_newest_traces(tmp_path, monkeypatch):
+    webserver = pytest.importorskip("webserver")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(webserver, "MAX_TRACES", 2)
+    os.makedirs(webserver.TRACE_DIR)
+    for i in range(4):
+        stem = os.path.join(webserver.TRACE_DIR, f"run{i}")
+        for suffix in (".trace", ".p", ".files.json"):
+            with open(stem + suffix, "w") as file:
+                file.write("x")
+            os.utime(stem + suffix, (i, i))
+    webserver.prune_traces()
+    assert sorted(os.listdir(webserver.TRACE_DIR)) == [
+        "run2.files.json",
+        "run2.p",
+        "run2.trace",
+        "run3.files.json",
+        "run3.p",
+        "run3.trace",
+    ]
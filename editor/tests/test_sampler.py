@@ -0,0 +1,61 @@
+import sys
+
+from cambridgeScript.interpreter.sampler import SamplingProfiler, pseudocode_stack
+from helpers import interpreter_for, parse
+
+COUNTDOWN = """PROCEDURE Down(N : INTEGER)
+    IF N > 0 THEN
+        CALL Down(N - 1)
+    ELSE
+        OUTPUT Depth(3)
+    ENDIF
+ENDPROCEDURE
+FUNCTION Depth(N : INTEGER) RETURNS INTEGER
+    RETURN N
+ENDFUNCTION
+CALL Down(2)
+"""
+
+EXPECTED = [
+    "<program>:11",
+    "Down:3",
+    "Down:3",
+    "Down:5",
+    "Depth:9",
+]
+
+
+def test_stack_of_a_recursive_program():
+    stacks = []
+
+    def sample(stmt):
+        if stmt.line == 9:
+            stacks.append(pseudocode_stack(sys._getframe()))
+
+    interpreter = interpreter_for(COUNTDOWN)
+    interpreter.add_hook("on_statement", sample)
+    interpreter.visit(parse(COUNTDOWN))
+    assert stacks == [EXPECTED]
+
+
+def test_sampling_an_untraced_run():
+    source = COUNTDOWN.replace(
+        "    RETURN N\n",
+        "    DECLARE I : INTEGER\n"
+        "    FOR I <- 1 TO 200000\n"
+        "        N <- N + 0\n"
+        "    NEXT I\n"
+        "    RETURN N\n",
+    )
+    interpreter = interpreter_for(source)
+    program = parse(source)
+    sampler = SamplingProfiler(0.001)
+    sampler.start()
+    try:
+        interpreter.visit(program)
+    finally:
+        sampler.stop()
+    # The loop moved the CALL down to line 15, its body is line 11
+    inner = "<program>:15;Down:3;Down:3;Down:5;Depth:11"
+    assert sampler.samples[inner] > 0
+    assert all(stack.startswith("<program>:") for stack in sampler.samples)
@@ -0,0 +1,84 @@
+import pytest
+
+from cambridgeScript.exceptions import PseudoUndefinedError
+from helpers import run
+
+
+def test_callee_doesnt_see_the_callers_locals():
+    source = """PROCEDURE Inner()
+    OUTPUT Secret
+ENDPROCEDURE
+PROCEDURE Outer()
+    DECLARE Secret : INTEGER
+    Secret <- 1
+    CALL Inner()
+ENDPROCEDURE
+CALL Outer()
+"""
+    with pytest.raises(PseudoUndefinedError) as error:
+        run(source)
+    assert error.value.line == 2
+
+
+def test_assigning_a_global_writes_through():
+    source = """DECLARE Total : INTEGER
+PROCEDURE Add(N : INTEGER)
+    Total <- Total + N
+ENDPROCEDURE
+Total <- 0
+CALL Add(2)
+CALL Add(3)
+OUTPUT Total
+"""
+    assert run(source) == "5\n"
+
+
+def test_globals_declared_after_the_subroutine_are_visible():
+    source = """FUNCTION Twice() RETURNS INTEGER
+    RETURN Late * 2
+ENDFUNCTION
+DECLARE Late : INTEGER
+Late <- 21
+OUTPUT Twice()
+"""
+    assert run(source) == "42\n"
+
+
+def test_locals_shadow_globals_and_are_dropped_on_return():
+    source = """DECLARE X : INTEGER
+PROCEDURE Shadow()
+    DECLARE X : INTEGER
+    X <- 2
+    OUTPUT X
+ENDPROCEDURE
+X <- 1
+CALL Shadow()
+OUTPUT X
+"""
+    assert run(source) == "2\n1\n"
+
+
+def test_each_recursive_call_has_its_own_locals():
+    source = """FUNCTION Sum(N : INTEGER) RETURNS INTEGER
+    DECLARE Rest : INTEGER
+    IF N = 0 THEN
+        RETURN 0
+    ENDIF
+    Rest <- Sum(N - 1)
+    RETURN N + Rest
+ENDFUNCTION
+OUTPUT Sum(4)
+"""
+    assert run(source) == "10\n"
+
+
+def test_locals_dont_leak_into_the_program():
+    source = """PROCEDURE Make()
+    DECLARE Temp : INTEGER
+    Temp <- 1
+ENDPROCEDURE
+CALL Make()
+OUTPUT Temp
+"""
+    with pytest.raises(PseudoUndefinedError):
+        run(source)
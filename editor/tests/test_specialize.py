@@ -0,0 +1,167 @@
+import json
+import operator
+import os
+import subprocess
+import sys
+
+import pytest
+
+from cambridgeScript.constants import Operator
+from cambridgeScript.interpreter.rope import ROPE_THRESHOLD, Rope, concat
+from cambridgeScript.interpreter.specialize import (
+    _SPECIALIZATIONS,
+    DEOPT_LIMIT,
+    specialize,
+)
+from cambridgeScript.syntax_tree import BinaryOp, Expression
+from helpers import interpreter_for, parse, run
+
+EDITOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MIXED = """DECLARE I : INTEGER
+DECLARE S : STRING
+DECLARE Done : BOOLEAN
+S <- ""
+Done <- FALSE
+FOR I <- 1 TO 100
+    S <- S & "ab"
+    IF S > "aba" AND Done = FALSE THEN
+        OUTPUT I, " ", LENGTH(S), " ", I / 4
+        Done <- TRUE
+    ENDIF
+    IF S = "ab" OR I * 2 = 200 THEN
+        OUTPUT I
+    ENDIF
+NEXT I
+"""
+
+
+def test_adaptive_mode_gives_the_same_output():
+    assert run(MIXED, adaptive=True) == run(MIXED) == "1\n2 4 0.5\n100\n"
+
+
+def test_no_entry_is_the_generic_operator():
+    for (op, _, _), specialized in _SPECIALIZATIONS.items():
+        assert specialized not in (op, concat)
+
+
+@pytest.mark.parametrize("op", [Operator.ADD, Operator.LESS_THAN, Operator.DIV])
+def test_numbers_stay_on_the_operator_functions(op):
+    assert specialize(op, int, int) is None
+    assert specialize(op, float, int) is None
+
+
+def test_rope_comparisons_compare_the_text():
+    rope = Rope(["ab", "c"], 3)
+    less = specialize(Operator.LESS_THAN, Rope, str)
+    assert less(rope, "abd") and not less(rope, "abc")
+    assert specialize(Operator.EQUAL, str, Rope)("abc", rope)
+
+
+def test_booleans_compare_by_identity():
+    assert specialize(Operator.EQUAL, bool, bool) is operator.is_
+    assert specialize(Operator.NOT_EQUAL, bool, bool) is operator.is_not
+
+
+def test_guards_and_deoptimization():
+    interpreter = interpreter_for(MIXED, adaptive=True)
+    interpreter.visit(parse(MIXED))
+    stats = {
+        (row["line"], row["operator"]): row
+        for row in interpreter.specialization_stats()
+    }
+    done = stats[8, "EQUAL"]
+    assert done["types"] == ["bool", "bool"]
+    # Evaluated from I = 2 on, the first time generically
+    assert done["hits"] == 98 and done["misses"] == 0
+    # S = "ab" starts as str = str, which has no entry, then turns into a Rope
+    grown = stats[12, "EQUAL"]
+    assert grown["types"] == ["Rope", "str"] and grown["misses"] == 0
+
+
+def test_nodes_without_a_specialization_give_up():
+    source = "DECLARE X : INTEGER\nX <- 1\nX <- X + 2\n"
+    interpreter = interpreter_for(source, adaptive=True)
+    program = parse(source)
+    interpreter.visit(program)
+    add = program.statements[-1].value
+    assert add.gave_up and add.misses == 0 and add.guard is None
+    assert interpreter.specialization_stats() == []
+
+
+def test_concatenation_builds_ropes_in_both_modes():
+    source = f"""DECLARE S : STRING
+DECLARE I : INTEGER
+S <- ""
+FOR I <- 1 TO {ROPE_THRESHOLD}
+    S <- S & "x"
+NEXT I
+"""
+    for adaptive in (False, True):
+        interpreter = interpreter_for(source, adaptive=adaptive)
+        interpreter.visit(parse(source))
+        value = interpreter.variable_state.lookup("S").value
+        assert type(value) is Rope and str(value) == "x" * ROPE_THRESHOLD
+
+
+@pytest.mark.parametrize(
+    "left, right",
+    [("ab", "cd"), ("a" * 40, "b" * 40), ("n", 12), (3, "m"), ("ab", Rope(["c"], 1))],
+)
+def test_concat_specializations_match_the_generic_path(left, right):
+    specialized = specialize(Operator.CONCAT, type(left), type(right))
+    assert str(specialized(left, right)) == str(concat(left, right))
+
+
+def test_rope_appends_in_place():
+    rope = concat("a" * 40, "b" * 40)
+    appended = specialize(Operator.CONCAT, Rope, str)(rope, "c")
+    assert appended.parts is rope.parts and len(appended) == 81
+
+
+def test_operator_concat_is_plain():
+    assert Operator.CONCAT("a" * 40, "b" * 40) == "a" * 40 + "b" * 40
+    assert Operator.CONCAT("n", 1) == "n1"
+
+
+class Values(Expression):
+    """An operand that evaluates to each of values in turn."""
+
+    def __init__(self, values):
+        self.values = iter(values)
+
+    def accept(self, visitor):
+        return next(self.values)
+
+
+def test_nodes_give_up_after_too_many_misses():
+    # Alternating operand types fail the guard on every evaluation
+    rope = Rope(["ab"], 2)
+    count = 4 * DEOPT_LIMIT
+    expr = BinaryOp(
+        Operator.EQUAL,
+        Values([True, rope] * count),
+        Values([True, "ab"] * count),
+    )
+    interpreter = interpreter_for("", adaptive=True)
+    for _ in range(2 * count):
+        assert interpreter.visit(expr)
+    (stats,) = interpreter.specialization_stats()
+    assert stats["misses"] == DEOPT_LIMIT and stats["gave_up"]
+    assert stats["hits"] == 0 and stats["types"] is None
+
+
+def test_adaptive_flag_reports_specializations(tmp_path):
+    program = tmp_path / "program.p"
+    program.write_text(MIXED)
+    profile = tmp_path / "profile.json"
+    subprocess.run(
+        [sys.executable, os.path.join(EDITOR, "cambridgeScript"), str(program)]
+        + ["--adaptive", "--profile-json", str(profile)],
+        capture_output=True,
+        check=True,
+    )
+    operators = {
+        row["operator"] for row in json.loads(profile.read_text())["specializations"]
+    }
+    assert {"EQUAL", "GREATER_THAN", "CONCAT"} <= operators
@@ -0,0 +1,53 @@
+from cambridgeScript.interpreter.interpreter import FUEL_CHECK_INTERVAL, Interpreter
+from cambridgeScript.interpreter.streams import BatchedInputStream, BufferedOutputStream
+from cambridgeScript.interpreter.variables import VariableState
+from helpers import parse
+
+QUIET_LOOP = f"""DECLARE I : INTEGER
+OUTPUT "start"
+FOR I <- 1 TO {3 * FUEL_CHECK_INTERVAL}
+    I <- I
+NEXT I
+OUTPUT "end"
+"""
+
+
+def flushes(source: str, **options) -> list[tuple[str, int]]:
+    """Every chunk written, with the statements run when it was written."""
+    chunks = []
+    interpreter = Interpreter(
+        VariableState(),
+        source,
+        BatchedInputStream(""),
+        output_stream=BufferedOutputStream(
+            lambda chunk: chunks.append((chunk, interpreter.fuel_used)),
+            **options,
+        ),
+    )
+    interpreter.visit(parse(source))
+    return chunks
+
+
+def test_output_waits_for_a_full_buffer_or_the_end():
+    ((chunk, statements),) = flushes(QUIET_LOOP, flush_interval=None)
+    assert chunk == "start\nend\n"
+    assert statements > 3 * FUEL_CHECK_INTERVAL
+
+
+def test_output_is_flushed_between_statements_after_the_interval():
+    (start, first), (end, last) = flushes(QUIET_LOOP, flush_interval=1e-9)
+    assert (start, end) == ("start\n", "end\n")
+    # Written at the first check after it, long before the loop ends
+    assert first <= FUEL_CHECK_INTERVAL + 1
+    assert last > 3 * FUEL_CHECK_INTERVAL
+
+
+def test_full_buffer_is_flushed_on_write():
+    chunks = []
+    stream = BufferedOutputStream(chunks.append, buffer_size=4, flush_interval=None)
+    stream.write("ab")
+    stream.write("cd")
+    stream.write("e")
+    assert chunks == ["abcd"]
+    stream.flush()
+    assert chunks == ["abcd", "e"]
@@ -0,0 +1,73 @@
+import json
+import os
+import subprocess
+import sys
+
+from helpers import interpreter_for, parse
+
+EDITOR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def summarize(tmp_path, source: str) -> dict:
+    path = tmp_path / "program.p"
+    path.write_text(source)
+    summary = tmp_path / "summary.json"
+    subprocess.run(
+        [sys.executable, os.path.join(EDITOR, "cambridgeScript"), str(path)]
+        + ["--summary-json", str(summary)],
+        capture_output=True,
+    )
+    return json.loads(summary.read_text())
+
+
+def test_summary_of_a_run(tmp_path):
+    summary = summarize(tmp_path, 'OUTPUT "héllo"\n')
+    assert summary["error"] is None
+    assert summary["fuel_used"] == 1
+    assert summary["output_bytes"] == 7
+    assert set(summary["seconds"]) == {"lex", "parse", "execute"}
+
+
+def test_summary_of_a_syntax_error(tmp_path):
+    summary = summarize(tmp_path, "DECLARE X : INTEGER\nX <-\n")
+    assert summary["error"] == "ParserError"
+    assert summary["fuel_used"] == 0
+    assert "execute" not in summary["seconds"]
+
+
+def test_run_stats_count_calls():
+    source = """PROCEDURE Down(N : INTEGER)
+    IF N > 0 THEN
+        CALL Down(N - 1)
+    ENDIF
+ENDPROCEDURE
+CALL Down(3)
+"""
+    interpreter = interpreter_for(source)
+    interpreter.visit(parse(source))
+    stats = interpreter.run_stats()
+    assert stats["calls"] == 4
+    assert stats["peak_call_depth"] == 4
+
+
+def test_output_bytes_include_buffered_output():
+    interpreter = interpreter_for("")
+    interpreter.output_stream.write("€\n")
+    assert interpreter.run_stats()["output_bytes"] == 4
+    interpreter.output_stream.flush()
+    interpreter.output_stream.write("ab\n")
+    assert interpreter.run_stats()["output_bytes"] == 7
+
+
+def test_fuel_used_counts_whole_blocks():
+    source = """FUNCTION F(N : INTEGER) RETURNS INTEGER
+    RETURN N
+    OUTPUT "never"
+ENDFUNCTION
+DECLARE X : INTEGER
+X <- F(1)
+"""
+    interpreter = interpreter_for(source)
+    interpreter.visit(parse(source))
+    # The unreachable OUTPUT is charged with the function body
+    assert interpreter.run_stats()["fuel_used"] == 5
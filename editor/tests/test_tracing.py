@@ -0,0 +1,100 @@
+import pytest
+
+from cambridgeScript.exceptions import PseudoIndexError, PseudoLimitError
+from cambridgeScript.interpreter.profiler import Profiler
+from cambridgeScript.interpreter.tracing import Tracer
+from helpers import interpreter_for, parse
+
+FAILING_CALL = """DECLARE A : ARRAY[1:3] OF INTEGER
+FUNCTION Get(i : INTEGER) RETURNS INTEGER
+    RETURN A[i]
+ENDFUNCTION
+PROCEDURE Put(i : INTEGER)
+    A[i] <- Get(i)
+ENDPROCEDURE
+CALL Put(4)
+"""
+
+
+class Calls(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def enter_call(self, name, line):
+        self.events.append(("enter", name))
+
+    def exit_call(self, name):
+        self.events.append(("exit", name))
+
+
+def test_calls_that_raise_are_exited():
+    interpreter = interpreter_for(FAILING_CALL)
+    tracer = Calls()
+    interpreter.set_tracer(tracer)
+    with pytest.raises(PseudoIndexError):
+        interpreter.visit(parse(FAILING_CALL))
+    assert tracer.events == [
+        ("enter", "Put"),
+        ("enter", "Get"),
+        ("exit", "Get"),
+        ("exit", "Put"),
+    ]
+
+
+def test_profiler_stack_unwinds_on_error():
+    interpreter = interpreter_for(FAILING_CALL)
+    profiler = Profiler()
+    interpreter.set_tracer(profiler)
+    with pytest.raises(PseudoIndexError):
+        interpreter.visit(parse(FAILING_CALL))
+    assert profiler.subroutines.stack == []
+    assert profiler.subroutines.timings["Get"].count == 1
+
+
+def test_fuel_limit_applies_while_traced():
+    source = "DECLARE I : INTEGER\nWHILE TRUE DO\n    I <- 1\nENDWHILE\n"
+    interpreter = interpreter_for(source, fuel=1000)
+    interpreter.set_tracer(Tracer())
+    with pytest.raises(PseudoLimitError):
+        interpreter.visit(parse(source))
+    assert interpreter.fuel_used <= 1001
+
+
+LOOP = """DECLARE I : INTEGER
+FOR I <- 1 TO 3
+    OUTPUT I
+NEXT I
+"""
+
+
+def test_hooks_added_after_another_tracer():
+    interpreter = interpreter_for(LOOP)
+    profiler = Profiler()
+    interpreter.add_tracer(profiler)
+    lines = []
+    interpreter.add_hook("on_statement", lambda stmt: lines.append(stmt.line))
+    interpreter.visit(parse(LOOP))
+    assert lines == [1, 2, 3, 3, 3]
+    assert profiler.lines.timings[3].count == 3
+
+
+def test_hooks_removed_after_another_tracer_was_added():
+    interpreter = interpreter_for(LOOP)
+    lines = []
+    hook = interpreter.add_hook("on_statement", lambda stmt: lines.append(stmt.line))
+    profiler = Profiler()
+    interpreter.add_tracer(profiler)
+    interpreter.remove_hook("on_statement", hook)
+    assert interpreter.tracer is profiler
+    interpreter.visit(parse(LOOP))
+    assert lines == [] and profiler.lines.timings[3].count == 3
+
+
+def test_removing_the_last_hook_runs_untraced():
+    interpreter = interpreter_for(LOOP)
+    hook = interpreter.add_hook("on_statement", print)
+    interpreter.add_hook("on_statement", print)
+    interpreter.remove_hook("on_statement", hook)
+    interpreter.remove_hook("on_statement", print)
+    assert interpreter.tracer is None
+    assert "visit_statements" not in vars(interpreter)
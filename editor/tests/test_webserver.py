@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+webserver = pytest.importorskip("webserver")
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, message):
+        self.messages.append(json.loads(message))
+
+
+class FinishedProcess:
+    def __init__(self, returncode):
+        self.returncode = returncode
+
+    async def wait(self):
+        return self.returncode
+
+
+def results(clientid, returncode=0, readers=()):
+    websocket = FakeWebSocket()
+    asyncio.run(
+        webserver.return_results(
+            websocket, FinishedProcess(returncode), clientid, {}, list(readers)
+        )
+    )
+    return websocket.messages
+
+
+def test_files_are_only_returned_when_the_run_saved_them(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # The preloaded files, left behind by a run that crashed before saving
+    with open(webserver.vfs_path(1), "w") as file:
+        json.dump({"data.txt": "old\n"}, file)
+    assert results(1, returncode=1) == []
+    assert not tmp_path.joinpath(webserver.vfs_path(1)).exists()
+
+    with open(webserver.saved_vfs_path(1), "w") as file:
+        json.dump({"data.txt": "new\n"}, file)
+    assert results(1) == [{"files": {"data.txt": "new\n"}}]
+
+
+def test_summary_comes_after_the_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with open(webserver.summary_path(1), "w") as file:
+        json.dump({"statements": 1}, file)
+    websocket = FakeWebSocket()
+
+    async def run():
+        async def output():
+            await asyncio.sleep(0.01)
+            await websocket.send(json.dumps({"output": "hello\n"}))
+
+        reader = asyncio.create_task(output())
+        await webserver.return_results(websocket, FinishedProcess(0), 1, {}, [reader])
+
+    asyncio.run(run())
+    assert websocket.messages == [
+        {"output": "hello\n"},
+        {"summary": {"statements": 1, "exit_code": 0}},
+    ]
+
+
+def test_adaptive_mode_is_passed_on():
+    assert "--adaptive" in webserver.run_reports({"adaptive": True}, "c")
+    assert "--adaptive" not in webserver.run_reports({"profile": True}, "c")
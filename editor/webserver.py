@@ -1,13 +1,26 @@
 import asyncio
+import codecs
 import websockets
 import json
+import math
 import subprocess
 import os
+import shutil
 import time
 
 # 维护一个字典，用于存储每个 WebSocket 客户端的输入和执行状态
 clients = {}
 
+# 每次运行的默认限制，客户端可以要求更小的值，但不能超过这些上限
+MAX_FUEL = 50_000_000
+MAX_TIMEOUT = 10.0
+MAX_MEMORY = 256 * 1024 * 1024
+
+# 出错的运行把执行轨迹、代码和输入文件保存到这里，以便离线重放；
+# 最多保留 MAX_TRACES 次运行，超出时删除最旧的
+TRACE_DIR = "traces"
+MAX_TRACES = 50
+
 async def handle_connection(websocket):
     client_id = id(websocket)
     clients[client_id] = {
@@ -25,12 +38,35 @@ async def handle_connection(websocket):
                 code = data["code"]
                 
                 # 启动代码执行进程
-                process = await execute_code(websocket, code, client_id)
+                process = await execute_code(
+                    websocket,
+                    code,
+                    client_id,
+                    run_limits(data) + run_reports(data, client_id),
+                    data.get("files", {}),
+                )
                 clients[client_id]["process"] = process
+                if process is None:
+                    # 启动失败，execute_code 已经把错误发给了客户端
+                    continue
 
                 # 开始监听子进程的输出和错误
-                asyncio.create_task(read_stdout(websocket, process))
-                asyncio.create_task(read_stderr(websocket, process))
+                readers = [
+                    asyncio.create_task(read_stdout(websocket, process)),
+                    asyncio.create_task(read_stderr(websocket, process)),
+                ]
+
+                # 如果客户端预先提供了全部输入，一次性写入并关闭 stdin。
+                # 必须在读取 stdout/stderr 的任务启动之后、并作为独立任务进行：
+                # 输入超过管道缓冲区而子进程又写满了 stdout 时，双方会互相等待
+                if "stdin" in data:
+                    asyncio.create_task(preload_input(process, data["stdin"]))
+                # 运行结束后把虚拟文件系统里的文件和性能分析结果发回客户端
+                asyncio.create_task(
+                    return_results(
+                        websocket, process, client_id, data.get("files", {}), readers
+                    )
+                )
 
             elif "input" in data:
                 # 发送输入到子进程
@@ -46,7 +82,60 @@ async def handle_connection(websocket):
             process.terminate()
         del clients[client_id]
 
-async def execute_code(websocket, code, clientid):
+def client_limit(value, maximum, cast):
+    # 只接受有限的正数（拒绝 NaN、无穷大、负数和非数字），否则使用服务器上限；
+    # 再限制在上限以内
+    try:
+        value = cast(value)
+    except (TypeError, ValueError, OverflowError):
+        return maximum
+    if not math.isfinite(value) or value <= 0:
+        return maximum
+    return min(value, maximum)
+
+def run_limits(data):
+    # 解析客户端请求的 fuel/timeout/memory，并限制在服务器上限以内
+    fuel = client_limit(data.get("fuel"), MAX_FUEL, int)
+    timeout = client_limit(data.get("timeout"), MAX_TIMEOUT, float)
+    memory = client_limit(data.get("memory"), MAX_MEMORY, int)
+    return [
+        "--fuel", str(fuel),
+        "--timeout", str(timeout),
+        "--memory-limit", str(memory),
+    ]
+
+def run_reports(data, clientid):
+    # 客户端请求 "profile" 时，解释器把逐行的性能数据写到 JSON 文件；
+    # 请求 "sample" 时，用采样分析器写出 flamegraph 格式的调用栈；
+    # 请求 "adaptive" 时使用自适应模式，profile 里会有各运算的专门化计数
+    reports = []
+    if data.get("adaptive"):
+        reports += ["--adaptive"]
+    if data.get("profile"):
+        reports += ["--profile-json", profile_path(clientid)]
+    if data.get("sample"):
+        reports += ["--sample", stacks_path(clientid)]
+    return reports
+
+def vfs_path(clientid):
+    return f"{clientid}.files.json"
+
+def saved_vfs_path(clientid):
+    return f"{clientid}.files.out.json"
+
+def profile_path(clientid):
+    return f"{clientid}.profile.json"
+
+def stacks_path(clientid):
+    return f"{clientid}.stacks.txt"
+
+def trace_path(clientid):
+    return f"{clientid}.trace"
+
+def summary_path(clientid):
+    return f"{clientid}.summary.json"
+
+async def execute_code(websocket, code, clientid, limits, files):
     # 在当前目录下创建一个临时文件来存储代码
     global temp_file_path 
     temp_file_path = f"{clientid}.p"
@@ -56,10 +145,22 @@ async def execute_code(websocket, code, clientid):
     temp_file.flush()
     temp_file.close()
     print("tempfile saved to", temp_file_path, "code:", code)
+    # 文件语句只访问内存中的虚拟文件系统，预先载入客户端提供的数据文件
+    with open(vfs_path(clientid), "w") as vfs_file:
+        json.dump(files, vfs_file)
+    # 删除上一次运行留下的结果文件：运行在写出结果之前崩溃时，
+    # 不能把旧的文件当作这次的结果发回去
+    for path in (saved_vfs_path(clientid), profile_path(clientid),
+                 stacks_path(clientid), trace_path(clientid), summary_path(clientid)):
+        if os.path.exists(path):
+            os.remove(path)
     try:
         # 启动子进程
         process = await asyncio.create_subprocess_exec(
-            "python", "cambridgeScript", temp_file_path,  # 直接运行创建的文件
+            "python", "cambridgeScript", temp_file_path, *limits,  # 直接运行创建的文件
+            "--vfs-load", vfs_path(clientid), "--vfs-save", saved_vfs_path(clientid),
+            "--record", trace_path(clientid),
+            "--summary-json", summary_path(clientid),
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE
@@ -71,12 +172,14 @@ async def execute_code(websocket, code, clientid):
     return process
 
 async def read_stdout(websocket, process):
-    # 逐行读取 stdout，并实时发送到 WebSocket
+    # 按块读取 stdout（解释器已经缓冲了输出），每块只发送一条 WebSocket 消息
+    decoder = codecs.getincrementaldecoder("utf-8")()
     try:
-        async for line in process.stdout:
-            output = line.decode("utf-8").strip()
-            print("output:", output)
-            await websocket.send(json.dumps({"output": output + "\n"}))
+        while chunk := await process.stdout.read(65536):
+            output = decoder.decode(chunk)
+            if output:
+                print("output:", output)
+                await websocket.send(json.dumps({"output": output}))
     except Exception as e:
         await websocket.send(json.dumps({"error": f"Error reading stdout: {str(e)}"}))
 
@@ -100,6 +203,101 @@ async def send_input(process, input_text):
         except Exception as e:
             print(f"Unexpected error: {e}")
 
+async def return_results(websocket, process, clientid, files_in, readers):
+    try:
+        await process.wait()
+        # 等输出全部发送完，摘要才是最后一条消息
+        await asyncio.gather(*readers)
+    except Exception as e:
+        print(f"Error waiting for process: {e}")
+    keep_trace(process, clientid, files_in)
+    if os.path.exists(vfs_path(clientid)):
+        os.remove(vfs_path(clientid))
+    # 只有运行正常写出了虚拟文件系统时才发回文件
+    if os.path.exists(saved_vfs_path(clientid)):
+        try:
+            with open(saved_vfs_path(clientid)) as vfs_file:
+                files = json.load(vfs_file)
+            os.remove(saved_vfs_path(clientid))
+            await websocket.send(json.dumps({"files": files}))
+        except Exception as e:
+            print(f"Error returning files: {e}")
+    if os.path.exists(profile_path(clientid)):
+        try:
+            with open(profile_path(clientid)) as profile_file:
+                profile = json.load(profile_file)
+            os.remove(profile_path(clientid))
+            await websocket.send(json.dumps({"heatmap": heatmap(profile)}))
+        except Exception as e:
+            print(f"Error returning profile: {e}")
+    if os.path.exists(stacks_path(clientid)):
+        try:
+            with open(stacks_path(clientid)) as stacks_file:
+                stacks = stacks_file.read()
+            os.remove(stacks_path(clientid))
+            await websocket.send(json.dumps({"stacks": stacks}))
+        except Exception as e:
+            print(f"Error returning stacks: {e}")
+    # 运行摘要（各阶段耗时、执行的语句数、调用次数、内存峰值等）作为最后一条消息发送
+    if os.path.exists(summary_path(clientid)):
+        try:
+            with open(summary_path(clientid)) as summary_file:
+                summary = json.load(summary_file)
+            os.remove(summary_path(clientid))
+            summary["exit_code"] = process.returncode
+            await websocket.send(json.dumps({"summary": summary}))
+        except Exception as e:
+            print(f"Error returning summary: {e}")
+
+def keep_trace(process, clientid, files_in):
+    # 只保留出错的运行的轨迹，用
+    # python cambridgeScript NAME.p --replay NAME.trace --vfs-load NAME.files.json
+    # 离线重放
+    if not os.path.exists(trace_path(clientid)):
+        return
+    try:
+        if process.returncode != 0:
+            os.makedirs(TRACE_DIR, exist_ok=True)
+            name = os.path.join(TRACE_DIR, f"{clientid}-{int(time.time())}")
+            os.replace(trace_path(clientid), name + ".trace")
+            shutil.copy(f"{clientid}.p", name + ".p")
+            with open(name + ".files.json", "w") as files_file:
+                json.dump(files_in, files_file)
+            prune_traces()
+        else:
+            os.remove(trace_path(clientid))
+    except Exception as e:
+        print(f"Error keeping trace: {e}")
+
+def prune_traces():
+    # 按修改时间删除最旧的运行（轨迹、代码和输入文件一起删除）
+    traces = sorted(
+        (name for name in os.listdir(TRACE_DIR) if name.endswith(".trace")),
+        key=lambda name: os.path.getmtime(os.path.join(TRACE_DIR, name)),
+    )
+    for name in traces[:-MAX_TRACES]:
+        stem = os.path.join(TRACE_DIR, name[:-len(".trace")])
+        for suffix in (".trace", ".p", ".files.json"):
+            if os.path.exists(stem + suffix):
+                os.remove(stem + suffix)
+
+def heatmap(profile):
+    # 每行的执行次数、自身耗时，以及占全部自身耗时的比例（0 到 1，供编辑器着色）
+    lines = profile["lines"]
+    total = sum(line["self"] for line in lines.values()) or 1
+    return {
+        number: {"hits": line["hits"], "self": line["self"], "share": line["self"] / total}
+        for number, line in lines.items()
+    }
+
+async def preload_input(process, input_text):
+    try:
+        process.stdin.write(input_text.encode())
+        await process.stdin.drain()
+        process.stdin.close()
+    except (BrokenPipeError, ConnectionResetError) as e:
+        print(f"Error sending input to process: {e}")
+
 async def main():
     async with websockets.serve(handle_connection, "0.0.0.0", 5000):
         print("WebSocket server is running on ws://0.0.0.0:5000")